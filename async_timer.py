@@ -0,0 +1,188 @@
+import asyncio
+
+from focus_timer import build_timer_settings
+from sampler import FocusSampler
+
+
+class AsyncFocusTimer:
+    """asyncio 版专注计时器，可嵌入异步服务，成千上万个计时器共享一个事件循环
+
+    阶段规则与 FocusTimer 相同；睡眠基于 loop.time() 的绝对截止时间，
+    停止计时用任务取消代替 is_running 标志，暂停/恢复是可 await 的命令，
+    生命周期事件通过 events() 异步迭代器发布。不播放音效、不读取键盘。
+    """
+
+    def __init__(self, mode="default", custom_settings=None, rng=None, tick_interval=None, seed=None):
+        settings = build_timer_settings(mode, custom_settings)
+        if seed is None and mode == "custom" and custom_settings:
+            seed = custom_settings.get("seed")  # 配置中保存的种子
+        self.mode = mode
+        self.max_focus_time = settings["max_focus_time"]
+        self.short_rest_time = settings["short_rest_time"]
+        self.long_rest_time = settings["long_rest_time"]
+        self.focus_distribution = settings["focus_distribution"]
+        self.sampler = FocusSampler(settings["focus_distribution"], settings["min_focus_time"],
+                                    settings["max_single_focus_time"], settings["focus_mean"],
+                                    settings["focus_std"], rng=rng, batch_size=64, seed=seed)
+        self.seed = self.sampler.seed  # 随机种子，记录在 session_start 事件中
+        self.tick_interval = tick_interval  # 发布 tick 事件的间隔（秒），None 表示不发布
+        self.total_focus_time = 0  # 累计专注时间
+        self.total_pause_time = 0.0  # 总暂停时间（秒）
+        self.cycle_count = 0  # 已完成的大周期数
+        self.phase = None  # 当前阶段
+        self.is_paused = False
+        self.deadline = None  # 当前倒计时截止时间（loop.time()）
+        self._pause_start = None
+        self._start = None
+        self._wakeup = asyncio.Event()
+        self._subscribers = []
+        self._task = None
+
+    def _loop_time(self):
+        return asyncio.get_running_loop().time()
+
+    def _emit(self, event, **data):
+        """向所有订阅者发布事件"""
+        record = {"t": self._loop_time() - self._start if self._start is not None else 0.0,
+                  "event": event}
+        record.update(data)
+        for queue in self._subscribers:
+            queue.put_nowait(record)
+
+    def subscribe(self):
+        """立即登记一个事件队列并返回，之后发出的事件都会进入该队列（会话结束时放入 None）"""
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    async def events(self, queue=None):
+        """异步迭代计时器事件，会话结束后迭代终止
+
+        异步生成器第一次迭代时才开始执行，需要从 run() 的第一个事件开始接收时，
+        先用 subscribe() 取得队列再传入。
+        """
+        if queue is None:
+            queue = self.subscribe()
+        try:
+            while True:
+                record = await queue.get()
+                if record is None:
+                    return
+                yield record
+        finally:
+            self._subscribers.remove(queue)
+
+    async def pause(self):
+        """暂停计时，返回是否改变了状态"""
+        if self.is_paused or self._task is None:
+            return False
+        self.is_paused = True
+        self._pause_start = self._loop_time()
+        self._emit("pause")
+        self._wakeup.set()
+        return True
+
+    async def resume(self):
+        """恢复计时，截止时间顺延暂停时长"""
+        if not self.is_paused:
+            return False
+        pause_duration = self._loop_time() - self._pause_start
+        self.total_pause_time += pause_duration
+        self._pause_start = None
+        if self.deadline is not None:
+            self.deadline += pause_duration
+        self.is_paused = False
+        self._emit("resume")
+        self._wakeup.set()
+        return True
+
+    def stop(self):
+        """取消正在运行的 run() 任务"""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _wait_wakeup(self, timeout):
+        """等待暂停/恢复命令，超时返回"""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def countdown(self, total_seconds):
+        """按绝对截止时间倒计时，暂停期间挂起，恢复后截止时间已顺延"""
+        self.deadline = self._loop_time() + total_seconds
+        try:
+            while True:
+                if self.is_paused:
+                    await self._wait_wakeup(None)
+                    continue
+                remaining = self.deadline - self._loop_time()
+                if remaining <= 0:
+                    return
+                if self.tick_interval:
+                    self._emit("tick", phase=self.phase, remaining=remaining)
+                    await self._wait_wakeup(min(remaining, self.tick_interval))
+                else:
+                    await self._wait_wakeup(remaining)
+        finally:
+            self.deadline = None
+
+    async def short_rest(self):
+        """短休息"""
+        self.phase = "short_rest"
+        self._emit("short_rest_start", seconds=self.short_rest_time)
+        await self.countdown(self.short_rest_time)
+        self._emit("short_rest_end")
+
+    async def long_rest(self):
+        """长休息"""
+        self.phase = "long_rest"
+        self._emit("long_rest_start", seconds=self.long_rest_time)
+        await self.countdown(self.long_rest_time)
+        self._emit("long_rest_end")
+        self.total_focus_time = 0  # 重置累计时间
+
+    async def focus_session(self):
+        """一次专注会话"""
+        focus_time = round(self.sampler.next(), 1)
+        seconds = focus_time if self.mode == "test" else focus_time * 60
+        self.phase = "focus"
+        self._emit("focus_start", focus_time=focus_time, seconds=seconds)
+        await self.countdown(seconds)
+        self.total_focus_time += focus_time
+        self._emit("focus_end", total_focus_time=self.total_focus_time)
+
+    async def run(self):
+        """运行专注循环，直到测试模式完成或任务被取消"""
+        self._task = asyncio.current_task()
+        self._start = self._loop_time()
+        self._emit("session_start", mode=self.mode, seed=self.seed)
+        cancelled = False
+        try:
+            while True:
+                # 检查是否需要长休息
+                if self.total_focus_time >= self.max_focus_time:
+                    self.cycle_count += 1
+                    self._emit("cycle", cycle=self.cycle_count)
+                    await self.long_rest()
+                    # 测试模式下，完成2个大周期后自动停止
+                    if self.mode == "test" and self.cycle_count >= 2:
+                        break
+                    continue
+                await self.focus_session()
+                await self.short_rest()
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if self.is_paused:
+                self.total_pause_time += self._loop_time() - self._pause_start
+                self.is_paused = False
+            self.phase = None
+            self._task = None
+            self._emit("session_end", cycles=self.cycle_count, cancelled=cancelled,
+                       total_focus_time=self.total_focus_time,
+                       total_pause_time=self.total_pause_time)
+            for queue in self._subscribers:
+                queue.put_nowait(None)
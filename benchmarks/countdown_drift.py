@@ -0,0 +1,77 @@
+"""倒计时漂移测试工具：测量 FocusTimer.countdown 的区间结束误差
+
+用法：
+    python benchmarks/countdown_drift.py --seconds 600 --runs 3 --load 0.02
+
+--load 模拟每次循环中的额外开销（秒），用于观察负载下的漂移。
+同时运行旧版“sleep(1) 后减 1”的实现作为对照。
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from focus_timer import FocusTimer  # noqa: E402
+
+
+def legacy_countdown(total_seconds, load):
+    """旧版逐秒递减的倒计时，仅用于对照"""
+    remaining_seconds = int(total_seconds)
+    while remaining_seconds > 0:
+        time.sleep(load)
+        mins, secs = divmod(remaining_seconds, 60)
+        print(f"\r{mins:02d}:{secs:02d}", end="", flush=True)
+        time.sleep(1)
+        remaining_seconds -= 1
+
+
+def measure(countdown, seconds, runs):
+    """运行若干次倒计时，返回每次结束时间相对截止时间的误差（秒）"""
+    errors = []
+    for _ in range(runs):
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            countdown(seconds)
+        errors.append(time.monotonic() - start - seconds)
+    return errors
+
+
+def report(name, errors):
+    """打印误差统计"""
+    errors_ms = sorted(e * 1000 for e in errors)
+    mean = sum(errors_ms) / len(errors_ms)
+    print(f"{name:<10} 平均误差: {mean:8.2f} ms  "
+          f"最小: {errors_ms[0]:8.2f} ms  最大: {errors_ms[-1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量倒计时结束误差")
+    parser.add_argument("--seconds", type=float, default=60.5, help="每次倒计时时长（秒）")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数")
+    parser.add_argument("--load", type=float, default=0.0, help="每次循环模拟的额外开销（秒）")
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行旧版实现对照")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer = FocusTimer(mode="test")
+    timer.is_running = True
+
+    def wait_for_key(timeout=None):
+        time.sleep(args.load)
+        time.sleep(timeout)
+        return None
+
+    timer.wait_for_key = wait_for_key
+
+    print(f"[BENCH] 倒计时 {args.seconds} 秒 x {args.runs} 次，模拟负载 {args.load * 1000:.0f} ms")
+    report("deadline", measure(timer.countdown, args.seconds, args.runs))
+    if not args.skip_legacy:
+        report("legacy", measure(lambda s: legacy_countdown(s, args.load), args.seconds, args.runs))
+
+
+if __name__ == "__main__":
+    main()
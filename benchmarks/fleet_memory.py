@@ -0,0 +1,92 @@
+"""计时器内存占用测试工具：比较三种表示方式每 1 万个计时器的内存
+
+用法：
+    python benchmarks/fleet_memory.py --timers 10000
+
+- FocusTimer：每个计时器一个完整对象（无界面模式，不创建音效引擎）
+- TimerScheduler：__slots__ 计时器 + 状态机 + 独立采样器
+- TimerFleet：按列存放的 NumPy 表，配置共享
+
+内存用 tracemalloc 统计（只含 Python 分配，包括 NumPy 数组缓冲区）；
+另外测量 TimerFleet 推进 1 小时（虚拟时钟）的向量化切换速度。
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fleet import TimerFleet  # noqa: E402
+from focus_timer import FocusTimer  # noqa: E402
+from scheduler import TimerScheduler  # noqa: E402
+from timer_clock import VirtualClock  # noqa: E402
+
+
+def measure(build):
+    """返回 build() 创建的对象占用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        obj = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较计时器表示方式的内存占用")
+    parser.add_argument("--timers", type=int, default=10000, help="计时器数量")
+    args = parser.parse_args()
+    n = args.timers
+    scale = 10000 / n
+
+    # 先各创建一次，让模块级缓存和 NumPy 初始化不计入测量
+    with contextlib.redirect_stdout(io.StringIO()):
+        FocusTimer(mode="default", headless=True).get_random_focus_time()
+        TimerScheduler(clock=VirtualClock(datetime.now())).add()
+        TimerFleet(clock=VirtualClock(datetime.now())).add()
+
+    def build_focus_timers():
+        timers = [FocusTimer(mode="default", headless=True) for _ in range(n)]
+        for timer in timers:
+            timer.get_random_focus_time()  # 让采样器生成第一批时长
+        return timers
+
+    def build_scheduler():
+        scheduler = TimerScheduler(clock=VirtualClock(datetime.now()))
+        for _ in range(n):
+            scheduler.add()
+        return scheduler
+
+    def build_fleet():
+        fleet = TimerFleet(clock=VirtualClock(datetime.now()), capacity=n)
+        fleet.add(count=n)
+        return fleet
+
+    print(f"[BENCH] 每 1 万个计时器的内存占用（实测 {n} 个）")
+    for label, build in (("FocusTimer", build_focus_timers), ("TimerScheduler", build_scheduler),
+                         ("TimerFleet", build_fleet)):
+        used, obj = measure(build)
+        print(f"   {label:15s} {used * scale / 1024 / 1024:8.2f} MB  （每个 {used / n:7.0f} 字节）")
+        del obj
+
+    clock = VirtualClock(datetime.now())
+    fleet = TimerFleet(clock=clock, capacity=n)
+    fleet.add(count=n)
+    start = time.perf_counter()
+    fleet.run(until=clock.monotonic() + 3600)
+    elapsed = time.perf_counter() - start
+    print(f"   TimerFleet 推进 1 小时: {fleet.transitions} 次切换，耗时 {elapsed:.3f} 秒"
+          f"（{fleet.transitions / elapsed:,.0f} 次/秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""分片宿主扩展性测试：工作进程数从 1 增加到核心数，测量阶段切换吞吐量
+
+用法：
+    python benchmarks/host_scaling.py --timers-per-worker 40000 --seconds 5
+    python benchmarks/host_scaling.py --workers 1,2,4,8
+
+每个工作进程分到 --timers-per-worker 个测试模式计时器（总数随进程数增加），
+默认数量足以让单个调度器满载，测到的是吞吐上限而不是计时器产生切换的速度。
+报告每秒切换次数、各进程的 CPU 占用和相对单进程的扩展效率（吞吐 / (进程数 x 单进程吞吐)）。
+进程数超过物理核心数时效率会明显下降。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from host import TimerHost  # noqa: E402
+
+
+def measure(workers, timers_per_worker, seconds, seed):
+    """启动 workers 个工作进程并测量 seconds 秒，返回 (每秒切换次数, 平均每进程 CPU 占用, 创建耗时)"""
+    host = TimerHost(workers, seed=seed).start()
+    try:
+        start = time.perf_counter()
+        host.add_many([{"user": f"user-{i}", "mode": "test"} for i in range(timers_per_worker * workers)])
+        setup = time.perf_counter() - start
+        time.sleep(1.0)  # 等各分片进入稳定状态
+        begin, before = time.perf_counter(), host.stats()
+        time.sleep(seconds)
+        end, after = time.perf_counter(), host.stats()
+    finally:
+        host.close()
+    transitions = sum(item["transitions"] for item in after) - sum(item["transitions"] for item in before)
+    cpu = sum(item["cpu_seconds"] for item in after) - sum(item["cpu_seconds"] for item in before)
+    return transitions / (end - begin), cpu / (end - begin) / workers, setup
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1 << i for i in range(cores.bit_length()) if 1 << i <= cores} | {cores})
+    parser = argparse.ArgumentParser(description="测量分片宿主的吞吐量随进程数的变化")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="逗号分隔的进程数列表，默认 1、2、4 ... 直到核心数")
+    parser.add_argument("--timers-per-worker", type=int, default=40000, help="每个工作进程的计时器数")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每轮测量时长（秒）")
+    parser.add_argument("--seed", type=int, default=1, help="根随机种子")
+    args = parser.parse_args()
+
+    print(f"[BENCH] {cores} 个核心，每个工作进程 {args.timers_per_worker} 个计时器（test 模式）")
+    print(f"{'进程数':>6} {'计时器':>8} {'创建(秒)':>9} {'切换/秒':>10} {'每进程CPU':>10} {'扩展效率':>8}")
+    baseline = None
+    for workers in (int(value) for value in args.workers.split(",")):
+        rate, cpu, setup = measure(workers, args.timers_per_worker, args.seconds, args.seed)
+        if baseline is None:
+            baseline = rate / workers
+        print(f"{workers:>6} {workers * args.timers_per_worker:>8} {setup:>9.1f} {rate:>10.0f} "
+              f"{cpu:>10.0%} {rate / (workers * baseline):>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
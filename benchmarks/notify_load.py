@@ -0,0 +1,73 @@
+"""通知分发压力测试：大量计时器事件发往一个慢 webhook 和一个日志文件
+
+用法：
+    python benchmarks/notify_load.py --events 20000 --delay 0.2 --policy drop_oldest
+
+webhook 指向本地的 StubHttpServer（每个请求延迟 --delay 秒）。报告计时线程侧
+publish 的耗时分位数（慢目标不应使它变大）以及各目标的吞吐量、丢弃数和平均延迟。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notify import LogSink, NotificationHub, POLICIES, StubHttpServer, WebhookSink  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    """已排序列表的分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="通知分发压力测试")
+    parser.add_argument("--events", type=int, default=20000, help="发布的事件数")
+    parser.add_argument("--rate", type=float, default=5000, help="每秒发布的事件数")
+    parser.add_argument("--delay", type=float, default=0.2, help="webhook 每个请求的响应延迟（秒）")
+    parser.add_argument("--timeout", type=float, default=1.0, help="webhook 投递超时（秒）")
+    parser.add_argument("--policy", choices=POLICIES, default="drop_oldest", help="webhook 队列满时的策略")
+    parser.add_argument("--batch", type=int, default=32, help="webhook 批大小")
+    parser.add_argument("--workers", type=int, default=2, help="工作线程数")
+    args = parser.parse_args()
+
+    stub = StubHttpServer(delay=args.delay)
+    log_path = os.path.join(tempfile.mkdtemp(prefix="focus_timer_notify_"), "notify.log")
+    hub = NotificationHub(workers=args.workers)
+    hub.add_sink(WebhookSink(stub.url), policy=args.policy, batch_size=args.batch, timeout=args.timeout)
+    hub.add_sink(LogSink(log_path), policy="block", batch_size=64)
+
+    publish = []
+    interval = 1.0 / args.rate
+    start = time.perf_counter()
+    for i in range(args.events):
+        notification = {"timer": i % 100 + 1, "mode": "default", "time": "2026-01-01 09:00:00",
+                        "t": i * interval, "event": "focus_start", "focus_time": 4.2, "seconds": 252.0}
+        begin = time.perf_counter()
+        hub.publish(notification)
+        publish.append(time.perf_counter() - begin)
+        pause = start + (i + 1) * interval - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+    wall = time.perf_counter() - start
+    hub.close(timeout=args.delay * 4 + 1.0)
+    stub.close()
+
+    publish_us = sorted(value * 1e6 for value in publish)
+    print(f"[BENCH] {args.events} 个事件，{wall:.1f} 秒，webhook 延迟 {args.delay * 1000:.0f} ms（{args.policy}）")
+    print(f"   publish 耗时: p50 {percentile(publish_us, 0.5):.1f} us  p99 {percentile(publish_us, 0.99):.1f} us  "
+          f"最大 {publish_us[-1]:.1f} us")
+    for stats in hub.stats():
+        print(f"   {stats['sink']:<8} 投递 {stats['delivered']:>6}  丢弃 {stats['dropped']:>6}  "
+              f"失败 {stats['failed']:>4}  超时 {stats['timeouts']:>4}  批次 {stats['batches']:>5}  "
+              f"吞吐 {stats['throughput']:8.0f} 条/秒  平均延迟 {stats['mean_delay_seconds'] * 1000:7.1f} ms")
+    print(f"   webhook 实际收到: {len(stub.received)} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""基准测试套件：测量计时器热点路径并与保存的基线比较
+
+用法：
+    python benchmarks/run_all.py                    # 运行并与基线比较，有退化时退出码为 1
+    python benchmarks/run_all.py --save-baseline    # 运行并把结果保存为新基线
+    python benchmarks/run_all.py --only sampler config
+
+包含的测试：
+    countdown  虚拟时钟模拟 72 小时的耗时，以及真实时钟短倒计时的结束误差
+    sampler    FocusSampler.next 吞吐量（均匀、正态、窄截断窗口、极端尾部窗口）
+    config     ConfigManager 在 10 / 100 / 1000 / 10000 个配置下的保存、读取、列表延迟
+    bell       play_bell 延迟（SDL 哑音频驱动，首次含解码）
+    startup    模块导入与进入主菜单的冷启动时间
+    checkpoint 检查点写入吞吐量（5000 个槽位轮流改写）
+
+全部无界面运行；基线默认保存在 benchmarks/baseline.json，
+与机器相关，不随仓库提交：首次运行（没有基线文件）时自动把结果保存为基线，
+换机器后应用 --save-baseline 重新保存。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# 指标名 -> 越小越好（True）还是越大越好（False）
+LOWER_IS_BETTER = {"ms": True, "error_ms": True, "per_s": False}
+
+
+def _lower_is_better(name):
+    for suffix, lower in LOWER_IS_BETTER.items():
+        if name.endswith(suffix):
+            return lower
+    return True
+
+
+def quiet():
+    """屏蔽被测代码的控制台输出"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_countdown():
+    from focus_timer import FocusTimer, simulate
+
+    results = {}
+    with quiet():
+        simulate("default", None, duration_seconds=3600)  # 预热：导入 NumPy
+    start = time.perf_counter()
+    with quiet():
+        simulate("default", None, duration_seconds=72 * 3600)
+    results["countdown.simulate_72h_ms"] = (time.perf_counter() - start) * 1000
+
+    # 真实时钟：跨多个整秒边界的短倒计时
+    with quiet():
+        timer = FocusTimer(mode="test")
+    timer.is_running = True
+    errors = []
+    for _ in range(3):
+        start = time.monotonic()
+        with quiet():
+            timer.countdown(2.5)
+        errors.append(time.monotonic() - start - 2.5)
+    results["countdown.real_error_ms"] = max(errors) * 1000
+    return results
+
+
+def bench_sampler():
+    from sampler import FocusSampler
+
+    cases = {
+        "uniform": {"focus_distribution": "uniform"},
+        "normal": {"focus_distribution": "normal"},
+        # 窄窗口：区间远小于标准差
+        "normal_narrow": {"focus_distribution": "normal", "min_focus_time": 3.95,
+                          "max_single_focus_time": 4.05},
+        # 极端尾部：区间位于均值右侧 8 个标准差之外
+        "normal_tail": {"focus_distribution": "normal", "min_focus_time": 10.4,
+                        "max_single_focus_time": 12.0},
+    }
+    results = {}
+    for name, overrides in cases.items():
+        settings = {"min_focus_time": 3.0, "max_single_focus_time": 5.0,
+                    "focus_mean": 4.0, "focus_std": 0.8}
+        settings.update(overrides)
+        sampler = FocusSampler(settings["focus_distribution"], settings["min_focus_time"],
+                               settings["max_single_focus_time"], settings["focus_mean"],
+                               settings["focus_std"], seed=1)
+        draws = 200000
+        sampler.next()  # 预热：导入 NumPy、生成第一批样本
+        start = time.perf_counter()
+        for _ in range(draws):
+            sampler.next()
+        elapsed = time.perf_counter() - start
+        results[f"sampler.{name}_per_s"] = draws / elapsed
+    return results
+
+
+def bench_config(sizes=(10, 100, 1000, 10000)):
+    import config_store
+    from focus_timer import ConfigManager
+
+    results = {}
+    cwd = os.getcwd()
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix="focus_timer_bench_")
+        try:
+            os.chdir(workdir)
+            config_store._CACHE.clear()
+            with quiet():
+                manager = ConfigManager()
+            settings = {"max_focus_time": 90, "short_rest_time": 10, "long_rest_time": 1200,
+                        "min_focus_time": 3.0, "max_single_focus_time": 5.0,
+                        "focus_distribution": "normal", "focus_mean": 4.0, "focus_std": 0.8,
+                        "sounds": {"work_start": "work.mp3", "short_rest": "small_rest.mp3",
+                                   "long_rest": "big_rest.mp3"}, "saved_time": "2026-01-01 00:00:00"}
+            # 批量预置配置（单个事务），只测量之后的单条操作
+            store = manager.store
+            store.put_many((f"profile-{i}", settings) for i in range(size))
+            names = [f"profile-{i}" for i in range(size)]
+            rng = random.Random(size)
+
+            start = time.perf_counter()
+            for i in range(20):
+                with quiet():
+                    manager.save_config(f"new-{i}", dict(settings))
+            results[f"config.{size}.save_ms"] = (time.perf_counter() - start) / 20 * 1000
+
+            config_store._CACHE.clear()
+            sample = rng.sample(names, min(200, size))  # 不重复，每次都是冷读取
+            start = time.perf_counter()
+            for name in sample:
+                manager.get_config(name)
+            results[f"config.{size}.load_cold_ms"] = (time.perf_counter() - start) / len(sample) * 1000
+            start = time.perf_counter()
+            for name in sample:
+                manager.get_config(name)
+            results[f"config.{size}.load_warm_ms"] = (time.perf_counter() - start) / len(sample) * 1000
+
+            start = time.perf_counter()
+            for _ in range(20):
+                manager.count_configs()
+                manager.list_config_summaries(0, 20)
+                manager.list_config_summaries(max(size - 20, 0), 20)
+            results[f"config.{size}.list_page_ms"] = (time.perf_counter() - start) / 20 * 1000
+            store.close()
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_bell():
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    try:
+        import pygame  # noqa: F401
+    except ImportError:
+        print("[SKIP] 未安装 pygame，跳过 play_bell 测试")
+        return {}
+    from focus_timer import FocusTimer
+
+    sounds = {"work_start": os.path.join(ROOT, "work.mp3"),
+              "short_rest": os.path.join(ROOT, "small_rest.mp3"),
+              "long_rest": os.path.join(ROOT, "big_rest.mp3")}
+    settings = {"max_focus_time": 90, "short_rest_time": 10, "long_rest_time": 1200,
+                "min_focus_time": 3.0, "max_single_focus_time": 5.0, "focus_distribution": "uniform",
+                "sounds": sounds}
+    with quiet():
+        timer = FocusTimer(mode="custom", custom_settings=settings)
+        start = time.perf_counter()
+        timer.play_bell("short_rest")
+        first = time.perf_counter() - start
+        if not timer.sound_engine.available:
+            print("[SKIP] 音频设备不可用，跳过 play_bell 测试", file=sys.stderr)
+            return {}
+        latencies = []
+        for _ in range(50):
+            start = time.perf_counter()
+            timer.play_bell("short_rest")
+            latencies.append(time.perf_counter() - start)
+        timer.sound_engine.stop()
+    latencies.sort()
+    return {"bell.first_play_ms": first * 1000,
+            "bell.play_p50_ms": latencies[len(latencies) // 2] * 1000,
+            "bell.play_max_ms": latencies[-1] * 1000}
+
+
+def bench_startup(runs=5):
+    from startup import measure_first_menu, measure_import
+
+    imports = sorted(measure_import()["import_ms"] for _ in range(runs))
+    menus = sorted(measure_first_menu() * 1000 for _ in range(runs))
+    return {"startup.import_ms": imports[runs // 2], "startup.first_menu_ms": menus[runs // 2]}
+
+
+def bench_checkpoint(timers=5000, writes=200000):
+    from checkpoint import CheckpointFile
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="focus_timer_bench_")
+    try:
+        state = {"mode": "default", "phase": "focus", "paused": False, "cycle_count": 1, "phase_index": 17,
+                 "spawn_key": (3,), "draws": 9, "focus_time": 4.2, "total_focus_time": 37.5,
+                 "remaining": 123.4, "elapsed": 4567.8, "total_pause_time": 60.0, "wall_time": time.time(),
+                 "session_start": time.time() - 4567.8, "seed": 12345, "config_name": None,
+                 "settings": {"max_focus_time": 90, "short_rest_time": 10, "long_rest_time": 1200,
+                              "min_focus_time": 3.0, "max_single_focus_time": 5.0,
+                              "focus_distribution": "uniform", "focus_mean": 4.0, "focus_std": 0.8}}
+        checkpoint = CheckpointFile(os.path.join(workdir, "checkpoint.bin"), slots=timers)
+        for slot in range(timers):
+            checkpoint.write(slot, state)  # 预热：读出各槽位已有的写入序号
+        start = time.perf_counter()
+        for i in range(writes):
+            checkpoint.write(i % timers, state)
+        results["checkpoint.write_per_s"] = writes / (time.perf_counter() - start)
+        checkpoint.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+BENCHMARKS = {
+    "countdown": bench_countdown,
+    "sampler": bench_sampler,
+    "config": bench_config,
+    "bell": bench_bell,
+    "startup": bench_startup,
+    "checkpoint": bench_checkpoint,
+}
+
+
+def compare(results, baseline, tolerance):
+    """与基线比较，返回退化的指标列表 [(名称, 基线, 当前, 变化比例)]"""
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if _lower_is_better(name):
+            # 误差类指标基线可能为 0，给 0.05 ms 的绝对容差
+            worse = value > base * (1 + tolerance) and value - base > 0.05
+            change = (value - base) / base if base else float("inf")
+        else:
+            worse = value < base * (1 - tolerance)
+            change = (value - base) / base if base else 0.0
+        if worse:
+            regressions.append((name, base, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行基准测试套件")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="只运行指定的测试")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的退化比例")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        start = time.perf_counter()
+        results.update(BENCHMARKS[name]())
+        print(f"[BENCH] {name} 完成（{time.perf_counter() - start:.1f} 秒）", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        for name in sorted(results):
+            print(f"   {name:<36} {results[name]:14.3f}")
+
+    if not os.path.exists(args.baseline) and not args.save_baseline:
+        # 基线与机器相关，不随仓库提交；首次运行时把本次结果保存为基线
+        print("[INFO] 没有基线文件，本次结果将作为基线")
+        args.save_baseline = True
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)  # 只运行部分测试时保留其他指标的基线
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"saved_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                       "machine": f"{platform.node()} {platform.platform()} Python {platform.python_version()}",
+                       "results": baseline}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"[SAVED] 基线已保存到 {args.baseline}")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    regressions = compare(results, saved.get("results", {}), args.tolerance)
+    if not regressions:
+        print(f"[OK] 与基线（{saved.get('saved_time')}）相比没有超过 {args.tolerance:.0%} 的退化")
+        return 0
+    print(f"[REGRESSION] 与基线（{saved.get('saved_time')}）相比有 {len(regressions)} 项退化:")
+    for name, base, value, change in regressions:
+        print(f"   {name:<36} 基线 {base:12.3f}  当前 {value:12.3f}  ({change:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""多计时器调度器测试工具：单线程驱动大量计时器并测量截止时间精度
+
+用法：
+    python benchmarks/scheduler.py --timers 10000 --seconds 10
+    python benchmarks/scheduler.py --timers 10000 --idle 10000 --checkpoint /tmp/fleet.ckpt
+
+使用测试模式（1-2 秒专注、1 秒短休息），让阶段切换足够密集；另有 --idle 个默认模式计时器
+（阶段长达数分钟，只产生周期性的检查点刷新）。依次运行不带和带检查点两轮，
+报告每秒切换次数、CPU 占用和切换延迟分位数，两轮之差即为检查点写入和刷新的开销。
+检查点默认写在临时目录中，运行后删除。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import CheckpointFile  # noqa: E402
+from scheduler import TimerScheduler  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    """已排序列表的分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(args, checkpoint_path):
+    """运行一轮，checkpoint_path 为 None 时不写检查点"""
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint = CheckpointFile(checkpoint_path, slots=args.timers + args.idle)
+    scheduler = TimerScheduler(record_lateness=True, checkpoint=checkpoint)
+    start = time.perf_counter()
+    for _ in range(args.idle):  # 先加长阶段的计时器，创建耗时不会让测试模式的第一个阶段过期
+        scheduler.add(mode="default")
+    for _ in range(args.timers):
+        scheduler.add(mode=args.mode)
+    setup = time.perf_counter() - start
+
+    until = scheduler.clock.monotonic() + args.seconds
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    worker = threading.Thread(target=scheduler.run, kwargs={"until": until})
+    worker.start()
+    worker.join()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    if checkpoint is not None:
+        checkpoint.close()
+        os.remove(checkpoint_path)
+
+    lateness_ms = sorted(value * 1000 for value in scheduler.lateness)
+    print(f"[BENCH] {args.timers} 个计时器（{args.mode} 模式）+ {args.idle} 个默认模式，运行 {args.seconds:.0f} 秒"
+          f"{'，带检查点' if checkpoint is not None else ''}")
+    print(f"   创建耗时: {setup * 1000:.1f} ms")
+    print(f"   阶段切换: {scheduler.transitions} 次（{scheduler.transitions / wall:.0f} 次/秒）")
+    print(f"   CPU 占用: {cpu / wall * 100:.1f}% 单核")
+    print(f"   切换延迟: p50 {percentile(lateness_ms, 0.5):.2f} ms  "
+          f"p99 {percentile(lateness_ms, 0.99):.2f} ms  最大 {lateness_ms[-1] if lateness_ms else 0:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量多计时器调度精度")
+    parser.add_argument("--timers", type=int, default=10000, help="并发计时器数量")
+    parser.add_argument("--idle", type=int, default=10000, help="另加的默认模式计时器数量")
+    parser.add_argument("--seconds", type=float, default=10.0, help="每轮运行时长（秒）")
+    parser.add_argument("--mode", choices=["test", "default"], default="test", help="计时器模式")
+    parser.add_argument("--checkpoint", metavar="PATH", help="检查点文件位置（默认在临时目录中，运行后删除）")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.checkpoint is None:
+        workdir = tempfile.mkdtemp(prefix="focus_timer_scheduler_")
+        args.checkpoint = os.path.join(workdir, "fleet.ckpt")
+    try:
+        measure(args, None)
+        measure(args, args.checkpoint)
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""计时器服务压测工具：打开大量 SSE 连接并测量事件推送延迟
+
+用法：
+    python benchmarks/server_load.py --clients 500 --timers 200 --seconds 10
+
+在同一进程内启动 TimerServer（或用 --url 连接已运行的服务），
+创建若干测试模式计时器，每个客户端随机关注一部分计时器；
+延迟 = 客户端收到事件的时间 - 服务端写入事件时附带的 ts。
+分别报告阶段事件和合并 tick 的 p50/p99 延迟，以及每个客户端的 tick 间隔。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import TimerServer  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    """已排序列表的分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def request(host, port, method, path, body=None):
+    """发送一个 JSON 请求并返回解析后的响应体"""
+    reader, writer = await asyncio.open_connection(host, port)
+    data = json.dumps(body or {}).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+async def listen(host, port, watch, stats, stop):
+    """一个 SSE 客户端：记录每条事件的延迟"""
+    reader, writer = await asyncio.open_connection(host, port)
+    query = ",".join(str(i) for i in watch)
+    writer.write(f"GET /events?timers={query} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    last_tick = None
+    try:
+        while not stop.is_set():
+            block = await reader.readuntil(b"\n\n")
+            received = time.time()
+            event, data = None, None
+            for line in block.decode("utf-8").splitlines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    data = json.loads(line[6:])
+            if data is None:
+                continue
+            latency = received - data["ts"]
+            if event == "tick":
+                stats["tick"].append(latency)
+                if last_tick is not None:
+                    stats["tick_gap"].append(received - last_tick)
+                last_tick = received
+            else:
+                stats["phase"].append(latency)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run(args):
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        server = TimerServer(port=0)
+        await server.start()
+        host, port = server._server.sockets[0].getsockname()[:2]
+
+    timer_ids = []
+    for _ in range(args.timers):
+        response = await request(host, port, "POST", "/timers", {"mode": "test"})
+        timer_ids.append(response["timer"])
+
+    stats = {"phase": [], "tick": [], "tick_gap": []}
+    stop = asyncio.Event()
+    rng = random.Random(0)
+    clients = [asyncio.ensure_future(
+        listen(host, port, rng.sample(timer_ids, min(args.watch, len(timer_ids))), stats, stop))
+        for _ in range(args.clients)]
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    for task in clients:
+        task.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+    for timer_id in timer_ids:
+        await request(host, port, "POST", f"/timers/{timer_id}/stop")
+    if server is not None:
+        server._server.close()
+        await server._server.wait_closed()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量计时器服务事件推送延迟")
+    parser.add_argument("--clients", type=int, default=500, help="SSE 连接数")
+    parser.add_argument("--timers", type=int, default=200, help="测试模式计时器数量")
+    parser.add_argument("--watch", type=int, default=20, help="每个客户端关注的计时器数量")
+    parser.add_argument("--seconds", type=float, default=10.0, help="测量时长（秒）")
+    parser.add_argument("--url", help="连接已运行的服务，如 http://127.0.0.1:8765")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args))
+    print(f"[BENCH] {args.clients} 个连接，{args.timers} 个计时器，运行 {args.seconds:.0f} 秒")
+    for name, label in (("phase", "阶段事件"), ("tick", "合并 tick")):
+        values = sorted(stats[name])
+        print(f"   {label}: {len(values)} 条，延迟 p50 {percentile(values, 0.5) * 1000:.2f} ms，"
+              f"p99 {percentile(values, 0.99) * 1000:.2f} ms")
+    gaps = sorted(stats["tick_gap"])
+    if gaps:
+        print(f"   tick 间隔: 最小 {gaps[0]:.3f} s，p50 {percentile(gaps, 0.5):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""启动时间测试工具：测量模块导入时间和进入主菜单的时间
+
+用法：
+    python benchmarks/startup.py --runs 5
+
+每次测量都在新的 Python 进程中进行，以反映真实的冷启动开销；
+同时检查导入后 numpy / pygame 是否仍未加载。
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "focus_timer.py")
+MENU_MARKER = ">>> 专注计时器 <<<"
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import focus_timer
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000,
+                  "numpy": "numpy" in sys.modules,
+                  "pygame": "pygame" in sys.modules}))
+"""
+
+
+def measure_import():
+    """在新进程中测量 import focus_timer 的耗时"""
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT,
+                            capture_output=True, text=True, encoding="utf-8", check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_first_menu():
+    """从启动进程到主菜单打印完成的耗时（秒）
+
+    在临时目录中启动，启动时创建的配置库、日志和检查点文件不会留在仓库里。
+    """
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+    workdir = tempfile.mkdtemp(prefix="focus_timer_startup_")
+    try:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, SCRIPT], cwd=workdir, env=env,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True, encoding="utf-8")
+        try:
+            for line in proc.stdout:
+                if MENU_MARKER in line:
+                    return time.perf_counter() - start
+            raise RuntimeError("未检测到主菜单输出")
+        finally:
+            proc.communicate("0\n", timeout=10)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def summarize(name, values_ms):
+    """打印耗时统计"""
+    values_ms = sorted(values_ms)
+    median = values_ms[len(values_ms) // 2]
+    print(f"{name:<12} 中位数: {median:8.1f} ms  最小: {values_ms[0]:8.1f} ms  最大: {values_ms[-1]:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量启动时间")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    menus = [measure_first_menu() * 1000 for _ in range(args.runs)]
+
+    print(f"[BENCH] 冷启动 {args.runs} 次")
+    summarize("导入模块", [r["import_ms"] for r in imports])
+    summarize("进入主菜单", menus)
+    loaded = [name for name in ("numpy", "pygame") if any(r[name] for r in imports)]
+    if loaded:
+        print(f"[WARNING] 导入时已加载重量级依赖: {', '.join(loaded)}")
+    else:
+        print("[OK] 导入时未加载 numpy / pygame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import struct
+import time
+import zlib
+
+MODE_CODES = {"default": 0, "test": 1, "custom": 2}
+MODE_NAMES = {code: name for name, code in MODE_CODES.items()}
+PHASE_CODES = {"focus": 0, "short_rest": 1, "long_rest": 2}
+PHASE_NAMES = {code: name for name, code in PHASE_CODES.items()}
+DISTRIBUTION_CODES = {"uniform": 0, "normal": 1}
+DISTRIBUTION_NAMES = {code: name for name, code in DISTRIBUTION_CODES.items()}
+NO_PHASE = 255
+NO_SPAWN = 0xFFFFFFFF
+FLAG_SEED = 1  # 记录中带有随机种子
+
+CHECKPOINT_MAGIC = b"FTCP"
+CHECKPOINT_VERSION = 1
+
+# 定长记录（小端），最后 4 字节是前面所有字节的 crc32
+_RECORD = struct.Struct(
+    "<4sH"      # 魔数 | 版本
+    "BBBB"      # 模式 | 阶段 | 是否暂停 | 分布
+    "HH"        # 已完成大周期 | 标志位
+    "QIIQ"      # 写入序号 | 阶段下标 | 派生编号 | 已取用样本数
+    "dddd"      # 当前专注时长 | 累计专注 | 阶段剩余秒数 | 会话经过秒数
+    "dddd"      # 总暂停秒数 | 写入时的墙钟时间 | 会话开始的墙钟时间 | 保留
+    "dddddddd"  # 计时设置：max_focus | short_rest | long_rest | min_focus | max_single | mean | std | 保留
+    "16s64s"    # 随机种子（128 位）| 配置名称（UTF-8）
+)
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _RECORD.size + _CRC.size
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+    else:  # Windows 没有 pwrite
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _pread(fd, size, offset):
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+NAME_SIZE = 64  # 配置名称字段的字节数
+
+
+def stored_name(name):
+    """配置名称写入检查点后读回的样子：UTF-8 超过 NAME_SIZE 字节时在完整字符处截断"""
+    return (name or "").encode("utf-8")[:NAME_SIZE].decode("utf-8", "ignore")
+
+
+def pack_state(state, seq):
+    """把状态字典编码为定长记录"""
+    settings = state["settings"]
+    seed = state.get("seed")
+    if seed is not None and not 0 <= seed < 1 << 128:
+        seed = None  # 超出 128 位的种子无法保存，恢复后改用新种子
+    spawn_key = state.get("spawn_key") or ()
+    body = _RECORD.pack(
+        CHECKPOINT_MAGIC, CHECKPOINT_VERSION,
+        MODE_CODES[state["mode"]], PHASE_CODES.get(state["phase"], NO_PHASE), bool(state["paused"]),
+        DISTRIBUTION_CODES[settings["focus_distribution"]],
+        state["cycle_count"], FLAG_SEED if seed is not None else 0,
+        seq, state["phase_index"], spawn_key[0] if spawn_key else NO_SPAWN, state.get("draws", 0),
+        state["focus_time"] or 0.0, state["total_focus_time"], state["remaining"] or 0.0, state["elapsed"],
+        state["total_pause_time"], state.get("wall_time") or time.time(), state["session_start"], 0.0,
+        settings["max_focus_time"], settings["short_rest_time"], settings["long_rest_time"],
+        settings["min_focus_time"], settings["max_single_focus_time"],
+        settings["focus_mean"], settings["focus_std"], 0.0,
+        (seed if seed is not None else 0).to_bytes(16, "little"),
+        stored_name(state.get("config_name")).encode("utf-8"),
+    )
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def unpack_state(data):
+    """解码定长记录，校验失败或为空时返回 None"""
+    if len(data) < RECORD_SIZE:
+        return None
+    body = data[:_RECORD.size]
+    (crc,) = _CRC.unpack_from(data, _RECORD.size)
+    if zlib.crc32(body) != crc:
+        return None
+    (magic, version, mode, phase, paused, distribution, cycle_count, flags, seq, phase_index, spawn, draws,
+     focus_time, total_focus_time, remaining, elapsed, total_pause_time, wall_time, session_start, _,
+     max_focus, short_rest, long_rest, min_focus, max_single, mean, std, _,
+     seed, config_name) = _RECORD.unpack(body)
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+        return None
+    return {
+        "seq": seq,
+        "mode": MODE_NAMES[mode],
+        "phase": PHASE_NAMES.get(phase),
+        "paused": bool(paused),
+        "cycle_count": cycle_count,
+        "phase_index": phase_index,
+        "spawn_key": () if spawn == NO_SPAWN else (spawn,),
+        "draws": draws,
+        "focus_time": focus_time,
+        "total_focus_time": total_focus_time,
+        "remaining": remaining,
+        "elapsed": elapsed,
+        "total_pause_time": total_pause_time,
+        "wall_time": wall_time,
+        "session_start": session_start,
+        "settings": {
+            "max_focus_time": max_focus, "short_rest_time": short_rest, "long_rest_time": long_rest,
+            "min_focus_time": min_focus, "max_single_focus_time": max_single,
+            "focus_distribution": DISTRIBUTION_NAMES[distribution], "focus_mean": mean, "focus_std": std,
+        },
+        "seed": int.from_bytes(seed, "little") if flags & FLAG_SEED else None,
+        "config_name": config_name.rstrip(b"\0").decode("utf-8", "ignore") or None,
+    }
+
+
+class CheckpointFile:
+    """定长检查点文件：每个计时器占一个槽位，原地改写
+
+    每个槽位有两份记录交替写入（按写入序号奇偶），写到一半时断电也还有上一份完整记录；
+    读取时取校验通过且序号最大的一份。写入只是一次 struct.pack 和一次 pwrite，
+    不 fsync（进程崩溃时页缓存仍会落盘），每次几微秒，可以在每次阶段切换时调用。
+    """
+
+    def __init__(self, path, slots=1):
+        self.path = path
+        self.slots = slots
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        self._seq = {}  # 槽位 -> 最近一次写入的序号
+        size = os.fstat(self._fd).st_size
+        if size < slots * 2 * RECORD_SIZE:
+            os.ftruncate(self._fd, slots * 2 * RECORD_SIZE)
+
+    def write(self, slot, state):
+        """写入一个槽位的状态"""
+        seq = self._seq.get(slot)
+        if seq is None:
+            current = self.read(slot)
+            seq = current["seq"] if current else 0
+        seq += 1
+        self._seq[slot] = seq
+        _pwrite(self._fd, pack_state(state, seq), (slot * 2 + seq % 2) * RECORD_SIZE)
+
+    def read(self, slot):
+        """读取一个槽位的最新状态，没有有效记录时返回 None"""
+        data = _pread(self._fd, 2 * RECORD_SIZE, slot * 2 * RECORD_SIZE)
+        states = [state for state in (unpack_state(data[:RECORD_SIZE]), unpack_state(data[RECORD_SIZE:]))
+                  if state is not None]
+        return max(states, key=lambda state: state["seq"]) if states else None
+
+    def read_all(self):
+        """读取所有槽位，返回 [(槽位, 状态)]"""
+        slots = os.fstat(self._fd).st_size // (2 * RECORD_SIZE)
+        result = []
+        for slot in range(slots):
+            state = self.read(slot)
+            if state is not None:
+                result.append((slot, state))
+        return result
+
+    def reset(self):
+        """清除全部槽位"""
+        self._seq.clear()
+        size = os.fstat(self._fd).st_size
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, max(size, self.slots * 2 * RECORD_SIZE))
+
+    def clear(self, slot):
+        """清除一个槽位（计时器正常结束后不再需要恢复）"""
+        self._seq.pop(slot, None)
+        _pwrite(self._fd, bytes(2 * RECORD_SIZE), slot * 2 * RECORD_SIZE)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,128 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+
+# 进程级缓存：数据库路径 -> {"stamp": 文件状态, "configs": {名称: 配置}}
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _file_stamp(path):
+    """数据库文件的修改时间和大小，用于判断缓存是否失效"""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class SqliteConfigStore:
+    """基于 SQLite 的配置存储：按名称单条读写，事务保证原子性
+
+    读取结果放在进程级缓存中，多个 ConfigManager 实例共享；
+    数据库文件的修改时间或大小变化（其他进程写入）时缓存自动失效。
+    """
+
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        is_new = not os.path.exists(path)
+        # 使用默认的回滚日志模式，每次提交都会更新数据库文件本身的修改时间
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS configs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " name TEXT NOT NULL UNIQUE,"
+            " saved_time TEXT,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        if is_new and legacy_json_path and os.path.exists(legacy_json_path):
+            self._import_json(legacy_json_path)
+
+    def _import_json(self, json_path):
+        """把旧版 JSON 配置文件导入数据库"""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                configs = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] 导入旧配置文件失败: {e}")
+            return
+        self.put_many(configs.items())
+        print(f"[INFO] 已从 {json_path} 导入 {len(configs)} 个配置")
+
+    def _cache(self):
+        """返回当前有效的缓存字典，数据库被外部修改时先清空"""
+        stamp = _file_stamp(self.path)
+        with _CACHE_LOCK:
+            entry = _CACHE.get(self.path)
+            if entry is None or entry["stamp"] != stamp:
+                entry = {"stamp": stamp, "configs": {}}
+                _CACHE[self.path] = entry
+            return entry["configs"]
+
+    def _refresh_stamp(self):
+        """本进程写入后更新缓存的文件状态，避免自己的写入让缓存失效"""
+        with _CACHE_LOCK:
+            entry = _CACHE.get(self.path)
+            if entry is not None:
+                entry["stamp"] = _file_stamp(self.path)
+
+    def _upsert(self, name, settings):
+        self._conn.execute(
+            "INSERT INTO configs (name, saved_time, data) VALUES (?, ?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET saved_time = excluded.saved_time, data = excluded.data",
+            (name, settings.get('saved_time'), json.dumps(settings, ensure_ascii=False)),
+        )
+
+    def get(self, name):
+        """按名称读取配置，不存在时返回 None"""
+        cache = self._cache()
+        if name not in cache:
+            row = self._conn.execute("SELECT data FROM configs WHERE name = ?", (name,)).fetchone()
+            cache[name] = json.loads(row[0]) if row else None
+        settings = cache[name]
+        # 返回深拷贝，调用方修改（包括嵌套的 sounds）不会污染共享缓存
+        return copy.deepcopy(settings) if settings is not None else None
+
+    def put(self, name, settings):
+        """写入或覆盖一个配置（单条事务）"""
+        cache = self._cache()
+        with self._conn:
+            self._upsert(name, settings)
+        cache[name] = copy.deepcopy(settings)
+        self._refresh_stamp()
+
+    def put_many(self, items):
+        """批量写入 (名称, 配置)，全部在一个事务中完成，用于导入"""
+        cache = self._cache()
+        with self._conn:
+            for name, settings in items:
+                self._upsert(name, settings)
+                cache[name] = copy.deepcopy(settings)
+        self._refresh_stamp()
+
+    def delete(self, name):
+        """删除配置，返回是否确实删除了"""
+        cache = self._cache()
+        with self._conn:
+            deleted = self._conn.execute("DELETE FROM configs WHERE name = ?", (name,)).rowcount
+        cache[name] = None
+        self._refresh_stamp()
+        return deleted > 0
+
+    def count(self):
+        """配置总数"""
+        return self._conn.execute("SELECT COUNT(*) FROM configs").fetchone()[0]
+
+    def page(self, offset=0, limit=None):
+        """按保存顺序分页列出 (名称, 保存时间)，不读取配置内容"""
+        return self._conn.execute(
+            "SELECT name, saved_time FROM configs ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        ).fetchall()
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
@@ -0,0 +1,279 @@
+import bisect
+
+np = None  # NumPy 在第一次生成计划时才导入
+
+PHASE_CODES = {"focus": 0, "short_rest": 1, "long_rest": 2}
+PHASE_NAMES = {code: name for name, code in PHASE_CODES.items()}
+
+
+def _numpy():
+    """按需导入 NumPy"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+class CycleStateMachine:
+    """计时器阶段状态机：与 FocusTimer.run 相同的阶段规则，但不阻塞
+
+    专注 -> 短休息 -> 专注 ...，累计专注达到 max_focus_time 后进入大休息，
+    大休息结束后累计清零；测试模式完成 2 个大周期后结束。
+    advance() 在当前阶段结束时调用，返回下一个阶段及其秒数。
+    """
+
+    __slots__ = ("settings", "mode", "sampler", "phase", "focus_time",
+                 "total_focus_time", "cycle_count", "finished")
+
+    def __init__(self, settings, mode, sampler):
+        self.settings = settings
+        self.mode = mode
+        self.sampler = sampler
+        self.phase = None  # 当前阶段：focus / short_rest / long_rest
+        self.focus_time = None  # 当前专注时长（测试模式为秒，否则为分钟）
+        self.total_focus_time = 0  # 累计专注时间
+        self.cycle_count = 0  # 已完成的大周期数
+        self.finished = False
+
+    def advance(self):
+        """结束当前阶段并进入下一阶段，返回 (阶段, 秒数)；全部结束时返回 None"""
+        if self.phase == "focus":
+            self.total_focus_time += self.focus_time
+            self.phase = "short_rest"
+            return self.phase, self.settings["short_rest_time"]
+        if self.phase == "long_rest":
+            self.total_focus_time = 0  # 重置累计时间
+            # 测试模式下，完成2个大周期后自动停止
+            if self.mode == "test" and self.cycle_count >= 2:
+                self.phase = None
+                self.finished = True
+                return None
+        if self.total_focus_time >= self.settings["max_focus_time"]:
+            self.cycle_count += 1
+            self.phase = "long_rest"
+            return self.phase, self.settings["long_rest_time"]
+        self.focus_time = round(self.sampler.next(), 1)
+        self.phase = "focus"
+        seconds = self.focus_time if self.mode == "test" else self.focus_time * 60
+        return self.phase, seconds
+
+
+class _Column:
+    """按倍数扩容的一维数组，追加的均摊开销为 O(1)"""
+
+    __slots__ = ("buffer", "size")
+
+    def __init__(self, dtype, capacity=64):
+        self.buffer = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        """追加数据，返回当前内容的视图"""
+        values = np.asarray(values, dtype=self.buffer.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.buffer):
+            grown = np.empty(max(len(self.buffer) * 2, needed), dtype=self.buffer.dtype)
+            grown[:self.size] = self.buffer[:self.size]
+            self.buffer = grown
+        self.buffer[self.size:needed] = values
+        self.size = needed
+        return self.buffer[:needed]
+
+
+class CyclePlan:
+    """预先生成的周期计划：一次采样整个大周期的全部专注/短休息/大休息
+
+    阶段按顺序存为数组（阶段代码、秒数、累计结束偏移），"计划时间"是不含任何延误的
+    理想时间轴。暂停和阶段实际开始的延迟记为偏移（计划时间点 + 时长），
+    计划时间与会话经过时间（墙钟，含暂停）之间的换算、"t 时刻处于哪个阶段"
+    和"下次大休息何时开始"都是对这些数组的二分查找。
+    计划用完时自动再采样一个大周期。
+    """
+
+    MAX_LOOKAHEAD = 16  # eta() 最多为一次查询追加采样的次数
+
+    def __init__(self, settings, mode, sampler):
+        self.machine = CycleStateMachine(settings, mode, sampler)
+        self.codes = None  # 阶段代码
+        self.seconds = None  # 阶段秒数
+        self.focus_times = None  # 专注时长（休息阶段为 NaN）
+        self.ends = None  # 各阶段结束时的累计计划时间
+        self._starts_by_code = {}  # 阶段代码 -> 该类阶段开始计划时间的数组
+        self._columns = None  # 上面各数组的底层缓冲区，按倍数扩容
+        self._start_columns = None
+        self.cursor = -1  # 当前阶段下标
+        self._shift_at = []  # 每次偏移发生时的计划时间（升序）
+        self._shift_end = []  # 每次偏移结束时的墙钟时间（升序）
+        self._shift_total = []  # 截至每次偏移的累计偏移秒数
+        self._open_pause = None  # 进行中的暂停：(计划时间, 墙钟时间)
+
+    def __len__(self):
+        return 0 if self.codes is None else len(self.codes)
+
+    def extend(self, max_phases=256):
+        """再采样一个大周期（到大休息为止，最多 max_phases 个阶段），返回新增的阶段数"""
+        _numpy()
+        codes, seconds, focus_times = [], [], []
+        while not self.machine.finished and len(codes) < max_phases:
+            step = self.machine.advance()
+            if step is None:
+                break
+            phase, duration = step
+            codes.append(PHASE_CODES[phase])
+            seconds.append(duration)
+            focus_times.append(self.machine.focus_time if phase == "focus" else np.nan)
+            if phase == "long_rest":
+                break
+        if not codes:
+            return 0
+        offset = self.ends[-1] if len(self) else 0.0
+        new_seconds = np.array(seconds, dtype=np.float64)
+        new_ends = offset + np.cumsum(new_seconds)
+        new_codes = np.array(codes, dtype=np.uint8)
+        if self._columns is None:
+            self._columns = {name: _Column(dtype) for name, dtype in
+                             (("codes", np.uint8), ("seconds", np.float64),
+                              ("focus_times", np.float64), ("ends", np.float64))}
+            self._start_columns = {code: _Column(np.float64) for code in PHASE_NAMES}
+        columns = self._columns
+        self.codes = columns["codes"].extend(new_codes)
+        self.seconds = columns["seconds"].extend(new_seconds)
+        self.focus_times = columns["focus_times"].extend(focus_times)
+        self.ends = columns["ends"].extend(new_ends)
+        new_starts = new_ends - new_seconds
+        for code, column in self._start_columns.items():
+            self._starts_by_code[code] = column.extend(new_starts[new_codes == code])
+        return len(codes)
+
+    def _ensure_index(self, index):
+        """确保计划至少包含 index + 1 个阶段，返回是否满足"""
+        while len(self) <= index:
+            if not self.extend():
+                return False
+        return True
+
+    def _ensure_time(self, plan_time):
+        """确保计划覆盖到指定计划时间，返回是否满足"""
+        while not len(self) or self.ends[-1] <= plan_time:
+            if not self.extend():
+                return False
+        return True
+
+    # ---- 计划时间与墙钟时间换算 ----
+
+    def _add_shift(self, plan_time, seconds):
+        """在计划时间点插入一段偏移，之后的所有阶段顺延"""
+        total = (self._shift_total[-1] if self._shift_total else 0.0) + seconds
+        self._shift_at.append(plan_time)
+        self._shift_end.append(plan_time + total)
+        self._shift_total.append(total)
+
+    def wall_to_plan(self, t):
+        """会话经过时间 -> 计划时间（暂停期间停在暂停开始的计划时间）"""
+        if self._open_pause is not None and t >= self._open_pause[1]:
+            return self._open_pause[0]
+        k = bisect.bisect_right(self._shift_end, t)
+        plan_time = t - (self._shift_total[k - 1] if k else 0.0)
+        if k < len(self._shift_at) and plan_time > self._shift_at[k]:
+            plan_time = self._shift_at[k]  # 正处在第 k 次偏移之中
+        return plan_time
+
+    def plan_to_wall(self, plan_time, now=None):
+        """计划时间 -> 会话经过时间；进行中的暂停按持续到 now 计入"""
+        k = bisect.bisect_right(self._shift_at, plan_time)
+        t = plan_time + (self._shift_total[k - 1] if k else 0.0)
+        if self._open_pause is not None and plan_time >= self._open_pause[0]:
+            t += max((now if now is not None else self._open_pause[1]) - self._open_pause[1], 0.0)
+        return t
+
+    # ---- 查询 ----
+
+    def index_at(self, t):
+        """t 时刻（会话经过秒数）所处阶段的下标，超出计划结束时返回 None"""
+        plan_time = self.wall_to_plan(t)
+        if not self._ensure_time(plan_time):
+            return None
+        return int(np.searchsorted(self.ends, plan_time, side="right"))
+
+    def phase_at(self, t):
+        """t 时刻所处的阶段，返回 (阶段, 下标, 阶段剩余秒数)；计划已结束时返回 None"""
+        index = self.index_at(t)
+        if index is None:
+            return None
+        remaining = self.plan_to_wall(self.ends[index], t) - t
+        return PHASE_NAMES[int(self.codes[index])], index, remaining
+
+    def eta(self, phase, t):
+        """t 时刻之后下一次进入 phase 阶段的会话经过时间，不会再出现时返回 None"""
+        code = PHASE_CODES[phase]
+        plan_time = self.wall_to_plan(t)
+        for _ in range(self.MAX_LOOKAHEAD):
+            starts = self._starts_by_code.get(code)
+            if starts is not None:
+                k = int(np.searchsorted(starts, plan_time, side="right"))
+                if k < len(starts):
+                    return self.plan_to_wall(starts[k], t)
+            if not self.extend():
+                return None
+        return None  # 大周期长得离谱（如累计上限极大），不再继续采样
+
+    def window(self, t0, t1):
+        """[t0, t1) 时间段内的阶段列表，每项为 (阶段, 开始, 结束) 会话经过秒数"""
+        first = self.index_at(t0)
+        if first is None:
+            return []
+        self._ensure_time(self.wall_to_plan(t1))
+        result = []
+        for index in range(first, len(self)):
+            start = self.plan_to_wall(self.ends[index] - self.seconds[index], t0)
+            if start >= t1:
+                break
+            result.append((PHASE_NAMES[int(self.codes[index])], start,
+                           self.plan_to_wall(self.ends[index], t0)))
+        return result
+
+    def restore(self, index, t, remaining):
+        """从检查点恢复：当前处于第 index 个阶段，t 时刻还剩 remaining 秒
+
+        计划按同一种子重新生成，阶段下标相同则专注时长相同；把该阶段的结束对齐到
+        t + remaining，之前的停机和暂停都折算为一次偏移。
+        """
+        if not self._ensure_index(index):
+            return False
+        self.cursor = index
+        self._add_shift(self.ends[index] - self.seconds[index],
+                        max(t + remaining - self.ends[index], 0.0))
+        return True
+
+    def next_focus_time(self):
+        """下一个专注阶段的计划时长（与 get_random_focus_time 同单位）"""
+        index = self.cursor + 1
+        while self._ensure_index(index):
+            if self.codes[index] == PHASE_CODES["focus"]:
+                return float(self.focus_times[index])
+            index += 1
+        return round(self.machine.sampler.next(), 1)  # 计划已结束（测试模式）时直接采样
+
+    # ---- 跟随计时器事件 ----
+
+    def on_event(self, record):
+        """计时器事件监听：阶段开始时对齐计划，暂停/恢复时顺延后续阶段"""
+        event = record["event"]
+        t = record["t"]
+        if event in ("focus_start", "short_rest_start", "long_rest_start"):
+            if record.get("resumed"):
+                return  # 从检查点继续的阶段，已由 restore() 对齐
+            self.cursor += 1
+            if not self._ensure_index(self.cursor):
+                return
+            # 阶段实际开始晚于计划（打印、铃声、调度延迟）时，把差值记为偏移
+            late = t - self.plan_to_wall(self.ends[self.cursor] - self.seconds[self.cursor])
+            if late > 0:
+                self._add_shift(self.ends[self.cursor] - self.seconds[self.cursor], late)
+        elif event == "pause" and self._open_pause is None:
+            self._open_pause = (self.wall_to_plan(t), t)
+        elif event in ("resume", "session_end") and self._open_pause is not None:
+            plan_time, start = self._open_pause
+            self._open_pause = None
+            self._add_shift(plan_time, t - start)
@@ -0,0 +1,259 @@
+import json
+
+from focus_timer import build_timer_settings
+from sampler import FocusSampler, new_seed
+from timer_clock import SYSTEM_CLOCK
+
+np = None  # NumPy 在创建第一个计时器表时才导入
+
+FOCUS, SHORT_REST, LONG_REST, IDLE = 0, 1, 2, 255
+PHASE_NAMES = {FOCUS: "focus", SHORT_REST: "short_rest", LONG_REST: "long_rest"}
+
+
+def _numpy():
+    """按需导入 NumPy"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+class TimerFleet:
+    """大规模计时器表：状态和配置按列存放在定长 NumPy 数组中
+
+    每个计时器只占一行（64 字节），没有 Python 对象；相同的配置只保存一份，
+    各行通过配置编号引用。阶段切换规则与 CycleStateMachine 相同，
+    tick() 对所有到期的计时器做向量化的阶段切换，pause/resume 接受编号数组。
+    同一配置的计时器共用一个采样器，专注时长按配置分组批量采样。
+    各配置的采样器从根种子 seed 按配置编号派生独立的随机数流，
+    同一根种子、同样的操作顺序下整个计时器表可逐位重放。
+    """
+
+    # 每个计时器的状态列
+    COLUMNS = [
+        ("config", "<u4"),        # 配置编号
+        ("phase", "u1"),          # 当前阶段，IDLE 表示空行或已结束
+        ("paused", "?"),
+        ("cycle", "<u2"),         # 已完成的大周期数
+        ("focus_time", "<f8"),    # 当前专注时长（测试模式为秒，否则为分钟）
+        ("total_focus", "<f8"),   # 累计专注时间
+        ("deadline", "<f8"),      # 当前阶段截止时间（单调时钟）
+        ("remaining", "<f8"),     # 暂停时冻结的剩余秒数
+        ("pause_start", "<f8"),
+        ("total_pause", "<f8"),
+        ("start", "<f8"),         # 开始时的单调时钟读数
+    ]
+
+    def __init__(self, clock=None, capacity=1024, on_transition=None, seed=None):
+        _numpy()
+        self.clock = clock or SYSTEM_CLOCK
+        self.seed = seed if seed is not None else new_seed()  # 根种子
+        self.on_transition = on_transition  # 回调 (编号数组, 新阶段数组, 时间)，结束的计时器阶段为 IDLE
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self.columns["phase"][:] = IDLE
+        self.size = 0  # 已使用的行数
+        self._free = []  # 可复用的空行
+        self.transitions = 0  # 已处理的阶段切换次数
+        # 配置表：按配置编号存放，每种配置一份
+        self._config_ids = {}
+        self.configs = []
+        self.samplers = []
+        self._cfg_max_focus = np.zeros(0)
+        self._cfg_short = np.zeros(0)
+        self._cfg_long = np.zeros(0)
+        self._cfg_unit = np.zeros(0)  # 专注时长换算为秒的倍数
+        self._cfg_cycle_limit = np.zeros(0, dtype=np.uint16)  # 大周期上限，0 表示不限
+
+    def __len__(self):
+        return self.size - len(self._free)
+
+    def intern_config(self, mode="default", custom_settings=None, rng=None):
+        """登记一种配置并返回编号，相同的配置只保存一份"""
+        settings = build_timer_settings(mode, custom_settings)
+        key = (mode, json.dumps({k: v for k, v in settings.items() if k != "sounds"}, sort_keys=True))
+        config_id = self._config_ids.get(key)
+        if config_id is None:
+            config_id = len(self.configs)
+            self._config_ids[key] = config_id
+            self.configs.append(settings)
+            self.samplers.append(FocusSampler(settings["focus_distribution"], settings["min_focus_time"],
+                                              settings["max_single_focus_time"], settings["focus_mean"],
+                                              settings["focus_std"], rng=rng,
+                                              seed=self.seed, spawn_key=(config_id,)))
+            self._cfg_max_focus = np.append(self._cfg_max_focus, settings["max_focus_time"])
+            self._cfg_short = np.append(self._cfg_short, settings["short_rest_time"])
+            self._cfg_long = np.append(self._cfg_long, settings["long_rest_time"])
+            self._cfg_unit = np.append(self._cfg_unit, 1.0 if mode == "test" else 60.0)
+            self._cfg_cycle_limit = np.append(self._cfg_cycle_limit,
+                                              np.uint16(2 if mode == "test" else 0))
+        return config_id
+
+    def _grow(self):
+        capacity = max(len(self.columns["phase"]) * 2, 16)
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            if name == "phase":
+                grown[len(column):] = IDLE
+            self.columns[name] = grown
+
+    def add(self, mode="default", custom_settings=None, count=1):
+        """添加 count 个相同配置的计时器并立即开始第一个阶段，返回编号数组"""
+        config_id = self.intern_config(mode, custom_settings)
+        reuse = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        while self.size + count - len(reuse) > len(self.columns["phase"]):
+            self._grow()
+        fresh = np.arange(self.size, self.size + count - len(reuse))
+        self.size += len(fresh)
+        ids = np.concatenate([np.array(reuse, dtype=np.int64), fresh])
+        now = self.clock.monotonic()
+        c = self.columns
+        for name in ("cycle", "focus_time", "total_focus", "remaining", "pause_start", "total_pause"):
+            c[name][ids] = 0
+        c["config"][ids] = config_id
+        c["paused"][ids] = False
+        c["start"][ids] = now
+        c["deadline"][ids] = now
+        c["phase"][ids] = IDLE
+        self._advance(ids, now)
+        return ids
+
+    def stop(self, ids):
+        """停止并移除计时器，空出的行供之后复用"""
+        ids = np.atleast_1d(ids)
+        ids = ids[self.columns["phase"][ids] != IDLE]
+        self.columns["phase"][ids] = IDLE
+        self._free.extend(int(i) for i in ids)
+        return len(ids)
+
+    def pause(self, ids):
+        """暂停计时器，冻结剩余时间，返回实际暂停的数量"""
+        c = self.columns
+        ids = np.atleast_1d(ids)
+        ids = ids[(c["phase"][ids] != IDLE) & ~c["paused"][ids]]
+        now = self.clock.monotonic()
+        c["remaining"][ids] = np.maximum(c["deadline"][ids] - now, 0.0)
+        c["pause_start"][ids] = now
+        c["paused"][ids] = True
+        return len(ids)
+
+    def resume(self, ids):
+        """恢复计时器，截止时间顺延暂停时长，返回实际恢复的数量"""
+        c = self.columns
+        ids = np.atleast_1d(ids)
+        ids = ids[(c["phase"][ids] != IDLE) & c["paused"][ids]]
+        now = self.clock.monotonic()
+        c["total_pause"][ids] += now - c["pause_start"][ids]
+        c["deadline"][ids] = now + c["remaining"][ids]
+        c["paused"][ids] = False
+        return len(ids)
+
+    def _running(self):
+        """正在计时（未暂停、未结束）的行掩码"""
+        c = self.columns
+        return (c["phase"][:self.size] != IDLE) & ~c["paused"][:self.size]
+
+    def next_deadline(self):
+        """最早的截止时间，没有正在计时的计时器时返回 None"""
+        running = self._running()
+        if not running.any():
+            return None
+        return float(self.columns["deadline"][:self.size][running].min())
+
+    def tick(self, now=None):
+        """处理所有到期的计时器，返回本次的阶段切换次数"""
+        if now is None:
+            now = self.clock.monotonic()
+        count = 0
+        while True:
+            due = np.flatnonzero(self._running() & (self.columns["deadline"][:self.size] <= now))
+            if not len(due):
+                return count
+            count += len(due)
+            self.transitions += len(due)
+            self._advance(due, now)
+
+    def _advance(self, ids, now):
+        """对一组计时器结束当前阶段并进入下一阶段（与 CycleStateMachine.advance 相同的规则）"""
+        c = self.columns
+        cfg = c["config"][ids]
+        phase = c["phase"][ids]
+        new_phase = np.empty(len(ids), dtype=np.uint8)
+        seconds = np.zeros(len(ids))
+
+        # 专注结束 -> 短休息
+        from_focus = phase == FOCUS
+        focus_ids = ids[from_focus]
+        c["total_focus"][focus_ids] += c["focus_time"][focus_ids]
+        new_phase[from_focus] = SHORT_REST
+        seconds[from_focus] = self._cfg_short[cfg[from_focus]]
+
+        # 大休息结束：累计清零，测试模式完成 2 个大周期后结束
+        from_long = phase == LONG_REST
+        c["total_focus"][ids[from_long]] = 0
+        limit = self._cfg_cycle_limit[cfg]
+        finished = from_long & (limit > 0) & (c["cycle"][ids] >= limit)
+        new_phase[finished] = IDLE
+
+        # 其余（短休息结束、大休息结束、新加入）：累计达到上限进入大休息，否则专注
+        decide = ~from_focus & ~finished
+        to_long = decide & (c["total_focus"][ids] >= self._cfg_max_focus[cfg])
+        c["cycle"][ids[to_long]] += 1
+        new_phase[to_long] = LONG_REST
+        seconds[to_long] = self._cfg_long[cfg[to_long]]
+
+        to_focus = np.flatnonzero(decide & ~to_long)
+        if len(to_focus):
+            new_phase[to_focus] = FOCUS
+            focus_cfg = cfg[to_focus]
+            focus_time = np.empty(len(to_focus))
+            # 按配置分组批量采样
+            for config_id in np.unique(focus_cfg):
+                group = focus_cfg == config_id
+                focus_time[group] = np.round(self.samplers[config_id].sample(int(group.sum())), 1)
+            c["focus_time"][ids[to_focus]] = focus_time
+            seconds[to_focus] = focus_time * self._cfg_unit[focus_cfg]
+
+        # 以计划截止时间为起点排下一阶段，处理延迟不会累积
+        c["deadline"][ids] += seconds
+        c["phase"][ids] = new_phase
+        self._free.extend(int(i) for i in ids[finished])
+        if self.on_transition is not None:
+            self.on_transition(ids, new_phase, now)
+
+    def state(self, timer_id):
+        """单个计时器的状态字典"""
+        c = self.columns
+        phase = int(c["phase"][timer_id])
+        now = self.clock.monotonic()
+        paused = bool(c["paused"][timer_id])
+        return {
+            "phase": PHASE_NAMES.get(phase),
+            "paused": paused,
+            "remaining": float(c["remaining"][timer_id] if paused else c["deadline"][timer_id] - now),
+            "total_focus_time": float(c["total_focus"][timer_id]),
+            "cycles": int(c["cycle"][timer_id]),
+            "total_pause_time": float(c["total_pause"][timer_id]),
+        }
+
+    def run(self, until=None):
+        """按最早截止时间休眠并处理切换，直到全部结束或到达 until（单调时钟）"""
+        while True:
+            now = self.clock.monotonic()
+            if until is not None and now >= until:
+                return
+            deadline = self.next_deadline()
+            if deadline is None:
+                if until is None:
+                    return
+                self.clock.sleep(until - now)
+                continue
+            if deadline > now:
+                self.clock.sleep(deadline - now if until is None else min(deadline, until) - now)
+                continue
+            self.tick(now)
+
+    def nbytes(self):
+        """状态列占用的字节数"""
+        return sum(column.nbytes for column in self.columns.values())
@@ -1,13 +1,30 @@
 import time
-import random
+import math
 import threading
 import os
 import sys
-import msvcrt  # Windows下键盘输入检测
 import json  # 用于配置文件读写
-import numpy as np  # 用于正态分布采样
+import contextlib
+import io
 from datetime import datetime, timedelta
-import pygame  # 添加pygame库
+from sound_bundle import BUNDLE_FILE  # 预解码的音效资源包
+from sound_engine import SoundEngine  # 预解码、非阻塞的音效播放
+from timer_clock import SYSTEM_CLOCK, VirtualClock  # 可注入的时钟
+from sampler import FocusSampler  # 批量预生成的专注时长采样
+from keyboard_input import KeyboardInput  # 跨平台、事件驱动的键盘输入
+from journal import Journal  # 只追加的会话日志
+from checkpoint import CheckpointFile, stored_name  # 定长、原地改写的状态检查点
+from config_store import SqliteConfigStore  # 配置存储后端
+from history import HistoryStore, print_report  # 列式会话历史
+from cycle_plan import CyclePlan  # 预先生成的周期计划
+from renderer import TerminalRenderer  # 增量、限速的终端输出
+
+JOURNAL_FILE = "focus_timer_journal.bin"
+CHECKPOINT_FILE = "focus_timer_checkpoint.bin"
+DASHBOARD_CHECKPOINT_FILE = "focus_timer_dashboard.ckpt"
+HISTORY_DIR = "focus_timer_history"
+DEFAULT_STATUS_NAME = "focus_timer_status"  # 实时状态共享内存名称，与 shared_state.DEFAULT_NAME 相同
+CONFIG_PAGE_SIZE = 20  # 配置列表每页显示的数量
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，兼容PyInstaller打包后的环境"""
@@ -21,294 +38,540 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class ConfigManager:
-    """配置管理类，用于保存和加载自定义设置"""
+    """配置管理类，用于保存和加载自定义设置
+
+    配置存放在 SQLite 数据库中，按名称单条读写；读取结果在进程内共享缓存，
+    每次创建 ConfigManager 都不需要重新解析全部配置。
+    """
     
     def __init__(self):
-        self.config_file = "focus_timer_configs.json"
-        self.configs = self.load_configs()
-    
-    def load_configs(self):
-        """加载已保存的配置"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            print(f"[WARNING] 加载配置文件失败: {e}")
-            return {}
-    
-    def save_configs(self):
-        """保存配置到文件"""
+        self.config_file = "focus_timer_configs.db"
+        self.legacy_config_file = "focus_timer_configs.json"  # 旧版 JSON 配置，首次启动时导入
+        self.store = None
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.configs, f, ensure_ascii=False, indent=2)
-            return True
+            self.store = SqliteConfigStore(self.config_file, self.legacy_config_file)
         except Exception as e:
-            print(f"[ERROR] 保存配置文件失败: {e}")
-            return False
+            print(f"[WARNING] 打开配置数据库失败: {e}")
     
     def save_config(self, name, settings):
         """保存一个配置"""
         # 添加保存时间戳
         settings['saved_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.configs[name] = settings
-        return self.save_configs()
+        try:
+            self.store.put(name, settings)
+            return True
+        except Exception as e:
+            print(f"[ERROR] 保存配置失败: {e}")
+            return False
     
     def get_config(self, name):
         """获取指定名称的配置"""
-        return self.configs.get(name)
+        if self.store is None:
+            return None
+        return self.store.get(name)
+    
+    def has_config(self, name):
+        """是否存在指定名称的配置"""
+        return self.get_config(name) is not None
+    
+    def count_configs(self):
+        """已保存的配置数量"""
+        if self.store is None:
+            return 0
+        return self.store.count()
     
-    def list_configs(self):
-        """列出所有已保存的配置"""
-        return list(self.configs.keys())
+    def list_configs(self, offset=0, limit=None):
+        """按保存顺序列出配置名称，支持分页"""
+        return [name for name, _ in self.list_config_summaries(offset, limit)]
+    
+    def list_config_summaries(self, offset=0, limit=None):
+        """分页列出 (配置名称, 保存时间)，不读取配置内容"""
+        if self.store is None:
+            return []
+        return self.store.page(offset, limit)
     
     def delete_config(self, name):
         """删除指定配置"""
-        if name in self.configs:
-            del self.configs[name]
-            return self.save_configs()
-        return False
+        if self.store is None:
+            return False
+        try:
+            return self.store.delete(name)
+        except Exception as e:
+            print(f"[ERROR] 删除配置失败: {e}")
+            return False
+
+def build_timer_settings(mode="default", custom_settings=None):
+    """根据模式生成计时参数（时长、专注时间区间、分布模式和音效路径）"""
+    settings = {}
+    
+    # 默认音效文件路径 - 使用资源路径函数
+    default_sounds = {
+        "work_start": get_resource_path("work.mp3"),
+        "short_rest": get_resource_path("small_rest.mp3"),
+        "long_rest": get_resource_path("big_rest.mp3")
+    }
+    
+    # 根据模式设置参数
+    if mode == "test":
+        settings["max_focus_time"] = 6  # 测试模式：6秒后长休息
+        settings["short_rest_time"] = 1  # 测试模式：1秒短休息
+        settings["long_rest_time"] = 2   # 测试模式：2秒长休息
+        settings["min_focus_time"] = 1.0  # 测试模式：最小1秒
+        settings["max_single_focus_time"] = 2.0  # 测试模式：最大2秒
+        settings["focus_distribution"] = "uniform"  # 测试模式：均匀分布
+        settings["focus_mean"] = 1.5  # 正态分布均值（如果使用正态分布）
+        settings["focus_std"] = 0.3   # 正态分布标准差（如果使用正态分布）
+        settings["sounds"] = default_sounds
+    elif mode == "custom" and custom_settings:
+        # 自定义模式使用用户设置
+        settings["max_focus_time"] = custom_settings.get("max_focus_time", 90)
+        settings["short_rest_time"] = custom_settings.get("short_rest_time", 10)
+        settings["long_rest_time"] = custom_settings.get("long_rest_time", 20 * 60)
+        
+        # 自定义专注时间区间设置
+        settings["min_focus_time"] = custom_settings.get("min_focus_time", 3.0)
+        settings["max_single_focus_time"] = custom_settings.get("max_single_focus_time", 5.0)
+        settings["focus_distribution"] = custom_settings.get("focus_distribution", "uniform")
+        settings["focus_mean"] = custom_settings.get("focus_mean", 4.0)
+        settings["focus_std"] = custom_settings.get("focus_std", 0.8)
+        
+        # 处理自定义音效路径
+        custom_sounds = custom_settings.get("sounds", {})
+        settings["sounds"] = {}
+        for key, path in custom_sounds.items():
+            if os.path.isabs(path):
+                # 如果是绝对路径，直接使用
+                settings["sounds"][key] = path
+            else:
+                # 如果是相对路径，使用资源路径函数
+                settings["sounds"][key] = get_resource_path(path)
+        
+        # 确保所有必需的音效都有值
+        for key, default_path in default_sounds.items():
+            if key not in settings["sounds"]:
+                settings["sounds"][key] = default_path
+    else:
+        # 默认模式
+        settings["max_focus_time"] = 90  # 正常模式：90分钟后长休息
+        settings["short_rest_time"] = 10  # 正常模式：10秒短休息
+        settings["long_rest_time"] = 20 * 60  # 正常模式：20分钟长休息
+        settings["min_focus_time"] = 3.0  # 默认模式：最小3分钟
+        settings["max_single_focus_time"] = 5.0  # 默认模式：最大5分钟
+        settings["focus_distribution"] = "uniform"  # 默认模式：均匀分布
+        settings["focus_mean"] = 4.0  # 正态分布均值
+        settings["focus_std"] = 0.8   # 正态分布标准差
+        settings["sounds"] = default_sounds
+    return settings
 
 class FocusTimer:
-    def __init__(self, mode="default", custom_settings=None):
+    def __init__(self, mode="default", custom_settings=None, clock=None, headless=False, rng=None,
+                 journal=None, history=None, metrics=None, seed=None, recorder=None, checkpoint=None,
+                 config_name=None, notifier=None, publisher=None):
+        self.clock = clock or SYSTEM_CLOCK  # 时钟与休眠均通过它进行，便于模拟
+        self.headless = headless  # 无界面模式：不播放音效、不读取键盘、不逐秒刷新
+        self.metrics = metrics  # 可选的 Metrics，None 时所有埋点都跳过
+        self.events = []  # 事件时间线
+        self.event_listeners = []  # 事件监听回调，参数为事件字典
+        self.run_deadline = None  # 运行截止时间（单调时钟），None表示不限
         self.is_running = False
         self.session_start_time = None
+        self._session_start_mono = None  # 会话开始时的单调时钟读数
         self.total_focus_time = 0  # 累计专注时间（分钟）
         self.is_resting = False
+        self.phase = None  # 当前阶段：focus / short_rest / long_rest
         self.is_paused = False  # 暂停状态
-        self.pause_start_time = None  # 暂停开始时间
+        self.keyboard = None  # 运行期间的键盘输入子系统
+        self.pause_start_time = None  # 暂停开始时间（单调时钟）
+        self.deadline = None  # 当前倒计时的截止时间（单调时钟）
         self.total_pause_time = 0  # 总暂停时间
         self.mode = mode
         self.should_return_to_menu = False  # 是否返回主菜单
-        
-        # 初始化pygame音频
-        pygame.mixer.init()
-        
-        # 默认音效文件路径 - 使用资源路径函数
-        default_sounds = {
-            "work_start": get_resource_path("work.mp3"),
-            "short_rest": get_resource_path("small_rest.mp3"),
-            "long_rest": get_resource_path("big_rest.mp3")
-        }
+        self.cycle_count = 0  # 已完成的大周期数
+        self.focus_time = None  # 当前专注时长
+        self.config_name = config_name  # 使用的已保存配置名称（写入检查点）
+        self.checkpoint = checkpoint  # 可选的 CheckpointFile，崩溃后可用 --resume 恢复
+        self.checkpoint_interval = 5.0  # 阶段内定期写检查点的间隔（秒）
+        self._next_checkpoint = None
+        self._resume = None  # 待恢复的检查点状态
+        self._pause_on_start = False  # 恢复时检查点处于暂停状态
         
         # 根据模式设置参数
+        settings = build_timer_settings(mode, custom_settings)
+        self.max_focus_time = settings["max_focus_time"]
+        self.short_rest_time = settings["short_rest_time"]
+        self.long_rest_time = settings["long_rest_time"]
+        self.min_focus_time = settings["min_focus_time"]
+        self.max_single_focus_time = settings["max_single_focus_time"]
+        self.focus_distribution = settings["focus_distribution"]
+        self.focus_mean = settings["focus_mean"]
+        self.focus_std = settings["focus_std"]
+        self.sounds = settings["sounds"]
         if mode == "test":
-            self.max_focus_time = 6  # 测试模式：6秒后长休息
-            self.short_rest_time = 1  # 测试模式：1秒短休息
-            self.long_rest_time = 2   # 测试模式：2秒长休息
-            self.min_focus_time = 1.0  # 测试模式：最小1秒
-            self.max_single_focus_time = 2.0  # 测试模式：最大2秒
-            self.focus_distribution = "uniform"  # 测试模式：均匀分布
-            self.focus_mean = 1.5  # 正态分布均值（如果使用正态分布）
-            self.focus_std = 0.3   # 正态分布标准差（如果使用正态分布）
-            self.sounds = default_sounds
             print("[TEST] 测试模式启动 - 所有时间已缩短")
         elif mode == "custom" and custom_settings:
-            # 自定义模式使用用户设置
-            self.max_focus_time = custom_settings.get("max_focus_time", 90)
-            self.short_rest_time = custom_settings.get("short_rest_time", 10)
-            self.long_rest_time = custom_settings.get("long_rest_time", 20 * 60)
-            
-            # 自定义专注时间区间设置
-            self.min_focus_time = custom_settings.get("min_focus_time", 3.0)
-            self.max_single_focus_time = custom_settings.get("max_single_focus_time", 5.0)
-            self.focus_distribution = custom_settings.get("focus_distribution", "uniform")
-            self.focus_mean = custom_settings.get("focus_mean", 4.0)
-            self.focus_std = custom_settings.get("focus_std", 0.8)
-            
-            # 处理自定义音效路径
-            custom_sounds = custom_settings.get("sounds", {})
-            self.sounds = {}
-            for key, path in custom_sounds.items():
-                if os.path.isabs(path):
-                    # 如果是绝对路径，直接使用
-                    self.sounds[key] = path
-                else:
-                    # 如果是相对路径，使用资源路径函数
-                    self.sounds[key] = get_resource_path(path)
-            
-            # 确保所有必需的音效都有值
-            for key, default_path in default_sounds.items():
-                if key not in self.sounds:
-                    self.sounds[key] = default_path
-                    
             print("[CUSTOM] 自定义模式启动")
         else:
-            # 默认模式
-            self.max_focus_time = 90  # 正常模式：90分钟后长休息
-            self.short_rest_time = 10  # 正常模式：10秒短休息
-            self.long_rest_time = 20 * 60  # 正常模式：20分钟长休息
-            self.min_focus_time = 3.0  # 默认模式：最小3分钟
-            self.max_single_focus_time = 5.0  # 默认模式：最大5分钟
-            self.focus_distribution = "uniform"  # 默认模式：均匀分布
-            self.focus_mean = 4.0  # 正态分布均值
-            self.focus_std = 0.8   # 正态分布标准差
-            self.sounds = default_sounds
             print("[DEFAULT] 默认模式启动")
+        
+        # 每个计时器拥有独立的随机数生成器和采样器；配置中保存了种子时沿用该种子，
+        # 否则生成新种子，种子写入 session_start 事件，可据此重放整个会话
+        if seed is None and mode == "custom" and custom_settings:
+            seed = custom_settings.get("seed")
+        self.sampler = FocusSampler(self.focus_distribution, self.min_focus_time,
+                                    self.max_single_focus_time, self.focus_mean,
+                                    self.focus_std, rng=rng, seed=seed)
+        self.seed = self.sampler.seed
+        # 专注时长按整个大周期预先采样，可以查询下次大休息等预计时间
+        self.plan = CyclePlan(settings, mode, self.sampler)
+        self.event_listeners.append(self.plan.on_event)
+        
+        # 事件写入会话日志，进程意外退出后可恢复
+        self.timer_id = journal.attach(self) if journal is not None else None
+        # 完成的专注/休息区间写入历史，用于长期统计
+        if history is not None:
+            history.attach(self)
+        # 录制完整事件流，用于之后在虚拟时钟下回放校验
+        if recorder is not None:
+            recorder.attach(self)
+        # 阶段切换和暂停/恢复转发给通知目标（桌面、日志、webhook），由后台线程投递
+        if notifier is not None:
+            notifier.attach(self)
+        # 实时状态发布到共享内存，状态栏等本机进程可以直接读取
+        if publisher is not None:
+            publisher.attach(self)
+        
+        # 音效在第一次铃声时才初始化混音器并解码，之后每次铃声都直接从缓存播放
+        self.sound_engine = None
+        # 倒计时状态行只重写变化的部分；输出不是终端时只打印事件行
+        self.renderer = None
+        if not headless:
+            self.renderer = TerminalRenderer()
+            self.sound_engine = SoundEngine(self.sounds, get_resource_path(BUNDLE_FILE))
+            self.sound_engine.metrics = metrics
+    
+    def emit(self, event, **data):
+        """记录一条事件到时间线并通知监听者"""
+        record = {"t": self.elapsed_seconds(), "event": event}
+        record.update(data)
+        self.events.append(record)
+        for listener in self.event_listeners:
+            listener(record)
+    
+    def elapsed_seconds(self):
+        """会话开始以来经过的秒数（按时钟计算，包含暂停）"""
+        if self._session_start_mono is None:
+            return 0.0
+        return self.clock.monotonic() - self._session_start_mono
 
-    def play_bell(self, event_type="default"):
-        """播放不同类型的铃声"""
+    def checkpoint_state(self):
+        """当前状态的检查点字典，不在倒计时中时返回 None"""
+        if self.deadline is None or self.phase is None:
+            return None
+        now = self.clock.monotonic()
+        total_pause_time = self.total_pause_time
+        if self.is_paused and self.pause_start_time is not None:
+            total_pause_time += now - self.pause_start_time
+        return {
+            "mode": self.mode,
+            "phase": self.phase,
+            "paused": self.is_paused,
+            "cycle_count": self.cycle_count,
+            "phase_index": self.plan.cursor,
+            "focus_time": self.focus_time,
+            "total_focus_time": self.total_focus_time,
+            "remaining": max(self.deadline - (self.pause_start_time if self.is_paused else now), 0.0),
+            "elapsed": self.elapsed_seconds(),
+            "total_pause_time": total_pause_time,
+            "wall_time": self.clock.now().timestamp(),
+            "session_start": self.session_start_time.timestamp(),
+            "settings": self.plan.machine.settings,
+            "seed": self.seed,
+            "config_name": self.config_name,
+        }
+
+    def save_checkpoint(self):
+        """把当前状态写入检查点（阶段切换、暂停/恢复时调用）"""
+        if self.checkpoint is None:
+            return
+        self._next_checkpoint = self.clock.monotonic() + self.checkpoint_interval
+        state = self.checkpoint_state()
+        if state is None:
+            return
         try:
-            sound_file = self.sounds.get(event_type)
-            if sound_file and os.path.exists(sound_file):
-                pygame.mixer.music.load(sound_file)
-                pygame.mixer.music.play()
-                # 等待音效播放完成
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-            else:
-                # 备用文字提示
-                if sound_file:
-                    print(f"[WARNING] 音效文件未找到: {sound_file}")
-                if event_type == "work_start":
-                    print("[BELL] 开始工作铃声！")
-                elif event_type == "short_rest":
-                    print("[BELL] 小休息铃声！")
-                elif event_type == "long_rest":
-                    print("[BELL] 大休息铃声！")
-                else:
-                    print("[BELL] 铃声响起！")
+            self.checkpoint.write(0, state)
+        except Exception as e:
+            print(f"[WARNING] 写入检查点失败: {e}")
+            self.checkpoint = None
+
+    def restore_checkpoint(self, state):
+        """载入检查点，下一次 run() 从中断的阶段继续
+
+        进程停止期间计为暂停：当前阶段的剩余时间与写入检查点时相同。
+        """
+        downtime = max(self.clock.now().timestamp() - state["wall_time"], 0.0)
+        self.cycle_count = state["cycle_count"]
+        self.total_focus_time = state["total_focus_time"]
+        self.total_pause_time = state["total_pause_time"] + downtime
+        self._resume = dict(state, elapsed=state["elapsed"] + downtime)
+
+    def play_bell(self, event_type="default", on_complete=None):
+        """播放不同类型的铃声（非阻塞，播放完成时调用 on_complete）"""
+        self.emit("bell", sound=event_type)
+        if self.headless:
+            return
+        try:
+            start = time.perf_counter()
+            played = self.sound_engine.play(event_type, on_complete)
+            if self.metrics is not None:
+                self.metrics.observe("focus_timer_bell_play_seconds", time.perf_counter() - start,
+                                     sound=event_type)
+            if played:
+                return
         except Exception as e:
             print(f"播放音效时出错: {e}")
-            # 备用文字提示
-            if event_type == "work_start":
-                print("[BELL] 开始工作铃声！")
-            elif event_type == "short_rest":
-                print("[BELL] 小休息铃声！")
-            elif event_type == "long_rest":
-                print("[BELL] 大休息铃声！")
-            else:
-                print("[BELL] 铃声响起！")
+        # 备用文字提示
+        if event_type == "work_start":
+            print("[BELL] 开始工作铃声！")
+        elif event_type == "short_rest":
+            print("[BELL] 小休息铃声！")
+        elif event_type == "long_rest":
+            print("[BELL] 大休息铃声！")
+        else:
+            print("[BELL] 铃声响起！")
     
     def get_random_focus_time(self):
-        """获取随机专注时间（支持自定义区间和分布模式）"""
-        if self.focus_distribution == "normal":
-            # 正态分布采样
-            while True:
-                focus_time = np.random.normal(self.focus_mean, self.focus_std)
-                # 确保生成的时间在合理范围内
-                if self.min_focus_time <= focus_time <= self.max_single_focus_time:
-                    return round(focus_time, 1)
-                # 如果超出范围，重新采样（避免无限循环，最多尝试100次）
-                # 如果100次都失败，回退到均匀分布
-                for _ in range(100):
-                    focus_time = np.random.normal(self.focus_mean, self.focus_std)
-                    if self.min_focus_time <= focus_time <= self.max_single_focus_time:
-                        return round(focus_time, 1)
-                # 回退到均匀分布
-                break
-        
-        # 均匀分布采样（默认或回退方案）
-        focus_time = random.uniform(self.min_focus_time, self.max_single_focus_time)
-        return round(focus_time, 1)
+        """获取随机专注时间（支持自定义区间和分布模式），取自预先生成的周期计划"""
+        return self.plan.next_focus_time()
+    
+    def next_phase_eta(self, phase="long_rest"):
+        """下一次进入指定阶段的预计时刻（datetime），无法预计时返回 None"""
+        if self.session_start_time is None:
+            return None
+        eta = self.plan.eta(phase, self.elapsed_seconds())
+        if eta is None:
+            return None
+        return self.session_start_time + timedelta(seconds=eta)
     
     def print_time_info(self, message, remaining_time=None):
         """打印时间信息"""
-        current_time = datetime.now().strftime("%H:%M:%S")
-        print(f"\n[{current_time}] {message}")
-        if remaining_time:
-            print(f"剩余时间: {remaining_time}")
-        print("-" * 50)
+        if self.metrics is not None:
+            start = time.perf_counter()
+        current_time = self.clock.now().strftime("%H:%M:%S")
+        if self.renderer is not None and not self.renderer.is_tty:
+            # 输出到日志时每个事件一行，不打印空行和分隔线
+            suffix = f"（剩余时间: {remaining_time}）" if remaining_time else ""
+            print(f"[{current_time}] {message}{suffix}")
+        else:
+            print(f"\n[{current_time}] {message}")
+            if remaining_time:
+                print(f"剩余时间: {remaining_time}")
+            print("-" * 50)
+        if self.metrics is not None:
+            self.metrics.observe("focus_timer_print_seconds", time.perf_counter() - start, site="info")
     
-    def check_for_pause_input(self):
-        """检查是否有暂停/恢复输入（Windows系统）"""
-        if msvcrt.kbhit():
-            key = msvcrt.getch().decode('utf-8', errors='ignore').lower()
-            if key == 'p':  # 按P键暂停/恢复
-                return True
-        return False
+    def keys_available(self):
+        """是否有能送来按键的输入（终端键盘或回放脚本）"""
+        return self.keyboard is not None and self.keyboard.available
+
+    def wait_for_key(self, timeout=None):
+        """等待按键直到超时（秒），返回小写的按键；没有键盘时按时钟休眠"""
+        if not self.keys_available():
+            if timeout is not None:
+                self.clock.sleep(timeout)
+            return None
+        key = self.keyboard.get(timeout)
+        return key.lower() if key else None
 
     def handle_pause(self):
         """处理暂停/恢复逻辑"""
+        if self.metrics is not None and self.keyboard is not None and self.keyboard.last_key_time:
+            # 按键被读取线程读到的时刻 -> 暂停/恢复生效
+            self.metrics.observe("focus_timer_input_latency_seconds",
+                                 time.monotonic() - self.keyboard.last_key_time)
+            self.keyboard.last_key_time = None
+        if self.renderer is not None:
+            self.renderer.forget()  # 下面的提示会换行离开倒计时状态行
         if self.is_paused:
             # 当前是暂停状态，恢复计时
-            if self.pause_start_time:
-                pause_duration = time.time() - self.pause_start_time
+            if self.pause_start_time is not None:
+                pause_duration = self.clock.monotonic() - self.pause_start_time
                 self.total_pause_time += pause_duration
                 self.pause_start_time = None
+                # 截止时间整体顺延暂停时长，保证剩余时间不变
+                if self.deadline is not None:
+                    self.deadline += pause_duration
             self.is_paused = False
+            self.emit("resume")
             print("\n[RESUME] 计时恢复！按 P 键暂停")
         else:
             # 当前是运行状态，暂停计时
             self.is_paused = True
-            self.pause_start_time = time.time()
+            self.pause_start_time = self.clock.monotonic()
+            self.emit("pause")
             print("\n[PAUSE] 计时已暂停！按 P 键恢复计时")
+        self.save_checkpoint()
 
     def countdown(self, total_seconds, message_prefix=""):
-        """倒计时显示（支持暂停/恢复）"""
-        # 将浮点数秒转换为整数
-        total_seconds = int(total_seconds)
-        remaining_seconds = total_seconds
+        """倒计时显示（支持暂停/恢复）
+
+        基于单调时钟（self.clock）的绝对截止时间计算剩余时间，而不是逐秒递减，
+        打印、按键处理和调度抖动都不会把结束时间往后推。
+        """
+        self.deadline = self.clock.monotonic() + total_seconds
         
-        print(f"\n提示：计时过程中按 P 键可暂停/恢复")
+        if self.renderer is None or self.renderer.is_tty:
+            print(f"\n提示：计时过程中按 P 键可暂停/恢复")
+        if self._pause_on_start and not self.keys_available():
+            # 没有键盘就无法按 P 键恢复，直接继续计时
+            self._pause_on_start = False
+            print("[WARNING] 检查点处于暂停状态，但当前没有可用的键盘输入，直接继续计时")
+        if self._pause_on_start:
+            # 从暂停中的检查点恢复：保持暂停，等待按 P 键
+            self._pause_on_start = False
+            self.handle_pause()
+        else:
+            self.save_checkpoint()
+        metrics = self.metrics
+        last_display = None  # 上一次显示的秒数，用于统计被跳过的刷新
         
-        while remaining_seconds > 0:
-            if not self.is_running:
-                return False
-            
-            # 检查是否有暂停输入
-            if self.check_for_pause_input():
-                self.handle_pause()
-            
-            # 如果暂停，不减少时间，继续循环
-            if self.is_paused:
-                time.sleep(0.1)  # 短暂休眠避免CPU占用过高
-                continue
-            
-            mins, secs = divmod(remaining_seconds, 60)
-            timer = f"{mins:02d}:{secs:02d}"
-            print(f"\r{message_prefix}{timer} [P:暂停]", end="", flush=True)
-            
-            time.sleep(1)
-            remaining_seconds -= 1
+        try:
+            while True:
+                if not self.is_running:
+                    return False
+                
+                # 暂停期间阻塞等待按键，不占用CPU；截止时间在恢复时顺延
+                if self.is_paused:
+                    # 没有键盘时不会有按键到来，按时钟休眠，不空转
+                    if self.wait_for_key(None if self.keys_available() else 1.0) == 'p':  # 按P键恢复
+                        self.handle_pause()
+                    last_display = None
+                    continue
+                
+                remaining = self.deadline - self.clock.monotonic()
+                if remaining <= 0:
+                    if metrics is not None:
+                        metrics.observe("focus_timer_phase_end_lateness_seconds", -remaining,
+                                        phase=self.phase)
+                        metrics.maybe_write()
+                    break
+                
+                # 无界面模式不需要逐秒刷新，直接睡到截止时间（回放时期间可能有录制的按键）
+                if self.headless:
+                    if self.wait_for_key(remaining) == 'p':
+                        self.handle_pause()
+                    continue
+                
+                if self.checkpoint is not None and self.clock.monotonic() >= self._next_checkpoint:
+                    self.save_checkpoint()  # 阶段内定期更新，进程被杀时最多丢失一个间隔
+                
+                # 显示向上取整的剩余秒数，与原先逐秒显示一致
+                display_seconds = math.ceil(remaining)
+                mins, secs = divmod(display_seconds, 60)
+                timer = f"{mins:02d}:{secs:02d}"
+                if metrics is not None:
+                    print_start = time.perf_counter()
+                self.renderer.status(f"{message_prefix}{timer} [P:暂停]")
+                if metrics is not None:
+                    metrics.observe("focus_timer_print_seconds", time.perf_counter() - print_start,
+                                    site="tick")
+                    # 两次刷新之间跨过了不止一秒：中间的刷新被跳过或合并
+                    if last_display is not None and display_seconds < last_display - 1:
+                        metrics.inc("focus_timer_ticks_missed_total", last_display - 1 - display_seconds,
+                                    phase=self.phase)
+                    last_display = display_seconds
+                
+                # 等到下一个整秒边界（相对截止时间），期间的按键立即处理
+                key = self.wait_for_key(remaining - (display_seconds - 1))
+                if key == 'p':  # 按P键暂停
+                    self.handle_pause()
+                    last_display = None
+                elif key is None and metrics is not None:
+                    tick_time = self.deadline - (display_seconds - 1)  # 本次刷新的计划时刻
+                    metrics.observe("focus_timer_tick_lateness_seconds",
+                                    max(self.clock.monotonic() - tick_time, 0.0), phase=self.phase)
+                    metrics.maybe_write()
+        finally:
+            self.deadline = None
         
-        print()  # 换行
+        if self.renderer is not None:
+            self.renderer.end_status()
+        else:
+            print()  # 换行
         return True
     
-    def short_rest(self):
-        """短休息"""
+    def short_rest(self, remaining=None):
+        """短休息（remaining 不为 None 时表示从检查点继续，只倒计时剩余秒数）"""
         self.is_resting = True
+        self.phase = "short_rest"
         rest_time = self.short_rest_time
-        self.print_time_info(f"[REST] 开始{rest_time}秒休息时间...")
-        self.play_bell("short_rest")  # 小休息音效
+        if remaining is None:
+            self.print_time_info(f"[REST] 开始{rest_time}秒休息时间...")
+            self.emit("short_rest_start", seconds=rest_time)
+            self.play_bell("short_rest")  # 小休息音效
+        else:
+            rest_time = remaining
+            self.print_time_info(f"[RESUMED] 继续休息，剩余 {remaining:.0f} 秒")
+            self.emit("short_rest_start", seconds=remaining, resumed=True)
         
         if self.countdown(rest_time, "休息时间: "):
+            self.emit("short_rest_end")
             self.play_bell("work_start")  # 工作开始音效
             self.print_time_info("[FOCUS] 休息结束，继续专注！")
         
         self.is_resting = False
     
-    def long_rest(self):
-        """长休息"""
+    def long_rest(self, remaining=None):
+        """长休息（remaining 不为 None 时表示从检查点继续，只倒计时剩余秒数）"""
         self.is_resting = True
+        self.phase = "long_rest"
         rest_time = self.long_rest_time
-        if self.mode == "test":
-            self.print_time_info(f"[LONG REST] 开始{rest_time}秒大休息时间！")
+        if remaining is not None:
+            rest_time = remaining
+            self.print_time_info(f"[RESUMED] 继续大休息，剩余 {remaining:.0f} 秒")
+            self.emit("long_rest_start", seconds=remaining, resumed=True)
         else:
-            self.print_time_info(f"[LONG REST] 开始{rest_time//60}分钟大休息时间！")
-        self.play_bell("long_rest")  # 大休息音效
+            if self.mode == "test":
+                self.print_time_info(f"[LONG REST] 开始{rest_time}秒大休息时间！")
+            else:
+                self.print_time_info(f"[LONG REST] 开始{rest_time//60}分钟大休息时间！")
+            self.emit("long_rest_start", seconds=rest_time)
+            self.play_bell("long_rest")  # 大休息音效
         
         if self.countdown(rest_time, "大休息时间: "):
+            self.emit("long_rest_end")
             self.play_bell("work_start")  # 工作开始音效
             self.print_time_info("[NEW CYCLE] 大休息结束，开始新的专注循环！")
         
         self.is_resting = False
         self.total_focus_time = 0  # 重置累计时间
     
-    def focus_session(self):
-        """一次专注会话"""
-        focus_time = self.get_random_focus_time()
+    def focus_session(self, focus_time=None, remaining=None):
+        """一次专注会话（remaining 不为 None 时表示从检查点继续 focus_time 的剩余部分）"""
+        if remaining is None:
+            focus_time = self.get_random_focus_time()
+        self.focus_time = focus_time
+        self.phase = "focus"
         
-        if self.mode == "test":
-            self.print_time_info(f"[FOCUS] 开始 {focus_time} 秒专注时间")
-            countdown_seconds = focus_time
+        if remaining is not None:
+            self.print_time_info(f"[RESUMED] 继续 {focus_time} {'秒' if self.mode == 'test' else '分钟'}专注时间，"
+                                 f"剩余 {remaining:.0f} 秒")
+            countdown_seconds = remaining
+            self.emit("focus_start", focus_time=focus_time, seconds=remaining, resumed=True)
         else:
-            self.print_time_info(f"[FOCUS] 开始 {focus_time} 分钟专注时间")
-            countdown_seconds = focus_time * 60
+            if self.mode == "test":
+                self.print_time_info(f"[FOCUS] 开始 {focus_time} 秒专注时间")
+                countdown_seconds = focus_time
+            else:
+                self.print_time_info(f"[FOCUS] 开始 {focus_time} 分钟专注时间")
+                countdown_seconds = focus_time * 60
+            self.emit("focus_start", focus_time=focus_time, seconds=countdown_seconds)
+        long_rest_eta = self.next_phase_eta("long_rest")
+        if long_rest_eta is not None:
+            print(f"预计大休息开始: {long_rest_eta.strftime('%H:%M:%S')}")
         
         if self.countdown(countdown_seconds, "专注时间: "):
             self.total_focus_time += focus_time
+            self.emit("focus_end", total_focus_time=self.total_focus_time)
             if self.mode == "test":
                 self.print_time_info(f"[DONE] 专注时间结束！累计专注: {self.total_focus_time:.1f} 秒")
             else:
@@ -316,10 +579,26 @@ class FocusTimer:
             return True
         return False
     
-    def run(self):
-        """运行主程序"""
+    def run(self, max_duration=None):
+        """运行主程序
+
+        max_duration: 运行时长上限（秒），到达后在当前阶段结束时停止，用于模拟。
+        """
         self.is_running = True
-        self.session_start_time = datetime.now()
+        resume, self._resume = self._resume, None
+        if resume is None:
+            self.session_start_time = self.clock.now()
+            self._session_start_mono = self.clock.monotonic()
+        else:
+            # 从检查点继续：会话开始时间不变，经过时间包含进程停止的时间
+            self.session_start_time = datetime.fromtimestamp(resume["session_start"])
+            self._session_start_mono = self.clock.monotonic() - resume["elapsed"]
+        if max_duration is not None:
+            self.run_deadline = self._session_start_mono + max_duration
+        self.emit("session_start", mode=self.mode,
+                  start=self.session_start_time.strftime("%Y-%m-%d %H:%M:%S"), seed=self.seed,
+                  **({"resumed": True} if resume is not None else {}),
+                  **({"max_duration": max_duration} if max_duration is not None else {}))
         
         print("[START] 专注程序启动！")
         if self.mode != "test":
@@ -327,49 +606,98 @@ class FocusTimer:
             print("计时过程中按 P 键可以暂停/恢复")
         print("=" * 50)
         
-        cycle_count = 0  # 大周期计数器
+        # 计时期间由后台线程读取键盘，结束后恢复终端，菜单的 input() 不受影响
+        if not self.headless:
+            self.keyboard = KeyboardInput()
+            self.keyboard.start()
         
         try:
-            while self.is_running:
-                # 检查是否需要长休息
-                if self.total_focus_time >= self.max_focus_time:
-                    cycle_count += 1
-                    if self.mode == "test":
-                        print(f"\n[CYCLE] 完成第 {cycle_count} 个大周期")
-                    self.long_rest()
-                    
-                    # 测试模式下，完成2个大周期后自动停止
-                    if self.mode == "test" and cycle_count >= 2:
-                        print(f"\n[SUCCESS] 测试完成！成功完成 {cycle_count} 个大周期")
+            try:
+                if resume is not None and not self._continue_phase(resume):
+                    self.is_running = False
+                while self.is_running:
+                    if self.run_deadline is not None and self.clock.monotonic() >= self.run_deadline:
                         break
-                    continue
                 
-                # 进行专注会话
-                if self.focus_session():
-                    # 专注完成后进行短休息
-                    self.short_rest()
-                else:
-                    # 用户中断了专注
-                    break
+                    # 检查是否需要长休息
+                    if self.total_focus_time >= self.max_focus_time:
+                        self.cycle_count += 1
+                        self.emit("cycle", cycle=self.cycle_count)
+                        if self.mode == "test":
+                            print(f"\n[CYCLE] 完成第 {self.cycle_count} 个大周期")
+                        self.long_rest()
                     
+                        # 测试模式下，完成2个大周期后自动停止
+                        if self.test_finished():
+                            break
+                        continue
+                
+                    # 进行专注会话
+                    if self.focus_session():
+                        # 专注完成后进行短休息
+                        self.short_rest()
+                    else:
+                        # 用户中断了专注
+                        break
+            finally:
+                if self.keyboard is not None:
+                    self.keyboard.stop()
+                    self.keyboard = None
         except KeyboardInterrupt:
             self.stop()
         
+        self.is_running = False
+        self.emit("session_end", cycles=self.cycle_count, total_focus_time=self.total_focus_time,
+                  total_pause_time=self.total_pause_time)
+        if self.checkpoint is not None:
+            try:
+                self.checkpoint.clear(0)  # 会话已正常结束，不再需要恢复
+            except Exception as e:
+                print(f"[WARNING] 清除检查点失败: {e}")
+        if self.metrics is not None:
+            self.metrics.write()
         if self.mode == "test":
-            print(f"[END] 测试结束，共完成 {cycle_count} 个大周期")
+            print(f"[END] 测试结束，共完成 {self.cycle_count} 个大周期")
+    
+    def test_finished(self):
+        """测试模式完成 2 个大周期后自动停止"""
+        if self.mode == "test" and self.cycle_count >= 2:
+            print(f"\n[SUCCESS] 测试完成！成功完成 {self.cycle_count} 个大周期")
+            return True
+        return False
+    
+    def _continue_phase(self, state):
+        """继续检查点中被中断的阶段，返回是否进入正常循环"""
+        # 按同一种子重新生成的计划在同一阶段下标处对齐，之后的专注时长与中断前的计划一致
+        self.plan.restore(state["phase_index"], self.elapsed_seconds(), state["remaining"])
+        self._pause_on_start = state["paused"]
+        phase = state["phase"]
+        if phase == "focus":
+            if not self.focus_session(state["focus_time"], state["remaining"]):
+                return False
+            self.short_rest()
+        elif phase == "short_rest":
+            self.short_rest(state["remaining"])
+        elif phase == "long_rest":
+            self.long_rest(state["remaining"])
+            if self.test_finished():
+                return False
+        return True
     
     def stop(self):
         """停止程序"""
+        if self.is_running:
+            self.emit("stop")  # 用户中断的时刻（之后的会话报告和菜单等待不计入）
         self.is_running = False
         if self.session_start_time:
             # 如果当前处于暂停状态，结束暂停计时
-            if self.is_paused and self.pause_start_time:
-                pause_duration = time.time() - self.pause_start_time
+            if self.is_paused and self.pause_start_time is not None:
+                pause_duration = self.clock.monotonic() - self.pause_start_time
                 self.total_pause_time += pause_duration
                 self.is_paused = False
                 self.pause_start_time = None
             
-            total_session_time = datetime.now() - self.session_start_time
+            total_session_time = self.clock.now() - self.session_start_time
             hours, remainder = divmod(total_session_time.seconds, 3600)
             minutes, seconds = divmod(remainder, 60)
             
@@ -383,7 +711,8 @@ class FocusTimer:
             else:
                 print(f"   累计专注: {self.total_focus_time:.1f} 分钟")
             
-            self.ask_for_next_action()
+            if not self.headless:
+                self.ask_for_next_action()
 
     def ask_for_next_action(self):
         """询问用户下一步操作"""
@@ -413,6 +742,216 @@ class FocusTimer:
                 print("\n[BYE] 程序已退出")
                 break
 
+def simulate(mode="default", custom_settings=None, duration_seconds=24 * 3600, start_time=None, seed=None):
+    """无界面模拟：用虚拟时钟快速跑完一段时间的专注/休息循环，返回计时器
+
+    不播放音效、不读取键盘，控制台输出被丢弃，完整的事件时间线保存在 timer.events 中。
+    使用相同的 seed 时时间线逐位相同。
+    """
+    clock = VirtualClock(start_time)
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer = FocusTimer(mode=mode, custom_settings=custom_settings, clock=clock, headless=True,
+                           seed=seed)
+        timer.run(max_duration=duration_seconds)
+        timer.stop()
+    return timer
+
+def format_event(record):
+    """把一条事件格式化为一行文本"""
+    hours, remainder = divmod(int(record["t"]), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    details = " ".join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                       for key, value in record.items() if key not in ("t", "event"))
+    return f"[+{hours:02d}:{minutes:02d}:{seconds:02d}] {record['event']} {details}".rstrip()
+
+def run_simulation(args):
+    """命令行模拟入口"""
+    custom_settings = None
+    mode = args.mode
+    if args.config:
+        custom_settings = ConfigManager().get_config(args.config)
+        if custom_settings is None:
+            print(f"[ERROR] 未找到配置 '{args.config}'")
+            return 1
+        mode = "custom"
+    
+    start = time.perf_counter()
+    timer = simulate(mode, custom_settings, duration_seconds=args.hours * 3600, seed=args.seed)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    for record in timer.events:
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+        else:
+            print(format_event(record))
+    
+    if not args.json:
+        focus_count = sum(1 for record in timer.events if record["event"] == "focus_end")
+        print("-" * 50)
+        print(f"[SIMULATE] 模拟 {args.hours} 小时，耗时 {elapsed_ms:.1f} ms")
+        print(f"   完成专注: {focus_count} 次")
+        print(f"   完成大周期: {timer.cycle_count} 个")
+        print(f"   事件总数: {len(timer.events)}")
+        print(f"   随机种子: {timer.seed}")
+    return 0
+
+def run_dashboard(args):
+    """命令行仪表盘入口：一个线程驱动多个计时器，终端上每秒刷新一次"""
+    from renderer import Dashboard, format_timer_row
+    from scheduler import TimerScheduler
+    custom_settings = None
+    mode = args.mode
+    if args.config:
+        custom_settings = ConfigManager().get_config(args.config)
+        if custom_settings is None:
+            print(f"[ERROR] 未找到配置 '{args.config}'")
+            return 1
+        mode = "custom"
+    
+    dashboard = Dashboard()
+    on_event = None
+    if not dashboard.is_tty:
+        # 不是终端时退化为逐行输出阶段事件
+        def on_event(timer_id, record):
+            if record["event"] not in ("focus_end", "short_rest_end", "long_rest_end"):
+                print(f"{format_event(record)} #{timer_id}", flush=True)
+    seed = args.seed if args.seed is not None else (custom_settings or {}).get("seed")
+    # 退出仪表盘时计时器状态留在检查点中，下次用 --resume 接着运行
+    checkpoint = CheckpointFile(DASHBOARD_CHECKPOINT_FILE, slots=args.dashboard)
+    if not args.resume:
+        checkpoint.reset()
+    scheduler = TimerScheduler(on_event=on_event, seed=seed, checkpoint=checkpoint)
+    restored = scheduler.restore() if args.resume else []
+    if restored:
+        print(f"[RECOVERY] 已从检查点恢复 {len(restored)} 个计时器")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.dashboard - len(restored)):
+            scheduler.add(mode=mode, custom_settings=custom_settings, config_name=args.config)
+    worker = threading.Thread(target=scheduler.run, daemon=True)
+    worker.start()
+    
+    dashboard.start()
+    try:
+        while worker.is_alive():
+            now = datetime.now().strftime("%H:%M:%S")
+            states = scheduler.snapshot()
+            header = f"[{now}] 专注计时器仪表盘 - {len(states)} 个计时器（Ctrl+C 退出）"
+            dashboard.render([header, "-" * 50] + [format_timer_row(state) for state in states])
+            worker.join(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.shutdown()
+        worker.join(1.0)
+        checkpoint.close()
+        dashboard.stop()
+    return 0
+
+def parse_args(argv=None):
+    """解析命令行参数，不带参数时进入交互菜单"""
+    import argparse  # 只在入口处使用，不计入模块导入时间
+    parser = argparse.ArgumentParser(description="专注计时器")
+    parser.add_argument("--simulate", action="store_true", help="无界面模拟，输出完整事件时间线")
+    parser.add_argument("--mode", choices=["default", "test"], default="default", help="模拟或仪表盘使用的模式")
+    parser.add_argument("--config", help="模拟或仪表盘使用的已保存配置名称")
+    parser.add_argument("--hours", type=float, default=24, help="模拟时长（小时）")
+    parser.add_argument("--seed", type=int, help="模拟或仪表盘使用的随机种子，用于重放会话")
+    parser.add_argument("--json", action="store_true", help="以 JSON Lines 输出时间线")
+    parser.add_argument("--report", action="store_true", help="输出专注历史统计报告")
+    parser.add_argument("--since", help="报告起始月份（YYYY-MM）")
+    parser.add_argument("--until", help="报告结束月份（YYYY-MM）")
+    parser.add_argument("--user", help="只统计指定用户")
+    parser.add_argument("--dashboard", type=int, metavar="N", help="仪表盘模式：同时运行 N 个计时器")
+    parser.add_argument("--metrics", metavar="PATH", help="把计时延迟等指标以 Prometheus 文本格式定期写入文件")
+    parser.add_argument("--record", metavar="DIR", help="把每次会话的完整事件流录制到目录中")
+    parser.add_argument("--replay", nargs="+", metavar="PATH", help="回放录制文件（或目录）并校验阶段时间线")
+    parser.add_argument("--speed", type=float, help="回放倍速，默认尽可能快")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="回放校验允许的时间误差（秒）")
+    parser.add_argument("--resume", action="store_true", help="从检查点继续上次意外中断的计时")
+    parser.add_argument("--status", nargs="?", const=DEFAULT_STATUS_NAME, metavar="NAME",
+                        help="显示正在运行的计时器的实时状态（读取共享内存）")
+    parser.add_argument("--watch", action="store_true", help="与 --status 一起使用：持续刷新并显示新事件")
+    parser.add_argument("--no-publish", action="store_true", help="不把实时状态发布到共享内存")
+    parser.add_argument("--notify-log", metavar="PATH", help="把阶段切换等通知追加到日志文件")
+    parser.add_argument("--notify-webhook", metavar="URL", help="把通知以 JSON POST 到 URL（如本地转发服务）")
+    parser.add_argument("--notify-desktop", action="store_true", help="弹出桌面通知（需要 plyer）")
+    parser.add_argument("--serve", action="store_true", help="启动本地 HTTP 控制与事件流服务")
+    parser.add_argument("--host", default="127.0.0.1", help="服务监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="服务监听端口")
+    return parser.parse_args(argv)
+
+def report_recovered_sessions(journal):
+    """打印上次意外中断的会话统计，并在日志中把它们标记为已结束"""
+    for session in journal.recover():
+        hours, remainder = divmod(int(session["last_t"]), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        unit = "秒" if session["mode"] == "test" else "分钟"
+        print(f"\n[RECOVERY] 发现上次意外中断的会话（开始于 {session['start']}）:")
+        print(f"   总时长: {hours:02d}:{minutes:02d}:{seconds:02d}")
+        if session["total_pause_time"] > 0:
+            pause_mins, pause_secs = divmod(int(session["total_pause_time"]), 60)
+            print(f"   暂停时长: {pause_mins:02d}:{pause_secs:02d}")
+        print(f"   累计专注: {session['total_focus_time']:.1f} {unit}")
+        print(f"   完成大周期: {session['cycle_count']} 个")
+        if session.get("seed") is not None:
+            print(f"   随机种子: {session['seed']}")
+        journal.append(session["timer_id"], {"t": session["last_t"], "event": "session_end",
+                                             "recovered": True})
+    journal.compact()
+
+def build_notifier(args, metrics=None):
+    """按命令行参数创建通知分发，没有任何通知目标时返回 None"""
+    if not (args.notify_log or args.notify_webhook or args.notify_desktop):
+        return None
+    from notify import DesktopSink, LogSink, NotificationHub, WebhookSink  # 只在启用通知时导入
+    hub = NotificationHub(metrics=metrics)
+    if args.notify_log:
+        try:
+            hub.add_sink(LogSink(args.notify_log), policy="block")  # 日志尽量不丢
+        except Exception as e:
+            print(f"[WARNING] 无法打开通知日志 {args.notify_log}: {e}")
+    if args.notify_webhook:
+        hub.add_sink(WebhookSink(args.notify_webhook), batch_size=32, timeout=2.0)
+    if args.notify_desktop:
+        try:
+            import plyer  # noqa: F401
+            hub.add_sink(DesktopSink(), capacity=8)
+        except ImportError:
+            print("[WARNING] 未安装 plyer，桌面通知不可用（pip install plyer）")
+    return hub
+
+def resume_from_checkpoint(checkpoint, journal=None, history=None, metrics=None, recorder=None,
+                           notifier=None, publisher=None):
+    """从检查点恢复上次中断的计时并运行，返回计时器；没有可恢复的状态时返回 None"""
+    state = checkpoint.read(0)
+    if state is None:
+        print("[INFO] 没有可恢复的检查点")
+        return None
+    custom_settings = None
+    config_name = state["config_name"]
+    if state["mode"] == "custom":
+        # 计时参数以检查点为准（保证计划一致），音效沿用仍然存在的已保存配置
+        custom_settings = dict(state["settings"])
+        config_manager = ConfigManager()
+        if config_name and not config_manager.has_config(config_name):
+            # 过长的名称在检查点中被截断，按截断后的样子找回原配置
+            matches = [name for name in config_manager.list_configs()
+                       if name != config_name and stored_name(name) == config_name]
+            if len(matches) == 1:
+                config_name = matches[0]
+        if config_name and config_manager.has_config(config_name):
+            custom_settings["sounds"] = config_manager.get_config(config_name).get("sounds", {})
+        elif config_name:
+            print(f"[WARNING] 找不到配置 '{config_name}'，使用检查点中的计时参数和默认音效")
+    saved = datetime.fromtimestamp(state["wall_time"]).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[RECOVERY] 从 {saved} 的检查点继续: {state['phase']} 阶段剩余 {state['remaining']:.0f} 秒")
+    timer = FocusTimer(mode=state["mode"], custom_settings=custom_settings, journal=journal, history=history,
+                       metrics=metrics, seed=state["seed"], recorder=recorder, checkpoint=checkpoint,
+                       config_name=config_name, notifier=notifier, publisher=publisher)
+    timer.restore_checkpoint(state)
+    timer.run()
+    return timer
+
 def show_menu():
     """显示主菜单"""
     print("\n" + "="*60)
@@ -525,6 +1064,10 @@ def get_custom_settings():
                 std_input = input(f"设置标准差（分钟，默认0.8）: ").strip()
                 if std_input:
                     custom_settings["focus_std"] = float(std_input)
+                    if custom_settings["focus_std"] < 0:
+                        raise ValueError(std_input)
+                    if custom_settings["focus_std"] == 0:
+                        print("[INFO] 标准差为0，每次专注时长固定为均值")
                 else:
                     custom_settings["focus_std"] = 0.8
             except ValueError:
@@ -534,6 +1077,17 @@ def get_custom_settings():
         else:
             print("[ERROR] 无效选择，请输入 1 或 2")
     
+    # 固定随机种子后每次会话的专注时长序列都相同，便于复现和调试
+    seed_input = input("随机种子（整数，留空表示每次会话随机）: ").strip()
+    if seed_input:
+        try:
+            custom_settings["seed"] = int(seed_input)
+            if custom_settings["seed"] < 0:
+                raise ValueError(seed_input)
+        except ValueError:
+            custom_settings.pop("seed", None)
+            print("[WARNING] 输入无效，每次会话使用新的随机种子")
+    
     # 设置音效文件路径
     print("\n[SOUND] 音效设置（输入音频文件路径，支持mp3/wav格式）")
     sounds = {}
@@ -559,6 +1113,8 @@ def get_custom_settings():
     if custom_settings['focus_distribution'] == 'normal':
         print(f"   正态分布均值: {custom_settings['focus_mean']:.1f} 分钟")
         print(f"   正态分布标准差: {custom_settings['focus_std']:.1f} 分钟")
+    if custom_settings.get('seed') is not None:
+        print(f"   随机种子: {custom_settings['seed']}")
     print(f"   工作开始音效: {sounds['work_start']}")
     print(f"   短休息音效: {sounds['short_rest']}")
     print(f"   长休息音效: {sounds['long_rest']}")
@@ -579,7 +1135,7 @@ def get_custom_settings():
                 continue
             
             # 检查是否已存在同名配置
-            if config_name in config_manager.list_configs():
+            if config_manager.has_config(config_name):
                 overwrite = input(f"配置 '{config_name}' 已存在，是否覆盖？(y/n): ").strip().lower()
                 if overwrite != 'y' and overwrite != 'yes':
                     continue
@@ -596,7 +1152,7 @@ def get_custom_settings():
 def show_custom_mode_menu():
     """显示自定义模式菜单"""
     config_manager = ConfigManager()
-    saved_configs = config_manager.list_configs()
+    saved_configs = config_manager.count_configs() > 0
     
     print("\n" + "="*60)
     print(">>> 自定义模式选择 <<<")
@@ -626,36 +1182,61 @@ def show_custom_mode_menu():
         except KeyboardInterrupt:
             return "0"
 
+def print_config_page(config_manager, offset, total, width):
+    """打印一页已保存的配置（编号全局连续），并提示翻页操作"""
+    summaries = config_manager.list_config_summaries(offset, CONFIG_PAGE_SIZE)
+    for i, (config_name, saved_time) in enumerate(summaries, offset + 1):
+        print(f"{i}. {config_name} (保存时间: {saved_time or '未知时间'})")
+    
+    print("0. 返回上级菜单")
+    print("-" * width)
+    if total > CONFIG_PAGE_SIZE:
+        page = offset // CONFIG_PAGE_SIZE + 1
+        pages = (total + CONFIG_PAGE_SIZE - 1) // CONFIG_PAGE_SIZE
+        print(f"第 {page}/{pages} 页，共 {total} 个配置；输入 n 下一页，b 上一页")
+
+def turn_config_page(choice, offset, total):
+    """处理翻页输入，返回新的偏移量；不是翻页命令时返回 None"""
+    if choice == "n" and offset + CONFIG_PAGE_SIZE < total:
+        return offset + CONFIG_PAGE_SIZE
+    if choice == "b" and offset > 0:
+        return offset - CONFIG_PAGE_SIZE
+    return None
+
 def load_saved_config():
-    """加载已保存的配置"""
+    """加载已保存的配置，返回 (配置名称, 配置)；取消时返回 (None, None)"""
     config_manager = ConfigManager()
-    saved_configs = config_manager.list_configs()
+    total = config_manager.count_configs()
     
-    if not saved_configs:
+    if not total:
         print("\n[INFO] 暂无已保存的配置")
-        return None
-    
-    print("\n[SAVED CONFIGS] 已保存的配置:")
-    print("-" * 50)
-    for i, config_name in enumerate(saved_configs, 1):
-        config = config_manager.get_config(config_name)
-        saved_time = config.get('saved_time', '未知时间')
-        print(f"{i}. {config_name} (保存时间: {saved_time})")
-    
-    print("0. 返回上级菜单")
-    print("-" * 50)
+        return None, None
     
+    offset = 0
+    show_page = True
     while True:
+        if show_page:
+            print("\n[SAVED CONFIGS] 已保存的配置:")
+            print("-" * 50)
+            print_config_page(config_manager, offset, total, 50)
+            show_page = False
+        
         try:
-            choice = input(f"\n请选择配置 (0-{len(saved_configs)}): ").strip()
+            choice = input(f"\n请选择配置 (0-{total}): ").strip().lower()
             
             if choice == "0":
-                return None
+                return None, None
+            
+            new_offset = turn_config_page(choice, offset, total)
+            if new_offset is not None:
+                offset = new_offset
+                show_page = True
+                continue
             
             try:
                 choice_idx = int(choice) - 1
-                if 0 <= choice_idx < len(saved_configs):
-                    config_name = saved_configs[choice_idx]
+                if 0 <= choice_idx < total:
+                    config_name = config_manager.list_configs(choice_idx, 1)[0]
                     config = config_manager.get_config(config_name)
                     
                     # 显示配置详情
@@ -668,6 +1249,8 @@ def load_saved_config():
                     if config.get('focus_distribution') == 'normal':
                         print(f"   正态分布均值: {config.get('focus_mean', 4.0):.1f} 分钟")
                         print(f"   正态分布标准差: {config.get('focus_std', 0.8):.1f} 分钟")
+                    if config.get('seed') is not None:
+                        print(f"   随机种子: {config['seed']}")
                     sounds = config.get('sounds', {})
                     print(f"   工作开始音效: {sounds.get('work_start', 'work.mp3')}")
                     print(f"   短休息音效: {sounds.get('short_rest', 'small_rest.mp3')}")
@@ -677,58 +1260,61 @@ def load_saved_config():
                     confirm = input(f"\n确认加载配置 '{config_name}'？(y/n，默认y): ").strip().lower()
                     if confirm != 'n' and confirm != 'no':
                         print(f"[SUCCESS] 已加载配置 '{config_name}'")
-                        return config
-                    return None
+                        return config_name, config
+                    return None, None
                 else:
                     print("[ERROR] 无效选择，请重新输入")
             except ValueError:
                 print("[ERROR] 请输入有效数字")
                 
         except KeyboardInterrupt:
-            return None
+            return None, None
 
 def manage_saved_configs():
     """管理已保存的配置"""
     config_manager = ConfigManager()
-    saved_configs = config_manager.list_configs()
+    total = config_manager.count_configs()
     
-    if not saved_configs:
+    if not total:
         print("\n[INFO] 暂无已保存的配置")
         time.sleep(1)
         return
     
+    offset = 0
     while True:
         print("\n[CONFIG MANAGEMENT] 配置管理")
         print("-" * 40)
-        for i, config_name in enumerate(saved_configs, 1):
-            config = config_manager.get_config(config_name)
-            saved_time = config.get('saved_time', '未知时间')
-            print(f"{i}. {config_name} (保存时间: {saved_time})")
-        
-        print("0. 返回上级菜单")
-        print("-" * 40)
+        print_config_page(config_manager, offset, total, 40)
         print("操作说明：输入数字查看详情，输入 'd数字' 删除配置（如：d1）")
         
         try:
-            choice = input(f"\n请选择操作 (0-{len(saved_configs)} 或 d1-d{len(saved_configs)}): ").strip().lower()
+            choice = input(f"\n请选择操作 (0-{total} 或 d1-d{total}): ").strip().lower()
             
             if choice == "0":
                 break
             
+            new_offset = turn_config_page(choice, offset, total)
+            if new_offset is not None:
+                offset = new_offset
+                continue
+            
             # 删除操作
             if choice.startswith('d') and len(choice) > 1:
                 try:
                     del_idx = int(choice[1:]) - 1
-                    if 0 <= del_idx < len(saved_configs):
-                        config_name = saved_configs[del_idx]
+                    if 0 <= del_idx < total:
+                        config_name = config_manager.list_configs(del_idx, 1)[0]
                         confirm = input(f"确认删除配置 '{config_name}'？(y/n): ").strip().lower()
                         if confirm == 'y' or confirm == 'yes':
                             if config_manager.delete_config(config_name):
                                 print(f"[SUCCESS] 配置 '{config_name}' 已删除")
-                                saved_configs = config_manager.list_configs()
-                                if not saved_configs:
+                                total = config_manager.count_configs()
+                                if not total:
                                     print("[INFO] 所有配置已删除，返回上级菜单")
                                     break
+                                # 删除最后一页的最后一项后回到上一页
+                                if offset >= total:
+                                    offset -= CONFIG_PAGE_SIZE
                             else:
                                 print(f"[ERROR] 删除配置 '{config_name}' 失败")
                     else:
@@ -740,8 +1326,8 @@ def manage_saved_configs():
             # 查看详情操作
             try:
                 choice_idx = int(choice) - 1
-                if 0 <= choice_idx < len(saved_configs):
-                    config_name = saved_configs[choice_idx]
+                if 0 <= choice_idx < total:
+                    config_name = config_manager.list_configs(choice_idx, 1)[0]
                     config = config_manager.get_config(config_name)
                     
                     print(f"\n[CONFIG DETAILS] 配置 '{config_name}' 详情:")
@@ -753,6 +1339,8 @@ def manage_saved_configs():
                     if config.get('focus_distribution') == 'normal':
                         print(f"   正态分布均值: {config.get('focus_mean', 4.0):.1f} 分钟")
                         print(f"   正态分布标准差: {config.get('focus_std', 0.8):.1f} 分钟")
+                    if config.get('seed') is not None:
+                        print(f"   随机种子: {config['seed']}")
                     sounds = config.get('sounds', {})
                     print(f"   工作开始音效: {sounds.get('work_start', 'work.mp3')}")
                     print(f"   短休息音效: {sounds.get('short_rest', 'small_rest.mp3')}")
@@ -768,7 +1356,75 @@ def manage_saved_configs():
         except KeyboardInterrupt:
             break
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    if args.simulate:
+        return run_simulation(args)
+    if args.report:
+        print_report(HistoryStore(HISTORY_DIR), args.since, args.until, args.user)
+        return 0
+    if args.dashboard:
+        return run_dashboard(args)
+    if args.replay:
+        from replay import run_replay
+        return run_replay(args)
+    if args.status:
+        from shared_state import run_status
+        return run_status(args)
+    if args.serve:
+        from server import serve  # 服务模式才需要 asyncio
+        serve(args.host, args.port)
+        return 0
+    
+    metrics = None
+    if args.metrics:
+        from metrics import Metrics  # 只在启用指标时导入
+        metrics = Metrics(args.metrics)
+    recorder = None
+    if args.record:
+        from replay import SessionRecorder
+        recorder = SessionRecorder(args.record)
+    journal = Journal(JOURNAL_FILE)
+    notifier = build_notifier(args, metrics)
+    publisher = None
+    if not args.no_publish:
+        try:
+            from shared_state import StatePublisher
+            publisher = StatePublisher()
+            if publisher.name != DEFAULT_STATUS_NAME:
+                print(f"[INFO] 实时状态发布在共享内存 {publisher.name}（--status {publisher.name} 查看）")
+        except Exception as e:
+            print(f"[WARNING] 无法创建实时状态共享内存: {e}")
+    checkpoint = None
+    try:
+        checkpoint = CheckpointFile(CHECKPOINT_FILE)
+    except Exception as e:
+        print(f"[WARNING] 无法打开检查点文件，本次不写检查点: {e}")
+    try:
+        report_recovered_sessions(journal)
+        history = HistoryStore(HISTORY_DIR)
+        if args.resume and checkpoint is not None:
+            timer = resume_from_checkpoint(checkpoint, journal, history, metrics, recorder, notifier,
+                                           publisher)
+            if timer is not None and not timer.should_return_to_menu:
+                return 0
+        elif checkpoint is not None and checkpoint.read(0) is not None:
+            print("[RECOVERY] 上次计时意外中断，可使用 --resume 从中断处继续")
+        run_menu(journal, history, metrics, recorder, checkpoint, notifier, publisher)
+    finally:
+        journal.close()
+        if publisher is not None:
+            publisher.close()
+        if notifier is not None:
+            from notify import print_notify_stats
+            notifier.close()
+            print_notify_stats(notifier)
+        if checkpoint is not None:
+            checkpoint.close()
+
+def run_menu(journal=None, history=None, metrics=None, recorder=None, checkpoint=None, notifier=None,
+             publisher=None):
+    """交互式主菜单"""
     while True:
         show_menu()
         
@@ -780,14 +1436,18 @@ def main():
                 break
             elif choice == "1":
                 # 默认模式
-                timer = FocusTimer(mode="default")
+                timer = FocusTimer(mode="default", journal=journal, history=history, metrics=metrics,
+                                   recorder=recorder, checkpoint=checkpoint, notifier=notifier,
+                                   publisher=publisher)
                 timer.run()
                 # 检查是否需要返回主菜单
                 if not timer.should_return_to_menu:
                     break
             elif choice == "2":
                 # 测试模式
-                timer = FocusTimer(mode="test")
+                timer = FocusTimer(mode="test", journal=journal, history=history, metrics=metrics,
+                                   recorder=recorder, checkpoint=checkpoint, notifier=notifier,
+                                   publisher=publisher)
                 timer.run()
                 # 检查是否需要返回主菜单
                 if not timer.should_return_to_menu:
@@ -804,7 +1464,10 @@ def main():
                         # 创建新的自定义配置
                         custom_settings = get_custom_settings()
                         if custom_settings:
-                            timer = FocusTimer(mode="custom", custom_settings=custom_settings)
+                            timer = FocusTimer(mode="custom", custom_settings=custom_settings,
+                                               journal=journal, history=history, metrics=metrics,
+                                               recorder=recorder, checkpoint=checkpoint, notifier=notifier,
+                                               publisher=publisher)
                             timer.run()
                             # 检查是否需要返回主菜单
                             if not timer.should_return_to_menu:
@@ -812,9 +1475,13 @@ def main():
                         break  # 返回主菜单
                     elif custom_choice == "2":
                         # 加载已保存的配置
-                        loaded_config = load_saved_config()
+                        config_name, loaded_config = load_saved_config()
                         if loaded_config:
-                            timer = FocusTimer(mode="custom", custom_settings=loaded_config)
+                            timer = FocusTimer(mode="custom", custom_settings=loaded_config,
+                                               journal=journal, history=history, metrics=metrics,
+                                               recorder=recorder, checkpoint=checkpoint,
+                                               config_name=config_name, notifier=notifier,
+                                               publisher=publisher)
                             timer.run()
                             # 检查是否需要返回主菜单
                             if not timer.should_return_to_menu:
@@ -835,4 +1502,4 @@ def main():
             time.sleep(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
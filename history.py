@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+np = None  # NumPy 在第一次读写历史时才导入
+
+KIND_CODES = {"focus": 0, "short_rest": 1, "long_rest": 2}
+KIND_NAMES = {code: name for name, code in KIND_CODES.items()}
+DISTRIBUTION_CODES = {"uniform": 0, "normal": 1}
+DISTRIBUTION_NAMES = {code: name for name, code in DISTRIBUTION_CODES.items()}
+
+
+def _numpy():
+    """按需导入 NumPy"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def interval_dtype():
+    """历史区间的定长记录格式（每条 24 字节）"""
+    _numpy()
+    return np.dtype([
+        ("start", "<f8"),         # 开始时间（Unix 秒）
+        ("duration", "<f4"),      # 实际计时时长（秒，不含暂停）
+        ("paused", "<f4"),        # 区间内暂停时长（秒）
+        ("user", "<u4"),          # 用户编号
+        ("kind", "u1"),           # 0 专注 / 1 短休息 / 2 大休息
+        ("distribution", "u1"),   # 专注时长分布：0 均匀 / 1 正态
+        ("completed", "u1"),      # 是否完整结束（未被中途停止）
+        ("_pad", "u1"),
+    ])
+
+
+class HistoryStore:
+    """列式会话历史：已完成的专注/休息区间按月分区存为定长二进制文件
+
+    每个月一个文件（如 2026-10.bin），追加写入；查询时用 np.memmap 映射，
+    聚合全部用向量化运算完成，不需要解析文本日志。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._users_file = os.path.join(directory, "users.json")
+        self._users = self._load_users()
+        self._lock = threading.Lock()
+
+    def _load_users(self):
+        """加载用户名到编号的映射"""
+        try:
+            with open(self._users_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def user_id(self, name):
+        """获取用户编号，新用户自动分配"""
+        with self._lock:
+            if name not in self._users:
+                self._users[name] = len(self._users)
+                tmp_path = self._users_file + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._users, f, ensure_ascii=False)
+                os.replace(tmp_path, self._users_file)
+            return self._users[name]
+
+    def partition_path(self, month):
+        """月份分区文件路径，month 形如 '2026-10'"""
+        return os.path.join(self.directory, f"{month}.bin")
+
+    def append(self, rows):
+        """追加区间记录（结构化数组），按开始时间所在月份写入对应分区"""
+        dtype = interval_dtype()
+        rows = np.asarray(rows, dtype=dtype)
+        months = [datetime.fromtimestamp(start).strftime("%Y-%m") for start in rows["start"]]
+        with self._lock:
+            for month in sorted(set(months)):
+                mask = np.array([m == month for m in months])
+                with open(self.partition_path(month), "ab") as f:
+                    f.write(rows[mask].tobytes())
+
+    def months(self):
+        """已有数据的月份列表（升序）"""
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".bin"))
+
+    def load(self, since=None, until=None, user=None):
+        """映射 [since, until] 月份范围内的分区并合并为一个结构化数组"""
+        dtype = interval_dtype()
+        parts = []
+        for month in self.months():
+            if (since and month < since) or (until and month > until):
+                continue
+            path = self.partition_path(month)
+            count = os.path.getsize(path) // dtype.itemsize
+            if count:
+                parts.append(np.memmap(path, dtype=dtype, mode="r", shape=(count,)))
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        rows = np.concatenate(parts) if len(parts) > 1 else np.asarray(parts[0])
+        if user is not None:
+            uid = self._users.get(user)
+            rows = rows[rows["user"] == uid] if uid is not None else rows[:0]
+        return rows
+
+    def attach(self, timer, user=None):
+        """订阅计时器事件，区间结束时写入历史"""
+        recorder = HistoryRecorder(self, timer, user)
+        timer.event_listeners.append(recorder.on_event)
+        return recorder
+
+
+class HistoryRecorder:
+    """把计时器事件流转换为历史区间记录"""
+
+    def __init__(self, store, timer, user=None):
+        self.store = store
+        self.timer = timer
+        self.user = store.user_id(user or _default_user())
+        self.distribution = DISTRIBUTION_CODES.get(timer.focus_distribution, 0)
+        self._kind = None
+        self._start_t = None
+        self._paused = 0.0
+        self._pause_t = None
+
+    def on_event(self, record):
+        """处理一条计时器事件"""
+        event = record["event"]
+        t = record["t"]
+        if event == "focus_start":
+            self._begin("focus", t)
+        elif event in ("short_rest_start", "long_rest_start"):
+            self._begin(event[:-len("_start")], t)
+        elif event == "pause":
+            self._pause_t = t
+        elif event == "resume" and self._pause_t is not None:
+            self._paused += t - self._pause_t
+            self._pause_t = None
+        elif event in ("focus_end", "short_rest_end", "long_rest_end"):
+            self._finish(t, completed=True)
+        elif event in ("stop", "session_end"):
+            self._finish(t, completed=False)  # 用户中断时区间在 stop 处结束，不含之后的菜单等待
+
+    def _begin(self, kind, t):
+        self._kind = kind
+        self._start_t = t
+        self._paused = 0.0
+        self._pause_t = None
+
+    def _finish(self, t, completed):
+        """结束当前区间并写入历史"""
+        if self._kind is None:
+            return
+        if self._pause_t is not None:
+            self._paused += t - self._pause_t
+        session_start = self.timer.session_start_time.timestamp()
+        dtype = interval_dtype()
+        row = np.zeros(1, dtype=dtype)
+        row["start"] = session_start + self._start_t
+        row["duration"] = t - self._start_t - self._paused
+        row["paused"] = self._paused
+        row["user"] = self.user
+        row["kind"] = KIND_CODES[self._kind]
+        row["distribution"] = self.distribution
+        row["completed"] = completed
+        try:
+            self.store.append(row)
+        except Exception as e:
+            print(f"[WARNING] 写入历史记录失败: {e}")
+        self._kind = None
+
+
+def _default_user():
+    """当前系统用户名"""
+    try:
+        import getpass
+        return getpass.getuser()
+    except Exception:
+        return "default"
+
+
+def _utc_offsets(start, end):
+    """本地时区在 [start, end] 内的 UTC 偏移，返回 (生效时刻数组, 偏移秒数数组)
+
+    每天探测一次偏移，相邻两天不同时按刻钟二分出切换时刻（时区切换都发生在整刻钟）。
+    """
+    def offset(quarter):
+        return datetime.fromtimestamp(quarter * 900, timezone.utc).astimezone().utcoffset().total_seconds()
+
+    first = int(start // 86400) * 96  # 以刻钟为单位，一天 96 刻
+    last = (int(end // 86400) + 1) * 96
+    times, offsets = [first], [offset(first)]
+    for day in range(first + 96, last + 1, 96):
+        value = offset(day)
+        if value == offsets[-1]:
+            continue
+        low, high = day - 96, day  # low 处为旧偏移，high 处为新偏移
+        while high - low > 1:
+            middle = (low + high) // 2
+            if offset(middle) == value:
+                high = middle
+            else:
+                low = middle
+        times.append(high)
+        offsets.append(value)
+    return np.array(times, dtype=np.float64) * 900, np.array(offsets)
+
+
+def focus_minutes_per_day(rows):
+    """每天的专注分钟数，返回 (日期数组, 分钟数组)"""
+    focus = rows[rows["kind"] == KIND_CODES["focus"]]
+    if not len(focus):
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0)
+    # 按本地时区划分日期，每个时间点用它自己的 UTC 偏移，跨夏令时切换也归到正确的日期
+    times, offsets = _utc_offsets(focus["start"].min(), focus["start"].max())
+    index = np.searchsorted(times, focus["start"], side="right") - 1
+    day_index = ((focus["start"] + offsets[index]) // 86400).astype(np.int64)
+    first = day_index.min()
+    minutes = np.bincount(day_index - first, weights=focus["duration"]) / 60
+    days = np.arange(first, first + len(minutes)).astype("datetime64[D]")
+    active = minutes > 0
+    return days[active], minutes[active]
+
+
+def pause_ratio(rows):
+    """暂停时长占总时长（计时 + 暂停）的比例"""
+    total = rows["duration"].sum(dtype=np.float64) + rows["paused"].sum(dtype=np.float64)
+    return float(rows["paused"].sum(dtype=np.float64) / total) if total else 0.0
+
+
+def average_focus_by_distribution(rows):
+    """按分布模式统计完整专注区间的平均时长（分钟）"""
+    focus = rows[(rows["kind"] == KIND_CODES["focus"]) & (rows["completed"] == 1)]
+    counts = np.bincount(focus["distribution"], minlength=len(DISTRIBUTION_CODES))
+    sums = np.bincount(focus["distribution"], weights=focus["duration"],
+                       minlength=len(DISTRIBUTION_CODES))
+    return {DISTRIBUTION_NAMES[code]: (sums[code] / counts[code] / 60, int(counts[code]))
+            for code in DISTRIBUTION_NAMES if counts[code]}
+
+
+def long_rest_compliance(rows):
+    """大休息完整休完的比例，返回 (比例, 大休息次数)"""
+    long_rests = rows[rows["kind"] == KIND_CODES["long_rest"]]
+    if not len(long_rests):
+        return None, 0
+    return float(long_rests["completed"].mean()), len(long_rests)
+
+
+def print_report(store, since=None, until=None, user=None, days=14):
+    """打印历史统计报告"""
+    _numpy()
+    rows = store.load(since, until, user)
+    print("\n[HISTORY] 专注历史报告")
+    print("-" * 50)
+    if not len(rows):
+        print("暂无历史记录")
+        return
+    dates, minutes = focus_minutes_per_day(rows)
+    print(f"   区间总数: {len(rows)}")
+    print(f"   累计专注: {minutes.sum() / 60:.1f} 小时（{len(dates)} 天）")
+    if len(minutes):
+        print(f"   日均专注: {minutes.mean():.1f} 分钟")
+    print(f"   暂停比例: {pause_ratio(rows) * 100:.1f}%")
+    for name, (average, count) in average_focus_by_distribution(rows).items():
+        print(f"   平均专注区间（{name}）: {average:.2f} 分钟，共 {count} 次")
+    compliance, count = long_rest_compliance(rows)
+    if compliance is not None:
+        print(f"   大休息完成率: {compliance * 100:.1f}%（共 {count} 次）")
+    print(f"\n最近 {min(days, len(dates))} 天每日专注:")
+    for date, value in zip(dates[-days:], minutes[-days:]):
+        print(f"   {date}  {value:6.1f} 分钟")
@@ -0,0 +1,554 @@
+"""多进程分片计时器宿主：把大量计时器按用户名（或配置名）的一致性哈希分配到多个工作进程
+
+用法：
+    python host.py --workers 4 --timers 20000 --mode test
+    python host.py --users alice,bob,carol --config deep --metrics host.prom
+
+每个工作进程用一个调度器驱动本分片的全部计时器，进程之间不共享状态，阶段切换的
+吞吐量随核心数增长。启动后从标准输入读取命令：
+    add <用户> [配置名]    pause <用户>    resume <用户>    stop <用户>
+    status [用户]          stats           kill <分片>（模拟崩溃）    quit
+工作进程意外退出时自动重启并从检查点恢复该分片的计时器。
+"""
+import bisect
+import contextlib
+import hashlib
+import io
+import itertools
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from checkpoint import CheckpointFile
+from metrics import Metrics
+from sampler import new_seed
+
+REPLICAS = 160  # 每个分片在哈希环上的虚拟节点数
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashRing:
+    """一致性哈希环：键归属于顺时针方向最近的虚拟节点所在的分片
+
+    每个分片在环上有 replicas 个虚拟节点，各分片分到的键数大致相等；
+    移除一个分片时只有原来属于它的键改变归属，其余键不动。
+    """
+
+    def __init__(self, nodes=(), replicas=REPLICAS):
+        self.replicas = replicas
+        self._points = []  # 虚拟节点的哈希值（升序）
+        self._owners = []  # 与 _points 对应的分片编号
+        for node in nodes:
+            self.add(node)
+
+    def __contains__(self, node):
+        return node in self._owners
+
+    def nodes(self):
+        return sorted(set(self._owners))
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = _hash(f"shard-{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node):
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key):
+        """键所属的分片"""
+        if not self._points:
+            raise LookupError("没有可用的工作进程")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def _worker_main(shard, conn, checkpoint_path, seed, restore):
+    """工作进程入口：调度器线程驱动本分片的计时器，主线程执行监督进程发来的命令"""
+    from scheduler import TimerScheduler
+    checkpoint = CheckpointFile(checkpoint_path)
+    if not restore:
+        checkpoint.reset()
+    keys = {}  # 键 -> 计时器编号
+    names = {}  # 计时器编号 -> 键
+
+    def on_event(timer_id, record):
+        if record["event"] == "session_end":
+            key = names.pop(timer_id, None)
+            if keys.get(key) == timer_id:
+                del keys[key]
+
+    scheduler = TimerScheduler(on_event=on_event, record_lateness=True, seed=seed, checkpoint=checkpoint)
+    metrics = Metrics()
+    closing = threading.Event()
+
+    def run():
+        # 没有计时器时 run() 会返回，这里让调度器一直待命，直到收到 close
+        while not closing.is_set():
+            scheduler.run(until=scheduler.clock.monotonic() + 60.0)
+
+    def register(key, timer_id):
+        old = keys.get(key)
+        if old is not None and old != timer_id:
+            scheduler.stop(old)  # 同一键再次添加时替换原计时器
+        keys[key] = timer_id
+        names[timer_id] = key
+        timer = scheduler.timers.get(timer_id)
+        return key, timer.slot if timer is not None else None
+
+    def drain_lateness():
+        lateness, scheduler.lateness = scheduler.lateness, []
+        for value in lateness:
+            metrics.observe("focus_timer_phase_end_lateness_seconds", value)
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    while True:
+        if not conn.poll(1.0):
+            drain_lateness()
+            continue
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            break  # 监督进程已退出
+        if command == "add":
+            result = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for key, mode, custom_settings, config_name, stream in payload:
+                    timer_id = scheduler.add(mode=mode, custom_settings=custom_settings,
+                                             config_name=config_name, stream=stream)
+                    result.append(register(key, timer_id))
+        elif command == "restore":
+            # payload 为 {槽位: 键}；槽位不在其中的计时器照常运行到结束，只是无法再按键控制
+            result = []
+            for timer_id in scheduler.restore():
+                timer = scheduler.timers.get(timer_id)
+                key = payload.get(timer.slot) if timer is not None else None
+                if key is not None:
+                    result.append(register(key, timer_id))
+        elif command == "adopt":
+            result = [register(key, scheduler.adopt(state)) for key, state in payload]
+        elif command in ("pause", "resume", "stop"):
+            timer_id = keys.get(payload)
+            result = timer_id is not None and getattr(scheduler, command)(timer_id)
+        elif command == "snapshot":
+            result = [dict(state, key=names.get(state["timer"])) for state in scheduler.snapshot()]
+        elif command == "stats":
+            drain_lateness()
+            metrics.set("focus_timer_host_transitions_total", scheduler.transitions, shard=shard)
+            result = {"shard": shard, "pid": os.getpid(), "timers": len(scheduler.timers),
+                      "transitions": scheduler.transitions, "cpu_seconds": time.process_time(),
+                      "metrics": metrics.snapshot()}
+        elif command == "close":
+            conn.send(True)
+            break
+        else:
+            result = None
+        conn.send(result)
+    closing.set()
+    scheduler.shutdown()
+    runner.join(1.0)
+    checkpoint.close()
+
+
+class WorkerLost(Exception):
+    """工作进程在命令执行期间退出"""
+
+
+class _Worker:
+    """监督进程一侧的工作进程记录"""
+
+    def __init__(self, shard, path):
+        self.shard = shard
+        self.path = path  # 该分片的检查点文件
+        self.process = None
+        self.conn = None
+        self.slots = {}  # 检查点槽位 -> 键，进程退出后据此认领检查点中的计时器
+        self.restarts = 0
+        self.stats = None  # 最近一次取回的统计
+
+
+class TimerHost:
+    """多进程分片计时器宿主：按键的一致性哈希把计时器分配到各工作进程
+
+    键是用户名，没有用户名时是配置名称。每个工作进程用一个 TimerScheduler 驱动本分片的
+    全部计时器（阶段规则与 FocusTimer 相同），各写一个检查点文件，进程之间不共享任何状态，
+    阶段切换的吞吐量随进程数（核心数）近似线性增长。监督进程只做路由和汇总：
+    pause/resume/stop 按键的哈希发给所在分片，一次管道往返；批量添加和统计先发给所有分片
+    再依次收结果，各分片并行处理。
+    check() 或命令发现工作进程已退出时立即重启它，并从检查点恢复该分片的计时器
+    （停机时间计为暂停）；重启超过 max_restarts 次后把该分片移出哈希环，它的计时器按新的环
+    迁移到其余分片，其余分片上的计时器不动。所有分片共用根种子，随机数流的派生编号由监督
+    进程按添加顺序统一分配，同样的添加顺序下每个键的专注时长序列与分片数、迁移无关。
+    检查点只用于工作进程崩溃恢复，放在临时目录中，close() 时删除。
+    """
+
+    def __init__(self, workers=None, seed=None, max_restarts=3, replicas=REPLICAS):
+        self.size = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else new_seed()  # 根种子
+        self.max_restarts = max_restarts
+        self.ring = HashRing(replicas=replicas)
+        self.metrics = Metrics()  # 监督进程自己的计数（重启、迁移）
+        self._retired = Metrics()  # 已退出的工作进程最后一次上报的指标
+        self._workers = []
+        self._streams = itertools.count()  # 随机数流的派生编号
+        self._lock = threading.RLock()
+        self._context = multiprocessing.get_context("spawn")  # 与 Windows 行为一致，也不继承监督进程的线程
+        self._configs = None  # 第一次按配置名添加时才打开配置库
+        self._dir = None
+
+    def start(self):
+        """启动全部工作进程"""
+        self._dir = tempfile.mkdtemp(prefix="focus_timer_host_")
+        with self._lock:
+            for shard in range(self.size):
+                worker = _Worker(shard, os.path.join(self._dir, f"shard-{shard}.ckpt"))
+                self._workers.append(worker)
+                self._spawn(worker, restore=False)
+                self.ring.add(shard)
+        return self
+
+    def _spawn(self, worker, restore):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, name=f"focus-timer-shard-{worker.shard}",
+                                        args=(worker.shard, child, worker.path, self.seed, restore),
+                                        daemon=True)
+        process.start()
+        child.close()
+        worker.process = process
+        worker.conn = parent
+
+    def _call(self, worker, command, payload=None):
+        """向工作进程发送命令并等待结果；进程已退出时抛出 WorkerLost"""
+        try:
+            worker.conn.send((command, payload))
+            return worker.conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerLost(worker.shard) from e
+
+    def _route(self, key, command, payload):
+        """把命令发给键所在的分片，分片进程已退出时先恢复再重试"""
+        with self._lock:
+            while True:
+                worker = self._workers[self.ring.node_for(key)]
+                try:
+                    return self._call(worker, command, payload)
+                except WorkerLost:
+                    self._recover(worker)
+
+    def _broadcast(self, command, payload=None):
+        """向环上所有分片发送同一命令，返回 {分片: 结果}"""
+        with self._lock:
+            sent, lost, results = [], [], {}
+            for shard in self.ring.nodes():
+                worker = self._workers[shard]
+                try:
+                    worker.conn.send((command, payload))
+                    sent.append(worker)
+                except OSError:
+                    lost.append(worker)
+            for worker in sent:
+                try:
+                    results[worker.shard] = worker.conn.recv()
+                except (EOFError, OSError):
+                    lost.append(worker)
+            for worker in lost:
+                self._recover(worker)
+                if worker.shard in self.ring:
+                    try:
+                        results[worker.shard] = self._call(worker, command, payload)
+                    except WorkerLost:
+                        pass  # 刚重启又退出，下次调用时再处理
+            return results
+
+    def _recover(self, worker):
+        """处理已退出的工作进程：重启并从检查点恢复，重启次数用完时把计时器迁移到其余分片"""
+        process = worker.process
+        process.join(1.0)
+        if process.is_alive():
+            process.kill()  # 管道已断但进程没有退出，视为卡死
+            process.join()
+        worker.conn.close()
+        if worker.stats is not None:
+            self._retired.merge(worker.stats["metrics"])
+            worker.stats = None
+        print(f"[HOST] 分片 {worker.shard} 的工作进程（pid {process.pid}）已退出，退出码 {process.exitcode}")
+        worker.restarts += 1
+        if worker.restarts <= self.max_restarts:
+            self._spawn(worker, restore=True)
+            self.metrics.inc("focus_timer_host_restarts_total", shard=worker.shard)
+            try:
+                restored = self._call(worker, "restore", worker.slots)
+            except WorkerLost:
+                return self._recover(worker)
+            worker.slots = {slot: key for key, slot in restored}
+            self.metrics.inc("focus_timer_host_moved_timers_total", len(restored), shard=worker.shard)
+            print(f"[HOST] 已重启分片 {worker.shard}（pid {worker.process.pid}），从检查点恢复 {len(restored)} 个计时器")
+            return
+
+        # 重启次数用完：移出哈希环，按新的环把检查点中的计时器交给其余分片
+        self.ring.remove(worker.shard)
+        checkpoint = CheckpointFile(worker.path)
+        try:
+            orphans = [(worker.slots[slot], state) for slot, state in checkpoint.read_all()
+                       if slot in worker.slots and state["phase"] is not None]
+        finally:
+            checkpoint.close()
+        worker.slots = {}
+        print(f"[HOST] 分片 {worker.shard} 已重启 {self.max_restarts} 次仍然退出，"
+              f"把 {len(orphans)} 个计时器迁移到其余分片")
+        if not self.ring.nodes():
+            print("[ERROR] 所有工作进程都已退出")
+            return
+        groups = {}
+        for key, state in orphans:
+            groups.setdefault(self.ring.node_for(key), []).append((key, state))
+        for shard, items in groups.items():
+            target = self._workers[shard]
+            try:
+                adopted = self._call(target, "adopt", items)
+            except WorkerLost:
+                self._recover(target)  # 接收方也退出了：它的计时器和这批计时器都还在各自的检查点中
+                continue
+            target.slots.update((slot, key) for key, slot in adopted)
+            self.metrics.inc("focus_timer_host_moved_timers_total", len(adopted), shard=shard)
+
+    def check(self):
+        """检查各工作进程，恢复已退出的，返回被处理的分片编号列表"""
+        with self._lock:
+            lost = [self._workers[shard] for shard in self.ring.nodes()
+                    if not self._workers[shard].process.is_alive()]
+            for worker in lost:
+                self._recover(worker)
+            return [worker.shard for worker in lost]
+
+    def kill(self, shard):
+        """强行结束一个工作进程（模拟崩溃），下次 check() 或命令时恢复"""
+        self._workers[shard].process.kill()
+
+    # ---- 计时器操作 ----
+
+    def add(self, user=None, config_name=None, mode="default", custom_settings=None):
+        """添加一个计时器，返回它所在的分片"""
+        return self.add_many([{"user": user, "config_name": config_name, "mode": mode,
+                               "custom_settings": custom_settings}])[0]
+
+    def add_many(self, specs):
+        """批量添加计时器，每项为 add() 的参数字典，返回各计时器所在的分片列表
+
+        同一个键（用户名或配置名）已有计时器时替换它。
+        """
+        items = []
+        for spec in specs:
+            config_name = spec.get("config_name")
+            key = spec.get("user") or config_name
+            if not key:
+                raise ValueError("需要用户名或配置名称作为分片键")
+            mode, custom_settings = spec.get("mode", "default"), spec.get("custom_settings")
+            if config_name and custom_settings is None:
+                if self._configs is None:
+                    from focus_timer import ConfigManager
+                    self._configs = ConfigManager()
+                custom_settings = self._configs.get_config(config_name)
+                if custom_settings is None:
+                    raise LookupError(f"未找到配置 '{config_name}'")
+                mode = "custom"
+            items.append((key, mode, custom_settings, config_name, next(self._streams)))
+        with self._lock:
+            self._add(items)
+            return [self.ring.node_for(item[0]) for item in items]
+
+    def _add(self, items):
+        groups = {}
+        for item in items:
+            groups.setdefault(self.ring.node_for(item[0]), []).append(item)
+        sent, lost = [], []
+        for shard, group in groups.items():
+            worker = self._workers[shard]
+            try:
+                worker.conn.send(("add", group))
+                sent.append((worker, group))
+            except OSError:
+                lost.append((worker, group))
+        for worker, group in sent:
+            try:
+                worker.slots.update((slot, key) for key, slot in worker.conn.recv())
+            except (EOFError, OSError):
+                lost.append((worker, group))
+        for worker, group in lost:
+            # 已添加的部分会从检查点恢复，再次添加时按同一个键替换
+            self._recover(worker)
+            self._add(group)
+
+    def pause(self, key):
+        return self._route(key, "pause", key)
+
+    def resume(self, key):
+        return self._route(key, "resume", key)
+
+    def stop(self, key):
+        return self._route(key, "stop", key)
+
+    def snapshot(self):
+        """所有计时器的当前状态，每项带键和分片编号"""
+        states = []
+        for shard, result in sorted(self._broadcast("snapshot").items()):
+            states.extend(dict(state, shard=shard) for state in result)
+        return states
+
+    def stats(self):
+        """各分片的统计：进程号、计时器数、阶段切换次数、CPU 时间和重启次数"""
+        results = self._broadcast("stats")
+        with self._lock:
+            stats = []
+            for shard, result in sorted(results.items()):
+                worker = self._workers[shard]
+                worker.stats = result
+                item = {key: value for key, value in result.items() if key != "metrics"}
+                item["restarts"] = worker.restarts
+                stats.append(item)
+            return stats
+
+    def collect_metrics(self):
+        """汇总各分片的指标：阶段切换次数按分片区分，切换延迟直方图合并为一个"""
+        self.stats()
+        combined = Metrics()
+        with self._lock:
+            combined.merge(self._retired.snapshot())
+            combined.merge(self.metrics.snapshot())
+            for worker in self._workers:
+                if worker.stats is not None:
+                    combined.merge(worker.stats["metrics"])
+                    combined.set("focus_timer_host_timers", worker.stats["timers"], shard=worker.shard)
+        return combined
+
+    def close(self):
+        """停止所有工作进程并删除检查点目录"""
+        with self._lock:
+            for worker in self._workers:
+                try:
+                    self._call(worker, "close")
+                except WorkerLost:
+                    pass
+            for worker in self._workers:
+                worker.process.join(2.0)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                worker.conn.close()
+            self._workers = []
+            self.ring = HashRing(replicas=self.ring.replicas)
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+
+def print_host_stats(host, since=None):
+    """打印各分片的统计；since 为上次的 (时刻, 统计)，据此计算每秒切换次数，返回本次的"""
+    now = time.monotonic()
+    stats = host.stats()
+    previous = {} if since is None else {item["shard"]: item for item in since[1]}
+    elapsed = None if since is None else now - since[0]
+    for item in stats:
+        line = (f"[HOST] 分片 {item['shard']}（pid {item['pid']}）: {item['timers']} 个计时器，"
+                f"切换 {item['transitions']} 次，重启 {item['restarts']} 次")
+        before = previous.get(item["shard"])
+        if elapsed and before is not None and before["pid"] == item["pid"]:
+            line += f"，{(item['transitions'] - before['transitions']) / elapsed:.0f} 次/秒"
+        print(line)
+    print(f"[HOST] 合计 {sum(item['timers'] for item in stats)} 个计时器，"
+          f"{len(stats)}/{host.size} 个分片在线")
+    return now, stats
+
+
+def main(argv=None):
+    import argparse  # 只在入口处使用
+    parser = argparse.ArgumentParser(description="多进程分片计时器宿主")
+    parser.add_argument("--workers", type=int, help="工作进程数，默认使用全部核心")
+    parser.add_argument("--users", help="启动时添加的用户，逗号分隔")
+    parser.add_argument("--timers", type=int, default=0, help="启动时添加的计时器数（用户名为 user-1、user-2 ...）")
+    parser.add_argument("--mode", choices=["default", "test"], default="default", help="计时器模式")
+    parser.add_argument("--config", help="计时器使用的已保存配置名称")
+    parser.add_argument("--seed", type=int, help="根随机种子，默认随机生成")
+    parser.add_argument("--max-restarts", type=int, default=3, help="每个分片最多重启的次数")
+    parser.add_argument("--metrics", metavar="PATH", help="把汇总后的指标以 Prometheus 文本格式定期写入文件")
+    args = parser.parse_args(argv)
+
+    users = [user.strip() for user in (args.users or "").split(",") if user.strip()]
+    users += [f"user-{i}" for i in range(1, args.timers + 1)]
+    host = TimerHost(args.workers, seed=args.seed, max_restarts=args.max_restarts).start()
+    stopping = threading.Event()
+
+    def supervise():
+        # 每秒检查一次工作进程，按需写入指标文件
+        next_write = 0.0
+        while not stopping.wait(1.0):
+            host.check()
+            if args.metrics and time.monotonic() >= next_write:
+                next_write = time.monotonic() + 10.0
+                host.collect_metrics().write(args.metrics)
+
+    try:
+        start = time.perf_counter()
+        host.add_many([{"user": user, "config_name": args.config, "mode": args.mode} for user in users])
+        print(f"[HOST] {host.size} 个工作进程，{len(users)} 个计时器，"
+              f"耗时 {time.perf_counter() - start:.1f} 秒，随机种子 {host.seed}")
+        threading.Thread(target=supervise, daemon=True).start()
+        last = None
+        for line in sys.stdin:
+            parts = line.split()
+            if not parts:
+                continue
+            command, rest = parts[0].lower(), parts[1:]
+            try:
+                if command in ("quit", "exit"):
+                    break
+                elif command == "add" and rest:
+                    shard = host.add(user=rest[0], config_name=rest[1] if len(rest) > 1 else args.config,
+                                     mode=args.mode)
+                    print(f"[HOST] {rest[0]} -> 分片 {shard}")
+                elif command in ("pause", "resume", "stop") and rest:
+                    done = getattr(host, command)(rest[0])
+                    print(f"[HOST] {command} {rest[0]}: {'成功' if done else '没有这个计时器或状态不变'}")
+                elif command == "status":
+                    states = host.snapshot()
+                    if rest:
+                        states = [state for state in states if state["key"] == rest[0]]
+                    for state in states[:50]:
+                        print(f"   {state['key']:<16} 分片 {state['shard']}  {state['phase'] or '-':<10} "
+                              f"剩余 {state['remaining']:7.1f} 秒  累计专注 {state['total_focus_time']:.1f}  "
+                              f"大周期 {state['cycles']}{'  已暂停' if state['paused'] else ''}")
+                    if len(states) > 50:
+                        print(f"   ... 共 {len(states)} 个计时器")
+                elif command == "stats":
+                    last = print_host_stats(host, last)
+                elif command == "kill" and rest:
+                    host.kill(int(rest[0]))
+                    print(f"[HOST] 已结束分片 {rest[0]} 的工作进程")
+                else:
+                    print("[INFO] 命令: add <用户> [配置名] | pause/resume/stop <用户> | status [用户] | "
+                          "stats | kill <分片> | quit")
+            except (LookupError, ValueError, IndexError) as e:
+                print(f"[ERROR] {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopping.set()
+        if args.metrics:
+            host.collect_metrics().write(args.metrics)
+        host.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import json
+import os
+import random
+import struct
+import threading
+import zlib
+
+# 记录头：crc32 | 计时器编号 | 事件代码 | 会话内秒数 | 附加数据长度
+_HEADER = struct.Struct("<IIBdH")
+
+# 常见事件使用单字节代码，其他事件用代码 0 并把名称写入附加数据
+EVENT_CODES = {
+    "session_start": 1,
+    "session_end": 2,
+    "focus_start": 3,
+    "focus_end": 4,
+    "short_rest_start": 5,
+    "short_rest_end": 6,
+    "long_rest_start": 7,
+    "long_rest_end": 8,
+    "cycle": 9,
+    "pause": 10,
+    "resume": 11,
+    "bell": 12,
+    "stop": 13,
+}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+
+def encode_record(timer_id, record):
+    """把一条事件编码为二进制记录"""
+    event = record["event"]
+    code = EVENT_CODES.get(event, 0)
+    data = {key: value for key, value in record.items() if key not in ("t", "event")}
+    if code == 0:
+        data["event"] = event
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if data else b""
+    body = _HEADER.pack(0, timer_id, code, record["t"], len(payload))[4:] + payload
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+def read_records(path):
+    """按顺序读取日志中的完整记录，遇到截断或校验失败的尾部时停止
+
+    返回 (记录列表, 有效数据长度)，记录为 (计时器编号, 事件字典)。
+    """
+    records = []
+    valid_length = 0
+    if not os.path.exists(path):
+        return records, valid_length
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        crc, timer_id, code, t, length = _HEADER.unpack_from(data, offset)
+        end = offset + _HEADER.size + length
+        if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+            break  # 崩溃时写了一半的记录
+        payload = json.loads(data[offset + _HEADER.size:end]) if length else {}
+        event = payload.pop("event", None) if code == 0 else EVENT_NAMES.get(code)
+        record = {"t": t, "event": event}
+        record.update(payload)
+        records.append((timer_id, record))
+        offset = end
+        valid_length = end
+    return records, valid_length
+
+
+class Journal:
+    """只追加的会话日志：事件先写入内存缓冲，由后台线程成组写盘并 fsync
+
+    每个计时器通过 attach() 注册事件监听，多个计时器共享同一个日志文件。
+    进程崩溃后用 recover() 从日志重建未正常结束的会话。
+    """
+
+    def __init__(self, path, commit_interval=1.0, max_buffer=64 * 1024):
+        self.path = path
+        self.commit_interval = commit_interval  # 成组提交的最长间隔（秒）
+        self.max_buffer = max_buffer  # 缓冲超过该字节数时立即提交
+        self._truncate_torn_tail()
+        self._file = open(path, "ab")
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._commit_loop, daemon=True)
+        self._thread.start()
+
+    def _truncate_torn_tail(self):
+        """截掉上次崩溃遗留的不完整记录，保证后续追加从记录边界开始"""
+        if not os.path.exists(self.path):
+            return
+        _, valid_length = read_records(self.path)
+        if valid_length < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_length)
+
+    def attach(self, timer):
+        """为计时器分配编号并订阅它的事件，返回编号"""
+        timer_id = random.getrandbits(32)
+        timer.event_listeners.append(lambda record: self.append(timer_id, record))
+        return timer_id
+
+    def append(self, timer_id, record):
+        """追加一条事件；会话结束事件会立即提交"""
+        data = encode_record(timer_id, record)
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer += data
+            if len(self._buffer) >= self.max_buffer:
+                self._wakeup.notify()
+        if record["event"] == "session_end":
+            self.flush()
+
+    def flush(self):
+        """把缓冲中的记录写入文件并 fsync"""
+        # 取缓冲和写盘在同一把 IO 锁内完成，保证并发提交时记录顺序不乱
+        with self._io_lock:
+            with self._lock:
+                data = bytes(self._buffer)
+                self._buffer.clear()
+            if not data:
+                return
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _commit_loop(self):
+        """后台线程：每个提交周期把缓冲成组写盘一次"""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                self._wakeup.wait(self.commit_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[WARNING] 写入会话日志失败: {e}")
+
+    def close(self):
+        """提交剩余记录并关闭日志"""
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout=1.0)
+        self._file.close()
+
+    def recover(self):
+        """读取日志并返回未正常结束的会话"""
+        self.flush()
+        records, _ = read_records(self.path)
+        return recover_sessions(records)
+
+    def compact(self):
+        """重写日志，只保留尚未结束的会话（通过临时文件原子替换）"""
+        self.flush()
+        with self._io_lock:
+            records, _ = read_records(self.path)
+            open_ids = {session["timer_id"] for session in recover_sessions(records)}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for timer_id, record in records:
+                    if timer_id in open_ids:
+                        f.write(encode_record(timer_id, record))
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "ab")
+
+
+def recover_sessions(records):
+    """从日志记录重建没有 session_end 的会话状态"""
+    sessions = {}
+    for timer_id, record in records:
+        event = record["event"]
+        if event == "session_start":
+            sessions[timer_id] = {
+                "timer_id": timer_id,
+                "mode": record.get("mode"),
+                "start": record.get("start"),
+                "seed": record.get("seed"),
+                "total_focus_time": 0,
+                "total_pause_time": 0.0,
+                "cycle_count": 0,
+                "phase": None,
+                "last_t": record["t"],
+                "pause_t": None,
+            }
+            continue
+        session = sessions.get(timer_id)
+        if session is None:
+            continue
+        session["last_t"] = record["t"]
+        if event == "session_end":
+            del sessions[timer_id]
+        elif event == "focus_start":
+            session["phase"] = "focus"
+        elif event == "focus_end":
+            session["total_focus_time"] = record.get("total_focus_time", session["total_focus_time"])
+        elif event in ("short_rest_start", "long_rest_start"):
+            session["phase"] = event[:-len("_start")]
+        elif event == "long_rest_end":
+            session["total_focus_time"] = 0  # 大休息结束后累计时间重置
+        elif event == "cycle":
+            session["cycle_count"] = record.get("cycle", session["cycle_count"])
+        elif event == "pause":
+            session["pause_t"] = record["t"]
+        elif event == "resume" and session["pause_t"] is not None:
+            session["total_pause_time"] += record["t"] - session["pause_t"]
+            session["pause_t"] = None
+
+    recovered = []
+    for session in sessions.values():
+        # 崩溃时仍处于暂停状态，暂停计到最后一条记录为止
+        if session["pause_t"] is not None:
+            session["total_pause_time"] += session["last_t"] - session["pause_t"]
+        del session["pause_t"]
+        recovered.append(session)
+    return recovered
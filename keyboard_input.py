@@ -0,0 +1,159 @@
+import os
+import queue
+import sys
+import threading
+import time
+
+# Windows 下无超时的锁等待无法被 Ctrl+C 打断，阻塞等待按此间隔分段
+_WINDOWS_WAIT_SLICE = 1.0
+
+
+class _WindowsBackend:
+    """Windows 后端：等待控制台输入句柄或停止事件，有按键时用 msvcrt 读取"""
+
+    WAIT_OBJECT_0 = 0
+    INFINITE = 0xFFFFFFFF
+
+    def __init__(self):
+        import ctypes
+        import msvcrt
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._msvcrt = msvcrt
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.GetStdHandle.restype = wintypes.HANDLE
+        self._kernel32.CreateEventW.restype = wintypes.HANDLE
+        self._stdin = self._kernel32.GetStdHandle(-10)  # STD_INPUT_HANDLE
+        self._stop_event = self._kernel32.CreateEventW(None, True, False, None)
+
+    def read_loop(self, put):
+        """阻塞读取按键，直到 close() 被调用"""
+        handles = (self._ctypes.c_void_p * 2)(self._stdin, self._stop_event)
+        record = self._ctypes.create_string_buffer(20)  # 一个 INPUT_RECORD
+        count = self._ctypes.c_ulong()
+        while True:
+            result = self._kernel32.WaitForMultipleObjects(2, handles, False, self.INFINITE)
+            if result != self.WAIT_OBJECT_0:
+                break  # 停止事件或等待出错
+            if self._msvcrt.kbhit():
+                put(self._msvcrt.getwch())
+            else:
+                # 鼠标、焦点等非按键事件会让句柄保持有信号，读出丢弃
+                self._kernel32.ReadConsoleInputW(self._stdin, record, 1, self._ctypes.byref(count))
+
+    def close(self):
+        """唤醒读取线程使其退出"""
+        self._kernel32.SetEvent(self._stop_event)
+
+    def restore(self):
+        """释放停止事件句柄"""
+        self._kernel32.CloseHandle(self._stop_event)
+
+
+class _PosixBackend:
+    """Linux/macOS 后端：终端切到 cbreak 模式，用 selectors 同时等待 stdin 和停止管道"""
+
+    def __init__(self):
+        import termios
+        import tty
+        self._termios = termios
+        self._fd = sys.stdin.fileno()
+        self._saved_attrs = termios.tcgetattr(self._fd)
+        self._wake_r, self._wake_w = os.pipe()
+        # cbreak：关闭行缓冲和回显，保留 Ctrl+C 等信号
+        tty.setcbreak(self._fd)
+
+    def read_loop(self, put):
+        """阻塞读取按键，直到 close() 被调用"""
+        import selectors
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._fd, selectors.EVENT_READ)
+            selector.register(self._wake_r, selectors.EVENT_READ)
+            while True:
+                for key, _ in selector.select():
+                    if key.fd == self._wake_r:
+                        return
+                    data = os.read(self._fd, 64)
+                    if not data:
+                        return  # stdin 已关闭
+                    for char in data.decode("utf-8", errors="ignore"):
+                        put(char)
+
+    def close(self):
+        """唤醒读取线程使其退出"""
+        os.write(self._wake_w, b"x")
+
+    def restore(self):
+        """恢复终端设置并关闭停止管道"""
+        self._termios.tcsetattr(self._fd, self._termios.TCSADRAIN, self._saved_attrs)
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+class KeyboardInput:
+    """键盘输入子系统：后台线程阻塞读取按键，通过队列交给计时器
+
+    读取线程只在有按键时被唤醒，计时器在队列上等待到下一个截止时间，
+    空闲和暂停时都不做固定间隔轮询。
+    """
+
+    def __init__(self):
+        self.keys = queue.Queue()  # (按键, 读到按键时的 time.monotonic())
+        self.last_key_time = None  # 最近一次 get() 取到的按键被读到的时刻
+        self._backend = None
+        self._thread = None
+
+    def start(self):
+        """选择平台后端并启动读取线程，stdin 不是终端时不读取键盘"""
+        if not sys.stdin or not sys.stdin.isatty():
+            return
+        try:
+            if sys.platform == "win32":
+                self._backend = _WindowsBackend()
+            else:
+                self._backend = _PosixBackend()
+        except Exception as e:
+            print(f"[WARNING] 键盘输入初始化失败，暂停功能不可用: {e}")
+            self._backend = None
+            return
+        self._thread = threading.Thread(target=self._backend.read_loop,
+                                        args=(self._put,), daemon=True)
+        self._thread.start()
+
+    @property
+    def available(self):
+        """是否真的在读取键盘（stdin 不是终端或初始化失败时为 False）"""
+        return self._backend is not None
+
+    def _put(self, key):
+        self.keys.put((key, time.monotonic()))
+
+    def stop(self):
+        """停止读取线程并恢复终端，之后 input() 可以正常使用"""
+        if self._backend is None:
+            return
+        self._backend.close()
+        self._thread.join(timeout=1.0)
+        self._backend.restore()
+        self._backend = None
+        self._thread = None
+
+    def get(self, timeout=None):
+        """等待一个按键，超时返回 None；timeout=None 表示一直等待"""
+        if self._backend is None:
+            if timeout is None:
+                raise RuntimeError("键盘输入不可用，无法无限期等待按键")
+            time.sleep(max(timeout, 0))
+            return None
+        if timeout is None and sys.platform == "win32":
+            while True:
+                try:
+                    key, self.last_key_time = self.keys.get(timeout=_WINDOWS_WAIT_SLICE)
+                    return key
+                except queue.Empty:
+                    continue
+        try:
+            key, self.last_key_time = self.keys.get(timeout=None if timeout is None else max(timeout, 0))
+            return key
+        except queue.Empty:
+            return None
@@ -0,0 +1,158 @@
+import bisect
+import os
+import threading
+import time
+
+# 秒级延迟直方图的桶上限，从 0.5 毫秒到 2.5 秒
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+METRIC_HELP = {
+    "focus_timer_tick_lateness_seconds": ("histogram", "倒计时每秒刷新比计划时刻晚了多少"),
+    "focus_timer_ticks_missed_total": ("counter", "被跳过或合并的倒计时刷新次数"),
+    "focus_timer_phase_end_lateness_seconds": ("histogram", "阶段实际结束比截止时间晚了多少"),
+    "focus_timer_bell_decode_seconds": ("histogram", "音效首次解码耗时"),
+    "focus_timer_bell_play_seconds": ("histogram", "play_bell 阻塞计时线程的时间"),
+    "focus_timer_input_latency_seconds": ("histogram", "按下 P 键到暂停/恢复生效的时间"),
+    "focus_timer_print_seconds": ("histogram", "终端输出耗时"),
+    "focus_timer_notifications_total": ("counter", "按目标和结果（delivered/dropped/failed/timeout）统计的通知数"),
+    "focus_timer_notification_send_seconds": ("histogram", "一批通知的投递耗时"),
+    "focus_timer_notification_delay_seconds": ("histogram", "通知从入队到投递完成的时间"),
+    "focus_timer_host_transitions_total": ("counter", "各分片工作进程处理的阶段切换次数"),
+    "focus_timer_host_timers": ("gauge", "各分片工作进程上运行的计时器数"),
+    "focus_timer_host_restarts_total": ("counter", "分片工作进程退出后被重启的次数"),
+    "focus_timer_host_moved_timers_total": ("counter", "工作进程退出后迁移或恢复的计时器数"),
+}
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """计时器运行指标，按 Prometheus 文本格式输出
+
+    计时器默认不带 Metrics（metrics=None），所有埋点只是一次 None 判断；
+    启用后直方图和计数器都在内存中累加，按 write_interval 定期原子地重写 path，
+    可交给 node_exporter 的 textfile collector 采集，比较各台机器的计时漂移。
+    """
+
+    def __init__(self, path=None, write_interval=10.0):
+        self.path = path
+        self.write_interval = write_interval
+        self._histograms = {}  # (指标名, 标签) -> Histogram
+        self._counters = {}  # (指标名, 标签) -> 数值
+        self._lock = threading.Lock()  # 音效回调等后台线程也会写入
+        self._next_write = 0.0
+
+    def observe(self, name, value, **labels):
+        """向直方图记录一个观测值"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        """计数器加 amount"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """把指标设为 value（gauge）"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = value
+
+    def snapshot(self):
+        """全部计数器和直方图的副本，只含基本类型，可以跨进程传递后用 merge() 汇总"""
+        with self._lock:
+            return (dict(self._counters),
+                    {key: (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                     for key, histogram in self._histograms.items()})
+
+    def merge(self, snapshot):
+        """把另一个 Metrics 的 snapshot() 累加进来：计数器相加，相同分桶的直方图逐桶相加"""
+        counters, histograms = snapshot
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, (buckets, counts, total, count) in histograms.items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = METRIC_HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                describe(name)
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                describe(name)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.9f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """把当前指标原子地写入文件"""
+        path = path or self.path
+        if not path:
+            return
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[WARNING] 写入指标文件失败: {e}")
+
+    def maybe_write(self):
+        """距上次写入超过 write_interval 时写入文件"""
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if now >= self._next_write:
+            self._next_write = now + self.write_interval
+            self.write()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
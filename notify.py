@@ -0,0 +1,373 @@
+import itertools
+import json
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 会转发为通知的计时器事件（铃声、逐秒刷新等不转发）
+NOTIFY_EVENTS = ("focus_start", "focus_end", "short_rest_start", "short_rest_end",
+                 "long_rest_start", "long_rest_end", "cycle", "pause", "resume", "session_end")
+
+# 队列满时的处理策略
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+MESSAGES = {
+    "focus_start": "开始专注",
+    "focus_end": "专注结束",
+    "short_rest_start": "开始短休息",
+    "short_rest_end": "短休息结束",
+    "long_rest_start": "开始大休息",
+    "long_rest_end": "大休息结束",
+    "cycle": "完成一个大周期",
+    "pause": "计时已暂停",
+    "resume": "计时已恢复",
+    "session_end": "会话结束",
+}
+
+
+def format_notification(notification):
+    """把一条通知格式化为一行文本"""
+    message = MESSAGES.get(notification["event"], notification["event"])
+    if "focus_time" in notification:
+        unit = "秒" if notification.get("mode") == "test" else "分钟"
+        message += f" {notification['focus_time']} {unit}"
+    elif "seconds" in notification:
+        message += f" {notification['seconds']:.0f} 秒"
+    if "cycle" in notification:
+        message += f"（第 {notification['cycle']} 个）"
+    return f"[{notification['time']}] #{notification['timer']} {message}"
+
+
+class Sink:
+    """通知目标：send(batch, timeout) 投递一批通知，失败时抛出异常
+
+    timeout 是本次投递允许的最长时间。NotificationHub 在单独的线程中调用 send，
+    超时后不再等待并计为超时，卡住的调用不会占住工作线程；实现仍应尽量遵守它
+    （如传给 socket），让被放弃的调用也能尽快结束。
+    """
+
+    name = "sink"
+
+    def send(self, batch, timeout):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LogSink(Sink):
+    """把通知以文本行追加到日志文件"""
+
+    name = "log"
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def send(self, batch, timeout):
+        self._file.write("".join(format_notification(notification) + "\n" for notification in batch))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class DesktopSink(Sink):
+    """桌面通知（需要 plyer），一批通知只弹出最新的一条，避免连续弹窗"""
+
+    name = "desktop"
+
+    def __init__(self, title="专注计时器"):
+        self.title = title
+        self._notify = None
+
+    def send(self, batch, timeout):
+        if self._notify is None:
+            from plyer import notification  # 可选依赖，第一次通知时才导入
+            self._notify = notification.notify
+        latest = batch[-1]
+        self._notify(title=self.title, message=format_notification(latest), timeout=5)
+
+
+class WebhookSink(Sink):
+    """把一批通知以 JSON POST 到 HTTP 地址（如本地转发服务）"""
+
+    name = "webhook"
+
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, batch, timeout):
+        body = json.dumps({"notifications": batch}, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+
+
+class StubHttpServer:
+    """测试用的本地 HTTP 接收端：记录收到的通知，可模拟慢响应和错误
+
+    delay 为每个请求的响应延迟（秒），status 为返回的状态码。
+    """
+
+    def __init__(self, delay=0.0, status=200, host="127.0.0.1", port=0):
+        self.delay = delay
+        self.status = status
+        self.received = []  # 收到的全部通知
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                with stub._lock:
+                    stub.requests += 1
+                    if stub.status < 300:
+                        stub.received.extend(json.loads(body)["notifications"])
+                self.send_response(stub.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass  # 不打印访问日志
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}/notify"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _Channel:
+    """一个通知目标的有界队列、投递参数和统计"""
+
+    def __init__(self, sink, name, capacity, policy, batch_size, timeout, block_timeout):
+        self.sink = sink
+        self.name = name
+        self.queue = deque()  # (入队时刻, 通知)
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.block_timeout = block_timeout
+        self.busy = False  # 是否有工作线程正在投递（同一目标的批次按顺序投递）
+        self.stuck = None  # 超时后被放弃、仍未返回的投递线程
+        self.started = time.monotonic()
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.batches = 0
+        self.send_time = 0.0  # 投递耗时总和
+        self.latency = 0.0  # 入队到投递完成的时间总和
+
+
+def _send(channel, batch):
+    """在单独的线程中投递一批通知，最多等待 channel.timeout 秒，超时抛出 TimeoutError
+
+    超时的调用无法中止，只能放弃；它返回之前同一目标的后续批次直接计为超时，
+    每个目标最多留下一个卡住的线程。
+    """
+    if channel.stuck is not None:
+        if channel.stuck.is_alive():
+            raise TimeoutError("上一次投递仍未返回")
+        channel.stuck = None
+    errors = []
+
+    def target():
+        try:
+            channel.sink.send(batch, channel.timeout)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target, daemon=True, name=f"notify-{channel.name}")
+    thread.start()
+    thread.join(channel.timeout)
+    if thread.is_alive():
+        channel.stuck = thread
+        raise TimeoutError(f"投递超过 {channel.timeout} 秒")
+    if errors:
+        raise errors[0]
+
+
+def _is_timeout(error):
+    reason = getattr(error, "reason", None)  # urllib 把超时包装在 URLError 中
+    return isinstance(error, TimeoutError) or isinstance(reason, TimeoutError)
+
+
+class NotificationHub:
+    """通知分发：计时器事件进入各目标的有界队列，由工作线程池批量投递
+
+    计时线程只做一次入队（微秒级），铃声和打印之外的通知都不在计时线程上执行。
+    每个目标有自己的队列、批大小、超时和队列满策略：
+        drop_oldest  丢弃最旧的通知（默认，通知总是反映最新状态）
+        drop_newest  丢弃新来的通知
+        block        计时线程最多等待 block_timeout 秒腾出空间，仍然满时丢弃新通知，
+                     慢目标对计时的影响有上限
+    同一目标的批次按顺序投递，一个慢目标最多占用一个工作线程，不影响其他目标；
+    每次投递最多等待该目标的 timeout 秒，卡住的目标不会一直占住工作线程。
+    """
+
+    def __init__(self, workers=2, metrics=None):
+        self.metrics = metrics
+        self._channels = []
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._next = 0  # 轮询起点，各目标公平地获得工作线程
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def add_sink(self, sink, capacity=256, policy="drop_oldest", batch_size=16, timeout=2.0,
+                 block_timeout=0.05, name=None):
+        """注册通知目标"""
+        if policy not in POLICIES:
+            raise ValueError(f"未知的队列策略: {policy}")
+        channel = _Channel(sink, name or sink.name, capacity, policy, batch_size, timeout, block_timeout)
+        with self._cond:
+            self._channels.append(channel)
+        return channel
+
+    def attach(self, timer):
+        """订阅计时器事件，返回通知中使用的计时器编号"""
+        timer_id = next(self._ids)
+
+        def on_event(record):
+            if record["event"] in NOTIFY_EVENTS:
+                notification = {"timer": timer_id, "mode": timer.mode,
+                                "time": timer.clock.now().strftime("%Y-%m-%d %H:%M:%S")}
+                notification.update(record)
+                self.publish(notification)
+
+        timer.event_listeners.append(on_event)
+        return timer_id
+
+    def publish(self, notification):
+        """把通知放入各目标的队列，不等待投递"""
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            for channel in self._channels:
+                queue = channel.queue
+                if len(queue) >= channel.capacity and channel.policy == "block":
+                    deadline = now + channel.block_timeout
+                    while len(queue) >= channel.capacity and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                if len(queue) >= channel.capacity:
+                    self._record_drop(channel)
+                    if channel.policy != "drop_oldest":
+                        continue
+                    queue.popleft()
+                queue.append((now, notification))
+            self._cond.notify_all()
+
+    def _record_drop(self, channel):
+        channel.dropped += 1
+        if self.metrics is not None:
+            self.metrics.inc("focus_timer_notifications_total", sink=channel.name, result="dropped")
+
+    def _take(self):
+        """取出下一个待投递的批次，关闭且没有待投递时返回 None"""
+        with self._cond:
+            while True:
+                count = len(self._channels)
+                for offset in range(count):
+                    channel = self._channels[(self._next + offset) % count]
+                    if channel.queue and not channel.busy:
+                        self._next = (self._next + offset + 1) % count
+                        channel.busy = True
+                        batch = [channel.queue.popleft()
+                                 for _ in range(min(channel.batch_size, len(channel.queue)))]
+                        self._cond.notify_all()  # 队列腾出了空间
+                        return channel, batch
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _work(self):
+        """工作线程：循环取批次并投递"""
+        while True:
+            taken = self._take()
+            if taken is None:
+                return
+            channel, batch = taken
+            start = time.monotonic()
+            result = "delivered"
+            try:
+                _send(channel, [notification for _, notification in batch])
+            except Exception as e:
+                result = "timeout" if _is_timeout(e) else "failed"
+                if result == "failed" and channel.failed == 0:
+                    print(f"[WARNING] 通知目标 {channel.name} 投递失败: {e}")  # 同一目标只提示一次
+            end = time.monotonic()
+            with self._cond:
+                channel.busy = False
+                channel.batches += 1
+                channel.send_time += end - start
+                if result == "delivered":
+                    channel.delivered += len(batch)
+                    channel.latency += sum(end - queued for queued, _ in batch)
+                elif result == "timeout":
+                    channel.timeouts += len(batch)
+                else:
+                    channel.failed += len(batch)
+                self._cond.notify_all()
+            if self.metrics is not None:
+                self.metrics.inc("focus_timer_notifications_total", len(batch), sink=channel.name, result=result)
+                self.metrics.observe("focus_timer_notification_send_seconds", end - start, sink=channel.name)
+                self.metrics.observe("focus_timer_notification_delay_seconds", end - batch[0][0],
+                                     sink=channel.name)
+
+    def stats(self):
+        """各目标的投递统计，throughput 为每秒投递的通知数"""
+        now = time.monotonic()
+        with self._cond:
+            return [{"sink": channel.name, "policy": channel.policy, "queued": len(channel.queue),
+                     "delivered": channel.delivered, "dropped": channel.dropped, "failed": channel.failed,
+                     "timeouts": channel.timeouts, "batches": channel.batches,
+                     "throughput": channel.delivered / max(now - channel.started, 1e-9),
+                     "mean_send_seconds": channel.send_time / channel.batches if channel.batches else 0.0,
+                     "mean_delay_seconds": channel.latency / channel.delivered if channel.delivered else 0.0}
+                    for channel in self._channels]
+
+    def close(self, timeout=2.0):
+        """等待队列中的通知投递完（最多 timeout 秒），然后停止工作线程并关闭各目标"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while any(channel.queue or channel.busy for channel in self._channels):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(max(deadline - time.monotonic(), 0.1))
+        for channel in self._channels:
+            try:
+                channel.sink.close()
+            except Exception as e:
+                print(f"[WARNING] 关闭通知目标 {channel.name} 失败: {e}")
+
+
+def print_notify_stats(hub):
+    """打印各通知目标的投递统计"""
+    for stats in hub.stats():
+        print(f"[NOTIFY] {stats['sink']}: 投递 {stats['delivered']} 条（{stats['batches']} 批），"
+              f"丢弃 {stats['dropped']}，失败 {stats['failed']}，超时 {stats['timeouts']}，"
+              f"平均延迟 {stats['mean_delay_seconds'] * 1000:.1f} ms")
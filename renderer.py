@@ -0,0 +1,185 @@
+import math
+import os
+import sys
+import time
+import unicodedata
+
+PHASE_LABELS = {"focus": "专注", "short_rest": "短休息", "long_rest": "大休息"}
+
+
+def display_width(text):
+    """终端显示宽度：中文等全角字符占两列"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def fit_width(text, width):
+    """截断到不超过 width 列"""
+    if display_width(text) <= width:
+        return text
+    result = []
+    used = 0
+    for ch in text:
+        w = 2 if unicodedata.east_asian_width(ch) in "WF" else 1
+        if used + w > width:
+            break
+        result.append(ch)
+        used += w
+    return "".join(result)
+
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except Exception:
+        return False
+
+
+class TerminalRenderer:
+    """计时器状态行的增量渲染
+
+    终端上：每次只重写与上一帧不同的部分（光标移到第一个变化的列），
+    写入变慢时自动拉长最小帧间隔，跳过来不及显示的帧。
+    不是终端（输出重定向到文件或日志）时不输出状态行，
+    print_time_info 等事件只输出一行纯文本，不打印分隔线。
+    """
+
+    def __init__(self, stream=None, min_interval=0.05):
+        self.stream = stream or sys.stdout
+        self.is_tty = _isatty(self.stream)
+        self.min_interval = min_interval  # 两帧之间的最小间隔（秒）
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self._line = ""  # 终端上当前状态行的内容
+        self._next_frame = 0.0
+
+    def status(self, text, force=False):
+        """更新状态行，返回是否实际写入"""
+        if not self.is_tty or text == self._line:
+            return False
+        now = time.monotonic()
+        if not force and now < self._next_frame:
+            self.frames_skipped += 1
+            return False
+        data = self._diff(self._line, text)
+        start = time.perf_counter()
+        self.stream.write(data)
+        self.stream.flush()
+        cost = time.perf_counter() - start
+        self._line = text
+        self.frames_written += 1
+        # 终端来不及消化输出时，写入耗时会变长，按耗时成比例地跳帧
+        self._next_frame = now + max(self.min_interval, cost * 4)
+        return True
+
+    @staticmethod
+    def _diff(old, new):
+        """把终端上的 old 改写为 new 所需的最少输出"""
+        common = 0
+        limit = min(len(old), len(new))
+        while common < limit and old[common] == new[common]:
+            common += 1
+        changed = new[common:]
+        if len(old) == len(new) and display_width(old) == display_width(new):
+            # 等宽时相同的尾部不用重写（如 "00:12 [P:暂停]" 只改一位数字）
+            tail = 0
+            while tail < len(changed) and old[-1 - tail] == new[-1 - tail]:
+                tail += 1
+            changed = changed[:len(changed) - tail]
+        column = display_width(new[:common])
+        data = "\r" + (f"\x1b[{column}C" if column else "") + changed
+        if display_width(old) > display_width(new):
+            data += "\x1b[K"  # 清除旧内容多出来的部分
+        return data
+
+    def end_status(self):
+        """结束状态行（换行），之后的输出从新行开始"""
+        if self._line:
+            self.stream.write("\n")
+            self.stream.flush()
+            self._line = ""
+
+    def forget(self):
+        """其他输出已经换行离开了状态行，下一帧需要整行重写"""
+        self._line = ""
+
+
+class Dashboard:
+    """多计时器仪表盘：每行一个计时器，每次刷新只用一次 write 系统调用
+
+    与上一帧比较，只重写内容变化的行（光标定位 + 行内容 + 清除行尾），
+    整帧拼成一个字节串后一次写出；写入变慢时同样会跳帧。
+    """
+
+    def __init__(self, stream=None, min_interval=0.2):
+        self.stream = stream or sys.stdout
+        self.is_tty = _isatty(self.stream)
+        self.min_interval = min_interval
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self._rows = []  # 上一帧的各行内容
+        self._next_frame = 0.0
+        try:
+            self._fd = self.stream.fileno()
+        except Exception:
+            self._fd = None
+
+    def _write(self, text):
+        data = text.encode("utf-8")
+        if self._fd is None:
+            self.stream.write(text)
+            self.stream.flush()
+            return
+        self.stream.flush()  # 先清空 Python 层缓冲，避免与直接写入交错
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+
+    def start(self):
+        """清屏并隐藏光标"""
+        if self.is_tty:
+            self._write("\x1b[?25l\x1b[2J")
+            self._rows = []
+
+    def stop(self):
+        """恢复光标，并把光标移到仪表盘下方"""
+        if self.is_tty:
+            self._write(f"\x1b[{len(self._rows) + 1};1H\x1b[?25h")
+
+    def render(self, rows, force=False):
+        """显示一帧，rows 为各行文本，返回是否实际写入"""
+        if not self.is_tty:
+            return False
+        now = time.monotonic()
+        if not force and now < self._next_frame:
+            self.frames_skipped += 1
+            return False
+        try:
+            width = os.get_terminal_size(self._fd).columns if self._fd is not None else 0
+        except OSError:
+            width = 0
+        width = width or 80  # 伪终端可能报告 0 列
+        rows = [fit_width(row, width) for row in rows]
+        parts = []
+        for index, row in enumerate(rows):
+            if index >= len(self._rows) or self._rows[index] != row:
+                parts.append(f"\x1b[{index + 1};1H{row}\x1b[K")
+        for index in range(len(rows), len(self._rows)):
+            parts.append(f"\x1b[{index + 1};1H\x1b[K")  # 清除多余的旧行
+        self._rows = rows
+        if not parts:
+            return False
+        start = time.perf_counter()
+        self._write("".join(parts))
+        cost = time.perf_counter() - start
+        self.frames_written += 1
+        self._next_frame = now + max(self.min_interval, cost * 4)
+        return True
+
+
+def format_timer_row(state):
+    """仪表盘中一个计时器的行文本"""
+    phase = PHASE_LABELS.get(state["phase"], "结束")
+    mins, secs = divmod(math.ceil(state["remaining"] or 0), 60)
+    flag = " [暂停]" if state["paused"] else ""
+    return (f"#{state['timer']:<5} {phase}{' ' * (6 - display_width(phase))} {mins:02d}:{secs:02d}"
+            f"  累计 {state['total_focus_time']:6.1f}  大周期 {state['cycles']}{flag}")
@@ -0,0 +1,252 @@
+import contextlib
+import io
+import json
+import os
+from datetime import datetime
+
+from focus_timer import FocusTimer
+from timer_clock import ScaledClock, VirtualClock
+
+RECORDING_VERSION = 1
+
+# 由用户操作产生、回放时需要重新注入的事件，其余事件都应由计时器自己产生
+INPUT_EVENTS = ("pause", "resume", "stop")
+
+# 比较时忽略的字段：会话开始的墙上时间每次都不同
+IGNORED_FIELDS = ("start",)
+
+REPLAY_MARGIN = 1.0  # 未记录时长上限的录制，回放最多运行到最后一条录制事件之后多少秒
+
+
+class SessionRecorder:
+    """会话录制：记录 FocusTimer.run 的完整事件流，会话结束时写成一个 JSON 文件
+
+    录制内容包括模式和计时设置、随机种子、每次采样的专注时长（focus_start 事件）、
+    暂停/恢复/停止操作以及全部阶段切换，足以在虚拟时钟下重放整个会话。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def attach(self, timer):
+        """订阅计时器事件，会话结束时写入录制文件"""
+        events = []
+
+        def on_event(record):
+            events.append(dict(record))
+            if record["event"] == "session_end":
+                self.save(timer, events)
+                events.clear()
+
+        timer.event_listeners.append(on_event)
+        return on_event
+
+    def save(self, timer, events):
+        """写入一次会话的录制，返回文件路径；失败时返回 None"""
+        settings = {key: value for key, value in timer.plan.machine.settings.items() if key != "sounds"}
+        recording = {
+            "version": RECORDING_VERSION,
+            "mode": timer.mode,
+            "settings": settings,
+            "seed": timer.seed,
+            "start": events[0].get("start") if events else None,
+            "events": events,
+        }
+        start = timer.session_start_time or datetime.now()
+        path = os.path.join(self.directory, f"{start.strftime('%Y%m%d-%H%M%S')}-{timer.mode}.json")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(recording, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            print(f"[WARNING] 写入会话录制失败: {e}")
+            return None
+
+
+def load_recording(path):
+    """读取录制文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        recording = json.load(f)
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"不支持的录制版本: {recording.get('version')}")
+    return recording
+
+
+def find_recordings(paths):
+    """展开文件和目录参数，返回录制文件列表"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(".json"))
+        else:
+            found.append(path)
+    return found
+
+
+class RecordedSampler:
+    """按录制顺序给出专注时长的采样器，录制用完后改用原计时器的采样器"""
+
+    def __init__(self, focus_times, fallback):
+        self.focus_times = list(focus_times)
+        self.fallback = fallback
+        self._index = 0
+
+    def next(self):
+        if self._index < len(self.focus_times):
+            value = self.focus_times[self._index]
+            self._index += 1
+            return value
+        return self.fallback.next()
+
+
+class ScriptedInput:
+    """按录制时间重放用户操作的键盘替身
+
+    每个操作的时间相对于它之前的那条事件：录制中 pause 在 focus_start 之后 42.3 秒，
+    回放时就在回放的 focus_start 之后 42.3 秒按下 P 键。真实会话中打印、铃声带来的
+    毫秒级延迟会累积，按相对时间注入可以保证操作总落在同一个阶段内。
+    """
+
+    def __init__(self, timer, actions, replayed):
+        self.timer = timer
+        self.actions = list(actions)  # [(锚点事件下标, 相对秒数, 事件名)]
+        self.replayed = replayed  # 回放产生的事件列表，用于查找锚点时间
+        self.last_key_time = None
+        self.available = True
+
+    def _due(self):
+        """下一个操作的单调时钟时刻，锚点事件尚未回放到时返回 None"""
+        anchor, offset, _ = self.actions[0]
+        if anchor >= len(self.replayed):
+            return None
+        return self.timer._session_start_mono + self.replayed[anchor]["t"] + offset
+
+    def get(self, timeout=None):
+        clock = self.timer.clock
+        now = clock.monotonic()
+        due = self._due() if self.actions else None
+        if due is None or (timeout is not None and due > now + timeout):
+            if timeout is None:
+                self.timer.stop()  # 录制中没有更多操作却在等待按键：结束回放
+                return None
+            clock.sleep(timeout)
+            return None
+        clock.sleep(due - now)
+        _, _, event = self.actions.pop(0)
+        if event == "stop":
+            self.timer.stop()
+            return None
+        return "p"
+
+    def stop(self):
+        pass
+
+
+def _input_actions(events):
+    """从录制事件中提取用户操作，时间表示为相对前一条事件的秒数"""
+    actions = []
+    for index, record in enumerate(events):
+        if record["event"] in INPUT_EVENTS and index > 0:
+            anchor = index - 1  # 回放的事件与录制一一对应，下标相同
+            actions.append((anchor, record["t"] - events[anchor]["t"], record["event"]))
+    return actions
+
+
+def replay(recording, speed=None):
+    """在虚拟时钟下重新驱动计时器，返回回放产生的事件列表
+
+    speed 为倍速（如 60 表示 1 分钟的会话用 1 秒真实时间），None 表示尽可能快。
+    """
+    mode = recording["mode"]
+    events = recording["events"]
+    start_time = None
+    if recording.get("start"):
+        start_time = datetime.strptime(recording["start"], "%Y-%m-%d %H:%M:%S")
+    clock = VirtualClock(start_time) if not speed else ScaledClock(speed, start_time)
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer = FocusTimer(mode=mode, custom_settings=recording["settings"] if mode == "custom" else None,
+                           clock=clock, headless=True, seed=recording.get("seed"))
+        focus_times = [record["focus_time"] for record in events if record["event"] == "focus_start"]
+        timer.plan.machine.sampler = RecordedSampler(focus_times, timer.sampler)
+        replayed = []
+        timer.event_listeners.append(replayed.append)
+
+        def stop_at_end(record):
+            # 回放到录制的最后一条阶段事件时，让计时器在下一次检查截止时间时结束，
+            # 之后只剩 session_end，不会像录制结束后那样多跑一个阶段
+            if len(replayed) == len(events) - 1 and events[-1]["event"] == "session_end":
+                timer.run_deadline = clock.monotonic()
+
+        timer.event_listeners.append(stop_at_end)
+        timer.keyboard = ScriptedInput(timer, _input_actions(events), replayed)
+        # 录制时 run() 收到的时长上限记在 session_start 中，原样传回；旧录制没有这个字段，
+        # 用最后一条录制事件之后 REPLAY_MARGIN 秒兜底，避免默认/自定义模式在虚拟时钟上一直运行
+        max_duration = events[0].get("max_duration") if events else None
+        if max_duration is None:
+            timer.run_deadline = clock.monotonic() + (events[-1]["t"] if events else 0.0) + REPLAY_MARGIN
+        timer.run(max_duration=max_duration)
+    return replayed
+
+
+def compare_timelines(recorded, replayed, tolerance=0.5):
+    """逐条比较两条时间线，返回差异描述列表（空列表表示一致）
+
+    事件名和字段必须相同（浮点字段允许 tolerance 误差）；时间比较相邻事件的间隔，
+    真实会话中每个阶段几毫秒的打印和铃声延迟不会累积成误报。
+    """
+    problems = []
+    for index, (expected, actual) in enumerate(zip(recorded, replayed)):
+        if expected["event"] != actual["event"]:
+            problems.append(f"第 {index} 条事件不同: 录制 {expected['event']}，回放 {actual['event']}")
+            return problems  # 之后的事件都已错位
+        for key in set(expected) | set(actual):
+            if key in ("t", "event") or key in IGNORED_FIELDS:
+                continue
+            a, b = expected.get(key), actual.get(key)
+            if isinstance(a, float) or isinstance(b, float):
+                if a is None or b is None or abs(a - b) > tolerance:
+                    problems.append(f"第 {index} 条事件 {expected['event']} 的 {key} 不同: 录制 {a}，回放 {b}")
+            elif a != b:
+                problems.append(f"第 {index} 条事件 {expected['event']} 的 {key} 不同: 录制 {a}，回放 {b}")
+        # stop 之后是会话报告和菜单等待，session_end 的时间取决于用户何时作答
+        if index > 0 and recorded[index - 1]["event"] != "stop":
+            gap_expected = expected["t"] - recorded[index - 1]["t"]
+            gap_actual = actual["t"] - replayed[index - 1]["t"]
+            if abs(gap_expected - gap_actual) > tolerance:
+                problems.append(f"第 {index} 条事件 {expected['event']} 距上一事件 "
+                                f"{gap_actual:.3f} 秒，录制为 {gap_expected:.3f} 秒")
+    if len(recorded) != len(replayed):
+        problems.append(f"事件数不同: 录制 {len(recorded)} 条，回放 {len(replayed)} 条")
+    return problems
+
+
+def run_replay(args):
+    """命令行回放入口：逐个回放录制文件并校验时间线，全部一致时返回 0"""
+    paths = find_recordings(args.replay)
+    if not paths:
+        print("[ERROR] 没有找到录制文件")
+        return 1
+    failed = 0
+    for path in paths:
+        try:
+            recording = load_recording(path)
+            replayed = replay(recording, args.speed)
+        except Exception as e:
+            print(f"[ERROR] {path}: 回放失败: {e}")
+            failed += 1
+            continue
+        problems = compare_timelines(recording["events"], replayed, args.tolerance)
+        duration = recording["events"][-1]["t"] if recording["events"] else 0.0
+        if problems:
+            failed += 1
+            print(f"[MISMATCH] {path}（{len(recording['events'])} 条事件，{duration / 60:.1f} 分钟）")
+            for problem in problems[:10]:
+                print(f"   {problem}")
+        else:
+            print(f"[OK] {path}（{len(recording['events'])} 条事件，{duration / 60:.1f} 分钟）")
+    print(f"[REPLAY] 共 {len(paths)} 个录制，{len(paths) - failed} 个一致，{failed} 个不一致")
+    return 1 if failed else 0
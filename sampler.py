@@ -0,0 +1,169 @@
+import math
+import secrets
+
+np = None  # NumPy 在首次采样时才导入，菜单和配置管理不承担其导入开销
+
+# Acklam 标准正态分位数有理逼近的系数（相对误差约 1.15e-9）
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+      3.754408661907416e+00)
+_P_LOW = 0.02425
+
+
+def _numpy():
+    """按需导入 NumPy"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def new_seed():
+    """生成新的随机种子（128 位整数，与 SeedSequence 自动取熵的位数相同），不导入 NumPy"""
+    return secrets.randbits(128)
+
+
+def make_rng(seed, spawn_key=()):
+    """由种子和派生路径创建随机数生成器
+
+    make_rng(seed, (i,)) 与 SeedSequence(seed).spawn(n)[i] 是同一条随机数流：
+    并行的计时器或工作进程各取一个派生编号，得到互不相关的独立流，
+    之后只凭 (种子, 派生编号) 就能逐位重放。
+    """
+    _numpy()
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=tuple(spawn_key)))
+
+
+def norm_cdf(x):
+    """标准正态分布函数 Φ(x)，负半轴用 erfc 保证尾部精度"""
+    return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+
+def norm_ppf(p):
+    """标准正态分位数 Φ⁻¹(p)，对 NumPy 数组逐元素向量化计算"""
+    _numpy()
+    p = np.asarray(p, dtype=np.float64)
+    x = np.empty_like(p)
+
+    lower = p < _P_LOW
+    upper = p > 1.0 - _P_LOW
+    central = ~(lower | upper)
+
+    q = p[central] - 0.5
+    r = q * q
+    num = (((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q
+    den = ((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1.0
+    x[central] = num / den
+
+    for mask, tail, sign in ((lower, p[lower], 1.0), (upper, 1.0 - p[upper], -1.0)):
+        if not mask.any():
+            continue
+        q = np.sqrt(-2.0 * np.log(tail))
+        num = ((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5]
+        den = (((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1.0
+        x[mask] = sign * num / den
+    return x
+
+
+class FocusSampler:
+    """专注时长采样器：均匀分布与截断正态分布共用一条批量采样路径
+
+    截断正态分布按逆 CDF 精确采样：先在 [Φ(a), Φ(b)] 内均匀取值再求分位数，
+    不做拒绝重采样，任何均值/标准差组合都得到正确的截断分布。
+    样本按批预生成，next() 逐个取用，批次耗尽时自动补充。
+    构造时不导入 NumPy，随机数生成器在第一次采样时才创建。
+    没有传入 rng 时由 seed（缺省时新生成）和 spawn_key 确定随机数流，
+    记录这两个值即可重放完全相同的专注时长序列。
+    """
+
+    def __init__(self, distribution, low, high, mean=None, std=None, rng=None, batch_size=1024,
+                 seed=None, spawn_key=()):
+        if high < low:
+            low, high = high, low  # 与原先 random.uniform 一致，上下限颠倒时按区间处理
+        self.distribution = distribution
+        self.low = float(low)
+        self.high = float(high)
+        self._rng = rng
+        # 传入现成的 rng 时种子未知（None）
+        if rng is not None:
+            seed, spawn_key = None, ()
+        elif seed is None:
+            seed = new_seed()
+        self.seed = seed
+        self.spawn_key = tuple(spawn_key)
+        self.batch_size = batch_size
+        self.draws = 0  # 已取出的样本数，与种子一起确定随机数流的位置
+        self._batch = None
+        self._index = 0
+
+        # 标准差为 0（或无效）时正态分布退化为固定时长：均值截到区间内
+        self._degenerate = distribution == "normal" and (std is None or std <= 0)
+        if self._degenerate:
+            self.mean = float(mean)
+            self.std = 0.0
+        elif distribution == "normal":
+            self.mean = float(mean)
+            self.std = float(std)
+            a = (self.low - self.mean) / self.std
+            b = (self.high - self.mean) / self.std
+            # 区间整体位于均值右侧时按对称性在左侧采样再取反，保证尾部精度
+            self._flip = a > 0
+            if self._flip:
+                a, b = -b, -a
+            self._a = a
+            self._b = b
+            self._p_low = norm_cdf(a)
+            self._p_high = norm_cdf(b)
+        elif distribution != "uniform":
+            raise ValueError(f"不支持的分布模式: {distribution}")
+
+    @property
+    def rng(self):
+        """随机数生成器，首次访问时由种子创建"""
+        if self._rng is None:
+            self._rng = make_rng(self.seed, self.spawn_key)
+        return self._rng
+
+    def sample(self, n):
+        """批量采样 n 个专注时长，返回 NumPy 数组"""
+        if self.distribution == "uniform":
+            return self.rng.uniform(self.low, self.high, n)
+
+        if self._degenerate:
+            return _numpy().full(n, min(max(self.mean, self.low), self.high))
+        if self._p_high > self._p_low:
+            z = norm_ppf(self.rng.uniform(self._p_low, self._p_high, n))
+        else:
+            # 区间位于极端尾部（概率质量低于浮点精度），用指数分布近似尾部形状
+            z = self._b - self.rng.exponential(1.0 / max(-self._b, 1.0), n)
+        z = np.clip(z, self._a, self._b)
+        if self._flip:
+            z = -z
+        return np.clip(self.mean + self.std * z, self.low, self.high)
+
+    def next(self):
+        """取出一个专注时长，预生成的批次用完时自动补充"""
+        if self._batch is None or self._index >= len(self._batch):
+            self._batch = self.sample(self.batch_size)
+            self._index = 0
+        value = self._batch[self._index]
+        self._index += 1
+        self.draws += 1
+        return float(value)
+
+    def skip(self, n):
+        """跳过 n 个样本，把随机数流快进到已取用 n 个样本之后的位置（用于恢复检查点）"""
+        while n > 0:
+            if self._batch is None or self._index >= len(self._batch):
+                self._batch = self.sample(self.batch_size)
+                self._index = 0
+            step = min(n, len(self._batch) - self._index)
+            self._index += step
+            self.draws += step
+            n -= step
@@ -0,0 +1,368 @@
+import heapq
+import itertools
+import threading
+from collections import deque
+
+from cycle_plan import CycleStateMachine
+from focus_timer import build_timer_settings
+from sampler import FocusSampler, new_seed
+from timer_clock import SYSTEM_CLOCK
+
+
+class ScheduledTimer:
+    """调度器中的一个计时器：状态机 + 截止时间 + 暂停记账"""
+
+    __slots__ = ("timer_id", "machine", "start", "deadline", "remaining", "paused", "generation",
+                 "total_pause_time", "pause_start", "phase_index", "slot", "config_name", "saved_at")
+
+    def __init__(self, timer_id, machine, start):
+        self.timer_id = timer_id
+        self.machine = machine
+        self.start = start  # 开始时的单调时钟读数
+        self.phase_index = -1  # 当前阶段下标
+        self.slot = None  # 检查点槽位
+        self.config_name = None  # 使用的已保存配置名称
+        self.saved_at = None  # 最近一次写检查点的单调时钟读数
+        self.deadline = None  # 当前阶段截止时间（单调时钟）
+        self.remaining = None  # 暂停时冻结的剩余秒数
+        self.paused = False
+        self.generation = 0  # 截止时间每次变化都递增，堆中旧条目据此失效
+        self.total_pause_time = 0.0
+        self.pause_start = None
+
+
+class TimerScheduler:
+    """单线程多计时器调度器：所有计时器的截止时间放在一个最小堆中
+
+    不为每个计时器创建线程或进程；run() 每次睡到最早的截止时间，
+    处理所有到期的阶段切换。pause/resume/stop 可以从其他线程调用。
+    事件通过 on_event(timer_id, record) 回调发布，格式与 FocusTimer.emit 相同。
+    各计时器的随机数流由调度器的根种子依次派生（SeedSequence.spawn），互不相关，
+    session_start 事件记录种子和派生编号，同一根种子下整个调度器可逐位重放。
+    传入 CheckpointFile 时每个计时器占一个槽位，阶段切换和暂停/恢复时原地改写，
+    超过 checkpoint_interval 秒没有写过的计时器会被刷新（每轮最多 refresh_batch 个，
+    到期的阶段切换优先处理，不会被集中写入阻塞），
+    进程重启后用 restore() 恢复。
+    """
+
+    def __init__(self, clock=None, on_event=None, record_lateness=False, seed=None, checkpoint=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.seed = seed if seed is not None else new_seed()  # 根种子
+        self.on_event = on_event
+        self.timers = {}
+        self.transitions = 0  # 已处理的阶段切换次数
+        self.lateness = [] if record_lateness else None  # 每次切换的延迟（秒）
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._streams = itertools.count()  # 随机数流的派生编号
+        self._cond = threading.Condition()
+        self._stopping = False
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = 5.0  # 检查点的最长刷新间隔（秒）
+        self.refresh_batch = 256  # run() 每轮最多刷新的检查点数
+        self._saves = deque()  # 按写入时间排列的 (写入时刻, 计时器)
+        self._free_slots = []  # 已结束计时器释放的检查点槽位
+        self._next_slot = 0
+
+    def add(self, mode="default", custom_settings=None, timer_id=None, rng=None, config_name=None,
+            stream=None):
+        """添加一个计时器并立即开始第一个阶段，返回计时器编号
+
+        stream 指定随机数流的派生编号，多个调度器共用根种子时由调用方统一分配，避免重复。
+        """
+        settings = build_timer_settings(mode, custom_settings)
+        with self._cond:
+            if stream is None:
+                stream = next(self._streams)
+            sampler = FocusSampler(settings["focus_distribution"], settings["min_focus_time"],
+                                   settings["max_single_focus_time"], settings["focus_mean"],
+                                   settings["focus_std"], rng=rng, batch_size=64,
+                                   seed=self.seed, spawn_key=(stream,))
+            if timer_id is None:
+                timer_id = next(self._ids)
+            now = self.clock.monotonic()
+            timer = ScheduledTimer(timer_id, CycleStateMachine(settings, mode, sampler), now)
+            timer.config_name = config_name
+            self._assign_slot(timer)
+            self.timers[timer_id] = timer
+            self._emit(timer, now, "session_start", mode=mode, seed=sampler.seed,
+                       spawn_key=list(sampler.spawn_key))
+            self._enter_next_phase(timer, now, now)
+            self._cond.notify()
+        return timer_id
+
+    def restore(self):
+        """从检查点恢复所有未结束的计时器，返回恢复的计时器编号列表
+
+        随机数流按记录的种子、派生编号重建后跳过已取用的样本，之后的专注时长与中断前一致；
+        进程停止期间计为暂停，各计时器当前阶段的剩余时间与最后一次写入时相同。
+        """
+        if self.checkpoint is None:
+            return []
+        restored = []
+        with self._cond:
+            now = self.clock.monotonic()
+            wall_now = self.clock.now().timestamp()
+            used_slots = set()
+            for slot, state in self.checkpoint.read_all():
+                if state["phase"] is None:
+                    continue
+                timer = self._restore_timer(state, slot, now, wall_now)
+                used_slots.add(slot)
+                restored.append(timer.timer_id)
+            self._next_slot = max(self._next_slot, max(used_slots, default=-1) + 1)
+            self._free_slots = [slot for slot in range(self._next_slot) if slot not in used_slots]
+            self._cond.notify()
+        return restored
+
+    def adopt(self, state):
+        """接管另一个调度器（或其检查点）中的计时器，返回新的计时器编号
+
+        state 为检查点记录的状态字典，计时器从记录时的位置继续，写入本调度器的检查点槽位。
+        """
+        with self._cond:
+            timer = self._restore_timer(state, None, self.clock.monotonic(), self.clock.now().timestamp())
+            self._cond.notify()
+        return timer.timer_id
+
+    def _restore_timer(self, state, slot, now, wall_now):
+        """按检查点状态重建计时器并排入堆中；slot 为 None 时分配新槽位"""
+        if state["mode"] == "custom":
+            settings = build_timer_settings("custom", state["settings"])
+        else:
+            settings = build_timer_settings(state["mode"])
+        sampler = FocusSampler(settings["focus_distribution"], settings["min_focus_time"],
+                               settings["max_single_focus_time"], settings["focus_mean"],
+                               settings["focus_std"], batch_size=64, seed=state["seed"],
+                               spawn_key=state["spawn_key"])
+        sampler.skip(state["draws"])
+        machine = CycleStateMachine(settings, state["mode"], sampler)
+        machine.phase = state["phase"]
+        machine.focus_time = state["focus_time"]
+        machine.total_focus_time = state["total_focus_time"]
+        machine.cycle_count = state["cycle_count"]
+        downtime = max(wall_now - state["wall_time"], 0.0)
+        timer = ScheduledTimer(next(self._ids), machine, now - state["elapsed"] - downtime)
+        timer.phase_index = state["phase_index"]
+        timer.config_name = state["config_name"]
+        timer.total_pause_time = state["total_pause_time"] + downtime
+        if slot is None:
+            self._assign_slot(timer)
+        else:
+            timer.slot = slot
+        self.timers[timer.timer_id] = timer
+        self._emit(timer, now, "session_start", mode=state["mode"], seed=sampler.seed,
+                   spawn_key=list(sampler.spawn_key), resumed=True)
+        if state["paused"]:
+            timer.paused = True
+            timer.pause_start = now
+            timer.remaining = state["remaining"]
+        else:
+            self._schedule(timer, now + state["remaining"])
+        self._save(timer, now)  # 停机时间计入暂停后立即写回
+        if state["seed"] == self.seed and state["spawn_key"]:
+            # 同一根种子下新计时器的派生编号接在已恢复的之后，避免复用随机数流
+            self._streams = itertools.count(max(next(self._streams), state["spawn_key"][0] + 1))
+        return timer
+
+    def pause(self, timer_id):
+        """暂停计时器，冻结当前阶段的剩余时间"""
+        with self._cond:
+            timer = self.timers.get(timer_id)
+            if timer is None or timer.paused:
+                return False
+            now = self.clock.monotonic()
+            timer.remaining = max(timer.deadline - now, 0.0)
+            timer.paused = True
+            timer.pause_start = now
+            timer.generation += 1
+            self._emit(timer, now, "pause")
+            self._save(timer, now)
+            return True
+
+    def resume(self, timer_id):
+        """恢复计时器，截止时间顺延暂停时长"""
+        with self._cond:
+            timer = self.timers.get(timer_id)
+            if timer is None or not timer.paused:
+                return False
+            now = self.clock.monotonic()
+            timer.total_pause_time += now - timer.pause_start
+            timer.pause_start = None
+            timer.paused = False
+            self._schedule(timer, now + timer.remaining)
+            timer.remaining = None
+            self._emit(timer, now, "resume")
+            self._save(timer, now)
+            self._cond.notify()
+            return True
+
+    def stop(self, timer_id):
+        """停止并移除计时器"""
+        with self._cond:
+            timer = self.timers.pop(timer_id, None)
+            if timer is None:
+                return False
+            timer.generation += 1
+            self._end_session(timer, self.clock.monotonic())
+            return True
+
+    def snapshot(self):
+        """所有计时器的当前状态列表（剩余秒数、阶段、暂停、累计专注、大周期数）"""
+        with self._cond:
+            now = self.clock.monotonic()
+            return [{"timer": timer.timer_id, "phase": timer.machine.phase, "paused": timer.paused,
+                     "remaining": timer.remaining if timer.paused else max(timer.deadline - now, 0.0),
+                     "total_focus_time": timer.machine.total_focus_time,
+                     "cycles": timer.machine.cycle_count}
+                    for timer in self.timers.values()]
+
+    def shutdown(self):
+        """让 run() 尽快返回"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+    def run(self, until=None):
+        """处理阶段切换，直到所有计时器结束、到达 until（单调时钟）或调用 shutdown()"""
+        with self._cond:
+            self._stopping = False
+            while not self._stopping:
+                now = self.clock.monotonic()
+                if until is not None and now >= until:
+                    break
+                # 先处理所有已到期的计时器，检查点刷新不会推迟阶段切换
+                while self._heap and self._heap[0][0] <= now:
+                    deadline, _, generation, timer = heapq.heappop(self._heap)
+                    if timer.generation != generation:
+                        continue
+                    if self.lateness is not None:
+                        self.lateness.append(now - deadline)
+                    self._fire(timer, deadline, now)
+                wake = until
+                if self._saves:
+                    # 阶段很长时也定期更新剩余时间，进程被杀时最多丢失一个间隔；
+                    # 每轮最多刷新 refresh_batch 个，其余留到下一轮，中间可以处理新到期的切换
+                    self._refresh_checkpoints(now, self.refresh_batch)
+                    if self._saves:
+                        due = self._saves[0][0] + self.checkpoint_interval
+                        wake = due if wake is None else min(wake, due)
+                # 丢弃已失效的堆条目（暂停、停止或截止时间已变化）
+                while self._heap and self._heap[0][3].generation != self._heap[0][2]:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    wake = self._heap[0][0] if wake is None else min(self._heap[0][0], wake)
+                elif not self.timers and until is None:
+                    break
+                # 处理切换和刷新本身要花时间，按当前时刻计算等待时长
+                self._wait(None if wake is None else max(wake - self.clock.monotonic(), 0.0))
+
+    def _wait(self, timeout):
+        """等待到超时或有新命令；虚拟时钟直接推进时间"""
+        if self.clock is SYSTEM_CLOCK:
+            self._cond.wait(timeout)
+        elif timeout is not None:
+            self.clock.sleep(timeout)
+        else:
+            self._stopping = True  # 虚拟时钟下没有外部命令能唤醒
+
+    def _schedule(self, timer, deadline):
+        timer.deadline = deadline
+        timer.generation += 1
+        heapq.heappush(self._heap, (deadline, next(self._seq), timer.generation, timer))
+
+    def _fire(self, timer, deadline, now):
+        """截止时间到：结束当前阶段并进入下一阶段"""
+        self.transitions += 1
+        self._emit(timer, now, f"{timer.machine.phase}_end")
+        # 以计划截止时间为起点排下一阶段，处理延迟不会累积
+        self._enter_next_phase(timer, deadline, now)
+
+    def _enter_next_phase(self, timer, start, now):
+        step = timer.machine.advance()
+        if step is None:
+            self.timers.pop(timer.timer_id, None)
+            self._end_session(timer, now)
+            return
+        phase, seconds = step
+        timer.phase_index += 1
+        if phase == "long_rest":
+            self._emit(timer, now, "cycle", cycle=timer.machine.cycle_count)
+        if phase == "focus":
+            self._emit(timer, now, "focus_start", focus_time=timer.machine.focus_time, seconds=seconds)
+        else:
+            self._emit(timer, now, f"{phase}_start", seconds=seconds)
+        self._schedule(timer, start + seconds)
+        self._save(timer, now)
+
+    def _assign_slot(self, timer):
+        if self.checkpoint is None:
+            return
+        if self._free_slots:
+            timer.slot = self._free_slots.pop()
+        else:
+            timer.slot = self._next_slot
+            self._next_slot += 1
+
+    def _refresh_checkpoints(self, now, limit):
+        """重写超过 checkpoint_interval 秒未更新的检查点，最多写 limit 个"""
+        saves = self._saves
+        while limit > 0 and saves and saves[0][0] + self.checkpoint_interval <= now:
+            saved_at, timer = saves.popleft()
+            if timer.saved_at == saved_at and timer.slot is not None:  # 之后没有再写过，且仍在运行
+                self._save(timer, now)
+                limit -= 1
+
+    def _save(self, timer, now):
+        """把计时器状态写入它的检查点槽位"""
+        if self.checkpoint is None or timer.slot is None:
+            return
+        timer.saved_at = now
+        self._saves.append((now, timer))
+        machine = timer.machine
+        total_pause_time = timer.total_pause_time
+        if timer.paused:
+            total_pause_time += now - timer.pause_start
+        wall_time = self.clock.now().timestamp()
+        try:
+            self.checkpoint.write(timer.slot, {
+                "mode": machine.mode,
+                "phase": machine.phase,
+                "paused": timer.paused,
+                "cycle_count": machine.cycle_count,
+                "phase_index": timer.phase_index,
+                "spawn_key": machine.sampler.spawn_key,
+                "draws": machine.sampler.draws,
+                "focus_time": machine.focus_time,
+                "total_focus_time": machine.total_focus_time,
+                "remaining": timer.remaining if timer.paused else timer.deadline - now,
+                "elapsed": now - timer.start,
+                "total_pause_time": total_pause_time,
+                "wall_time": wall_time,
+                "session_start": wall_time - (now - timer.start),
+                "settings": machine.settings,
+                "seed": machine.sampler.seed,
+                "config_name": timer.config_name,
+            })
+        except Exception as e:
+            print(f"[WARNING] 写入检查点失败: {e}")
+            self.checkpoint = None
+
+    def _end_session(self, timer, now):
+        if timer.slot is not None and self.checkpoint is not None:
+            self.checkpoint.clear(timer.slot)
+            self._free_slots.append(timer.slot)
+            timer.slot = None
+        if timer.paused:
+            timer.total_pause_time += now - timer.pause_start
+        self._emit(timer, now, "session_end", cycles=timer.machine.cycle_count,
+                   total_focus_time=timer.machine.total_focus_time,
+                   total_pause_time=timer.total_pause_time)
+
+    def _emit(self, timer, now, event, **data):
+        if self.on_event is None:
+            return
+        record = {"t": now - timer.start, "event": event}
+        record.update(data)
+        self.on_event(timer.timer_id, record)
@@ -0,0 +1,210 @@
+import asyncio
+import itertools
+import json
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from async_timer import AsyncFocusTimer
+from focus_timer import ConfigManager
+
+CLIENT_QUEUE_SIZE = 1000  # 每个事件流客户端最多积压的阶段事件数
+
+
+class EventClient:
+    """一个 SSE 事件流连接：阶段事件立即推送，tick 每秒合并推送一次"""
+
+    def __init__(self, watch):
+        self.watch = watch  # 关注的计时器编号集合，None 表示全部
+        self.queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+        self.dropped = 0  # 因积压被丢弃的事件数
+
+    def wants(self, timer_id):
+        return self.watch is None or timer_id in self.watch
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class TimerServer:
+    """本地 HTTP 控制与事件流服务
+
+    POST /timers                {"config": 名称} 或 {"mode": "default"|"test"} 创建计时器
+    GET  /timers                列出计时器状态
+    POST /timers/<id>/pause     暂停；/resume 恢复；/stop 停止
+    GET  /events?timers=1,2     SSE 事件流（省略 timers 表示全部）
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, tick_interval=1.0):
+        self.host = host
+        self.port = port
+        self.tick_interval = tick_interval  # tick 合并推送间隔（秒）
+        self.timers = {}
+        self.clients = set()
+        self._ids = itertools.count(1)
+        self._server = None
+        self._configs = None  # 第一次按配置名创建计时器时才打开配置库
+
+    async def start(self):
+        """开始监听"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        return self._server
+
+    async def serve_forever(self):
+        """监听直到被取消"""
+        server = await self.start()
+        print(f"[SERVER] 计时器服务已启动: http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    def create_timer(self, body):
+        """根据请求创建并启动计时器，返回编号"""
+        config_name = body.get("config")
+        seed = body.get("seed")
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+            raise ValueError(f"随机种子必须是非负整数: {seed}")
+        if config_name:
+            if self._configs is None:
+                self._configs = ConfigManager()
+            settings = self._configs.get_config(config_name)
+            if settings is None:
+                raise LookupError(f"未找到配置 '{config_name}'")
+            timer = AsyncFocusTimer(mode="custom", custom_settings=settings, seed=seed)
+        else:
+            timer = AsyncFocusTimer(mode=body.get("mode", "default"), seed=seed)
+        timer_id = next(self._ids)
+        self.timers[timer_id] = timer
+        queue = timer.subscribe()  # 在 run() 开始前登记，第一个阶段的事件也能转发
+        task = asyncio.get_running_loop().create_task(timer.run())
+        asyncio.get_running_loop().create_task(self._forward_events(timer_id, timer, queue))
+        task.add_done_callback(lambda _: self.timers.pop(timer_id, None))
+        return timer_id
+
+    async def _forward_events(self, timer_id, timer, queue):
+        """把计时器的阶段事件转发给关注它的客户端"""
+        async for record in timer.events(queue):
+            message = dict(record, timer=timer_id, ts=time.time())
+            for client in self.clients:
+                if client.wants(timer_id):
+                    client.push(message)
+
+    def timer_state(self, timer_id, timer, now):
+        """计时器当前状态快照"""
+        remaining = None
+        if timer.deadline is not None:
+            remaining = timer.deadline - (timer._pause_start if timer.is_paused else now)
+        return {"timer": timer_id, "phase": timer.phase, "paused": timer.is_paused,
+                "remaining": None if remaining is None else round(max(remaining, 0.0), 1),
+                "total_focus_time": timer.total_focus_time, "cycles": timer.cycle_count,
+                "seed": timer.seed}
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = {}
+            length = int(headers.get("content-length", 0))
+            if length:
+                body = json.loads(await reader.readexactly(length))
+            url = urlsplit(target)
+            if method == "GET" and url.path == "/events":
+                await self._stream_events(writer, parse_qs(url.query))
+                return
+            status, payload = await self._dispatch(method, url.path.strip("/").split("/"), body)
+            self._write_json(writer, status, payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self._write_json(writer, 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, parts, body):
+        """路由 REST 请求，返回 (状态码, 响应体)"""
+        if parts == ["timers"]:
+            if method == "POST":
+                try:
+                    return 201, {"timer": self.create_timer(body)}
+                except LookupError as e:
+                    return 404, {"error": str(e)}
+            if method == "GET":
+                now = asyncio.get_running_loop().time()
+                return 200, [self.timer_state(i, t, now) for i, t in self.timers.items()]
+        if len(parts) == 3 and parts[0] == "timers" and method == "POST":
+            timer = self.timers.get(int(parts[1]))
+            if timer is None:
+                return 404, {"error": "计时器不存在"}
+            if parts[2] == "pause":
+                return 200, {"changed": await timer.pause()}
+            if parts[2] == "resume":
+                return 200, {"changed": await timer.resume()}
+            if parts[2] == "stop":
+                timer.stop()
+                return 200, {"changed": True}
+        return 404, {"error": "未知请求"}
+
+    def _write_json(self, writer, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+
+    async def _stream_events(self, writer, query):
+        """SSE 事件流：阶段事件立即发送，所有关注计时器的 tick 合并为每秒一条"""
+        watch = None
+        if "timers" in query:
+            watch = {int(value) for value in query["timers"][0].split(",") if value}
+        client = EventClient(watch)
+        self.clients.add(client)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick_interval
+        try:
+            while True:
+                timeout = next_tick - loop.time()
+                if timeout > 0:
+                    try:
+                        message = await asyncio.wait_for(client.queue.get(), timeout)
+                        writer.write(self._sse(message["event"], message))
+                        # 顺便把已积压的阶段事件一起写出，减少系统调用
+                        while not client.queue.empty():
+                            message = client.queue.get_nowait()
+                            writer.write(self._sse(message["event"], message))
+                        await writer.drain()
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                now = loop.time()
+                next_tick = now + self.tick_interval
+                states = [self.timer_state(i, t, now) for i, t in self.timers.items() if client.wants(i)]
+                writer.write(self._sse("tick", {"ts": time.time(), "timers": states}))
+                await writer.drain()
+        finally:
+            self.clients.discard(client)
+
+    @staticmethod
+    def _sse(event, payload):
+        data = json.dumps(payload, ensure_ascii=False)
+        return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+def serve(host="127.0.0.1", port=8765):
+    """命令行入口：运行计时器服务直到 Ctrl+C"""
+    try:
+        asyncio.run(TimerServer(host, port).serve_forever())
+    except KeyboardInterrupt:
+        print("\n[SERVER] 服务已停止")
@@ -0,0 +1,287 @@
+import math
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+from checkpoint import MODE_CODES, MODE_NAMES, PHASE_CODES, PHASE_NAMES, NO_PHASE
+from journal import EVENT_CODES, EVENT_NAMES
+
+DEFAULT_NAME = "focus_timer_status"  # 交互计时器默认使用的共享内存名称
+STATE_MAGIC = b"FTSS"
+STATE_VERSION = 1
+RING_SLOTS = 256
+READ_TIMEOUT = 0.5  # 读者等待一份完整状态的最长秒数
+
+# 共享内存布局（小端）：
+#   0    文件头    魔数 | 版本 | 事件环槽位数 | 写入进程 pid
+#   16   序号      seqlock 计数，奇数表示正在写入
+#   24   状态      模式 | 阶段 | 是否暂停 | 是否运行 | 已完成大周期 | 事件总数 | 更新时的墙钟时间 |
+#                  剩余秒数 | 阶段秒数 | 当前专注时长 | 累计专注 | 总暂停秒数 | 会话开始的墙钟时间
+#   128  事件环    每槽：事件编号 + 1（0 表示正在写入）| 事件代码 | 会话内秒数 | 阶段秒数 | 专注时长
+_HEADER = struct.Struct("<4sHHI4x")
+_SEQ = struct.Struct("<Q")
+_STATE = struct.Struct("<BBBBIQddddddd")
+_SLOT = struct.Struct("<QB7xddd")
+_SLOT_INDEX = struct.Struct("<Q")
+SEQ_OFFSET = _HEADER.size
+STATE_OFFSET = SEQ_OFFSET + _SEQ.size
+RING_OFFSET = 128
+
+_published = set()  # 本进程创建的共享内存名称
+
+
+def segment_size(slots=RING_SLOTS):
+    return RING_OFFSET + slots * _SLOT.size
+
+
+def _attach(name):
+    """只读方式打开已有的共享内存，不让本进程退出时删除它"""
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix" and name not in _published:
+        # Python 3.13 之前打开已有的共享内存也会登记到 resource_tracker，
+        # 读者进程退出时会把写入者的共享内存删掉
+        from multiprocessing import resource_tracker
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+class StatePublisher:
+    """把计时器的实时状态发布到共享内存
+
+    状态是一个由 seqlock 保护的定长结构：写入前后各把序号加一，读者看到奇数或前后序号不同
+    就重读，读写都只是对映射内存的 struct 读写，没有系统调用。事件另外写入一个定长环形
+    缓冲区，读者按事件编号跟读，落后超过一圈时可以知道丢了多少条。
+    只在阶段切换和暂停/恢复时写入；读者根据“更新时的墙钟时间 + 剩余秒数”自己推算剩余时间。
+    """
+
+    def __init__(self, name=DEFAULT_NAME, slots=RING_SLOTS):
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(slots))
+        except FileExistsError:
+            # 已有另一个计时器在发布，改用带 pid 的名称
+            name = f"{name}_{os.getpid()}"
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(slots))
+        self.name = name
+        _published.add(name)
+        self.slots = slots
+        self._buf = self._shm.buf
+        self._seq = 0
+        self._events = 0
+        self._state = [MODE_CODES["default"], NO_PHASE, 0, 0, 0, 0, 0.0, 0.0, 0.0, math.nan, 0.0, 0.0, 0.0]
+        _HEADER.pack_into(self._buf, 0, STATE_MAGIC, STATE_VERSION, slots, os.getpid())
+        self._write_state()
+
+    def attach(self, timer):
+        """订阅计时器事件"""
+        timer.event_listeners.append(lambda record: self.on_event(timer, record))
+
+    def on_event(self, timer, record):
+        """根据一条事件更新状态并写入事件环"""
+        event = record["event"]
+        code = EVENT_CODES.get(event)
+        if code is None or event == "bell":
+            return
+        state = self._state
+        seconds = record.get("seconds")
+        if event == "session_start":
+            state[0] = MODE_CODES.get(timer.mode, 0)
+            state[1] = NO_PHASE
+            state[3] = 1
+            state[12] = timer.session_start_time.timestamp()
+            state[7] = state[8] = 0.0
+        elif event.endswith("_start"):
+            state[1] = PHASE_CODES[event[:-len("_start")]]
+            state[7] = state[8] = seconds
+        elif event.endswith("_end") and event != "session_end":
+            state[7] = 0.0
+        elif event in ("pause", "resume") and timer.deadline is not None:
+            # 暂停时冻结剩余时间；恢复时截止时间已顺延
+            now = timer.pause_start_time if event == "pause" else timer.clock.monotonic()
+            state[7] = max(timer.deadline - now, 0.0)
+        elif event in ("stop", "session_end"):
+            state[3] = 0
+        state[2] = 1 if timer.is_paused else 0
+        state[4] = timer.cycle_count
+        state[6] = timer.clock.now().timestamp()
+        state[9] = timer.focus_time if timer.focus_time is not None else math.nan
+        state[10] = timer.total_focus_time
+        state[11] = timer.total_pause_time
+
+        # 先把槽位编号清零再写内容，最后写入编号，读者据此判断槽位是否完整
+        n = self._events
+        offset = RING_OFFSET + (n % self.slots) * _SLOT.size
+        _SLOT_INDEX.pack_into(self._buf, offset, 0)
+        _SLOT.pack_into(self._buf, offset, 0, code, record["t"],
+                        seconds if seconds is not None else math.nan,
+                        record.get("focus_time", math.nan))
+        _SLOT_INDEX.pack_into(self._buf, offset, n + 1)
+        self._events = state[5] = n + 1
+        self._write_state()
+
+    def _write_state(self):
+        buf = self._buf
+        self._seq += 1
+        _SEQ.pack_into(buf, SEQ_OFFSET, self._seq)  # 奇数：正在写入
+        _STATE.pack_into(buf, STATE_OFFSET, *self._state)
+        self._seq += 1
+        _SEQ.pack_into(buf, SEQ_OFFSET, self._seq)
+
+    def close(self):
+        """停止发布并删除共享内存"""
+        if self._shm is None:
+            return
+        self._state[3] = 0
+        self._write_state()
+        self._buf = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        _published.discard(self.name)
+        self._shm = None
+
+
+class StateReader:
+    """读取 StatePublisher 发布的状态，可以有任意多个读者进程同时读取"""
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.name = name
+        self._shm = _attach(name)
+        self._buf = self._shm.buf
+        magic, version, self.slots, self.pid = _HEADER.unpack_from(self._buf, 0)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            self.close()
+            raise ValueError(f"不是计时器状态共享内存: {name}")
+
+    def read(self, now=None, timeout=READ_TIMEOUT):
+        """读取一份一致的状态快照；remaining 已按当前墙钟时间推算
+
+        timeout 秒内都读不到完整的状态（写入者在写入中途被杀死，序号停在奇数）时抛出 TimeoutError。
+        """
+        buf = self._buf
+        spins = 0
+        deadline = None
+        while True:
+            (seq,) = _SEQ.unpack_from(buf, SEQ_OFFSET)
+            if not seq & 1:
+                values = _STATE.unpack_from(buf, STATE_OFFSET)
+                if _SEQ.unpack_from(buf, SEQ_OFFSET)[0] == seq:
+                    break
+            spins += 1
+            if spins % 1000 == 0:
+                if deadline is None:
+                    deadline = time.monotonic() + timeout
+                elif time.monotonic() >= deadline:
+                    raise TimeoutError(f"计时器状态不完整（写入进程 {self.pid} 可能在写入中途退出）")
+                time.sleep(0)  # 写入者被挂起时让出 CPU
+        (mode, phase, paused, running, cycle_count, events, updated, remaining, phase_seconds,
+         focus_time, total_focus_time, total_pause_time, session_start) = values
+        if running and not paused and phase != NO_PHASE:
+            remaining = max(remaining - ((now if now is not None else time.time()) - updated), 0.0)
+        return {
+            "pid": self.pid,
+            "mode": MODE_NAMES.get(mode),
+            "phase": PHASE_NAMES.get(phase),
+            "paused": bool(paused),
+            "running": bool(running),
+            "cycle_count": cycle_count,
+            "events": events,
+            "updated": updated,
+            "remaining": remaining,
+            "phase_seconds": phase_seconds,
+            "focus_time": None if math.isnan(focus_time) else focus_time,
+            "total_focus_time": total_focus_time,
+            "total_pause_time": total_pause_time,
+            "session_start": session_start or None,
+        }
+
+    def events(self, since=0):
+        """读取编号从 since 开始的事件，返回 (事件列表, 下一个编号, 丢失的事件数)"""
+        total = self.read()["events"]
+        start = max(since, total - self.slots)
+        lost = start - since
+        records = []
+        for n in range(start, total):
+            offset = RING_OFFSET + (n % self.slots) * _SLOT.size
+            index, code, t, seconds, focus_time = _SLOT.unpack_from(self._buf, offset)
+            if index != n + 1 or _SLOT_INDEX.unpack_from(self._buf, offset)[0] != n + 1:
+                lost += 1  # 读取期间被新事件覆盖
+                continue
+            record = {"t": t, "event": EVENT_NAMES.get(code, "unknown")}
+            if not math.isnan(seconds):
+                record["seconds"] = seconds
+            if not math.isnan(focus_time):
+                record["focus_time"] = focus_time
+            records.append(record)
+        return records, total, lost
+
+    def close(self):
+        if self._shm is not None:
+            self._buf = None
+            self._shm.close()
+            self._shm = None
+
+
+PHASE_LABELS = {"focus": "专注", "short_rest": "短休息", "long_rest": "大休息"}
+
+
+def format_status(state):
+    """把状态快照格式化为一行，适合状态栏"""
+    if not state["running"]:
+        return f"[STATUS] 未在计时（累计专注 {state['total_focus_time']:.1f}，完成 {state['cycle_count']} 个大周期）"
+    if state["phase"] is None:
+        return "[STATUS] 会话已开始"
+    mins, secs = divmod(math.ceil(state["remaining"]), 60)
+    unit = "秒" if state["mode"] == "test" else "分钟"
+    parts = [f"{PHASE_LABELS[state['phase']]} {mins:02d}:{secs:02d}",
+             f"累计专注 {state['total_focus_time']:.1f} {unit}",
+             f"大周期 {state['cycle_count']}"]
+    if state["paused"]:
+        parts.append("已暂停")
+    return "[STATUS] " + " | ".join(parts)
+
+
+def run_status(args):
+    """命令行 status 入口：打印一次状态，--watch 时持续刷新并跟读事件"""
+    from focus_timer import format_event
+    try:
+        reader = StateReader(args.status)
+    except FileNotFoundError:
+        print(f"[INFO] 没有正在运行的计时器（共享内存 {args.status} 不存在）")
+        return 1
+    except Exception as e:
+        print(f"[ERROR] 无法读取计时器状态: {e}")
+        return 1
+    try:
+        if not args.watch:
+            print(format_status(reader.read()))
+            return 0
+        # 终端上状态行原地刷新，事件行打印在它上方；输出重定向时每秒一行
+        status_end = "\033[K" if sys.stdout.isatty() else "\n"
+        line_start = "\r\033[K" if sys.stdout.isatty() else ""
+        since = max(reader.read()["events"] - 10, 0)  # 先显示最近的几条事件
+        while True:
+            try:
+                records, since, lost = reader.events(since)
+                if lost:
+                    print(f"{line_start}[WARNING] 读取落后，丢失 {lost} 条事件")
+                for record in records:
+                    print(line_start + format_event(record))
+                status = format_status(reader.read())
+            except TimeoutError as e:
+                status = f"[WARNING] {e}"
+            print(line_start + status, end=status_end, flush=True)
+            time.sleep(1.0)
+    except TimeoutError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        reader.close()
@@ -0,0 +1,196 @@
+"""音效资源包：把所有音效预先解码、重采样为混音器输出格式的原始 PCM，打包成一个文件
+
+用法：
+    python sound_bundle.py                         # 默认音效 + 全部已保存配置中的音效
+    python sound_bundle.py --output sounds.bundle --frequency 48000
+
+文件格式（小端）：
+    文件头    魔数 FTSB | 版本 | 采样率 | 采样格式（pygame 的 size，如 -16）| 声道数 | 条目数
+    索引      每条：键长度 | 键（UTF-8）| 数据偏移 | 数据长度 | 源文件大小 | 源文件修改时间（纳秒）
+    数据      各音效的 PCM，按页对齐
+
+键是音效文件相对资源包所在目录的路径（目录外的文件用绝对路径），
+PyInstaller 每次把资源解压到不同的 _MEIPASS 目录也能命中。
+运行时整个文件只读地映射到内存，播放时不再解码 MP3 也不再重采样。
+打包后音效文件被替换（大小或修改时间与打包时不同）时，该条目不再使用，改为直接解码文件。
+"""
+import mmap
+import os
+import struct
+import sys
+
+BUNDLE_FILE = "sounds.bundle"
+BUNDLE_MAGIC = b"FTSB"
+BUNDLE_VERSION = 2
+_HEADER = struct.Struct("<4sHIhBH")  # 魔数 | 版本 | 采样率 | 采样格式 | 声道数 | 条目数
+_ENTRY = struct.Struct("<QQQq")  # 数据偏移 | 数据长度 | 源文件大小 | 源文件修改时间（纳秒）
+_ALIGN = 4096
+
+
+def asset_key(path, base_dir):
+    """音效文件在资源包中的键"""
+    path = os.path.abspath(path)
+    try:
+        relative = os.path.relpath(path, base_dir)
+    except ValueError:  # Windows 上位于不同盘符
+        relative = os.pardir
+    key = path if relative.startswith(os.pardir) else relative
+    return os.path.normcase(key).replace(os.sep, "/")
+
+
+def _check_header(path, magic, version):
+    if magic != BUNDLE_MAGIC:
+        raise ValueError(f"不是有效的音效资源包: {path}")
+    if version != BUNDLE_VERSION:
+        raise ValueError(f"音效资源包版本为 {version}，需要 {BUNDLE_VERSION}，请重新生成: {path}")
+
+
+class SoundBundle:
+    """只读映射的音效资源包"""
+
+    def __init__(self, path):
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, frequency, size, channels, count = _HEADER.unpack_from(self._map, 0)
+            _check_header(path, magic, version)
+            self.format = (frequency, size, channels)  # 与 pygame.mixer.get_init() 相同的形式
+            self.entries = {}  # 键 -> (偏移, 长度, 源文件大小, 源文件修改时间)
+            offset = _HEADER.size
+            for _ in range(count):
+                (key_length,) = struct.unpack_from("<H", self._map, offset)
+                offset += 2
+                key = bytes(self._map[offset:offset + key_length]).decode("utf-8")
+                offset += key_length
+                self.entries[key] = _ENTRY.unpack_from(self._map, offset)
+                offset += _ENTRY.size
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def read_format(path):
+        """只读取文件头中的输出格式，用于在初始化混音器之前确定参数"""
+        with open(path, "rb") as f:
+            magic, version, frequency, size, channels, _ = _HEADER.unpack(f.read(_HEADER.size))
+        _check_header(path, magic, version)
+        return frequency, size, channels
+
+    def get(self, path):
+        """返回音效文件对应的 PCM 数据视图（不复制），不在包中时返回 None"""
+        entry = self.entries.get(asset_key(path, self.base_dir))
+        if entry is None:
+            return None
+        offset, length, _, _ = entry
+        return memoryview(self._map)[offset:offset + length]
+
+    def is_current(self, path):
+        """音效文件是否仍与打包时相同（大小和修改时间），文件不存在时返回 False
+
+        PyInstaller 单文件程序每次启动都重新解压资源，修改时间会变，只比较大小。
+        """
+        entry = self.entries.get(asset_key(path, self.base_dir))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        _, _, size, mtime_ns = entry
+        return stat.st_size == size and (getattr(sys, "frozen", False) or stat.st_mtime_ns == mtime_ns)
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # 仍有 Sound 引用着映射，随进程退出释放
+            self._map = None
+        self._file.close()
+
+
+def build_bundle(paths, output, frequency=44100, size=-16, channels=2):
+    """解码并重采样音效文件，写入资源包，返回写入的条目数
+
+    用 pygame 按目标输出格式初始化混音器后解码：Sound.get_raw() 就是
+    混音器直接可用的 PCM，运行时不需要任何转换。
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")  # 打包时不需要真实的音频设备
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    pygame.mixer.init(frequency, size, channels)
+    try:
+        actual = pygame.mixer.get_init()
+        base_dir = os.path.dirname(os.path.abspath(output))
+        entries = {}
+        for path in paths:
+            key = asset_key(path, base_dir)
+            if key in entries:
+                continue
+            if not os.path.exists(path):
+                print(f"[WARNING] 音效文件未找到，跳过: {path}")
+                continue
+            try:
+                stat = os.stat(path)
+                entries[key] = (pygame.mixer.Sound(path).get_raw(), stat.st_size, stat.st_mtime_ns)
+            except Exception as e:
+                print(f"[WARNING] 解码音效失败，跳过 {path}: {e}")
+    finally:
+        pygame.mixer.quit()
+
+    index_size = _HEADER.size + sum(2 + len(key.encode("utf-8")) + _ENTRY.size for key in entries)
+    offset = -(-index_size // _ALIGN) * _ALIGN
+    index = [_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, actual[0], actual[1], actual[2], len(entries))]
+    layout = []
+    for key, (data, source_size, source_mtime_ns) in entries.items():
+        encoded = key.encode("utf-8")
+        index.append(struct.pack("<H", len(encoded)) + encoded
+                     + _ENTRY.pack(offset, len(data), source_size, source_mtime_ns))
+        layout.append((offset, data))
+        offset = -(-(offset + len(data)) // _ALIGN) * _ALIGN
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(index))
+        for data_offset, data in layout:
+            f.seek(data_offset)
+            f.write(data)
+        f.truncate(offset)
+    os.replace(tmp_path, output)
+    return len(entries)
+
+
+def configured_sounds(include_configs=True):
+    """默认音效与全部已保存配置引用的音效文件路径"""
+    from focus_timer import ConfigManager, build_timer_settings
+
+    paths = list(build_timer_settings("default")["sounds"].values())
+    if include_configs:
+        manager = ConfigManager()
+        for name in manager.list_configs():
+            settings = build_timer_settings("custom", manager.get_config(name))
+            paths.extend(settings["sounds"].values())
+    return paths
+
+
+def main(argv=None):
+    import argparse  # 只在命令行入口使用
+    parser = argparse.ArgumentParser(description="生成预解码的音效资源包")
+    parser.add_argument("--output", default=BUNDLE_FILE, help="资源包路径，应与音效文件放在同一目录")
+    parser.add_argument("--frequency", type=int, default=44100, help="输出采样率")
+    parser.add_argument("--size", type=int, default=-16, help="采样格式（pygame 的 size，如 -16 表示有符号 16 位）")
+    parser.add_argument("--channels", type=int, default=2, help="声道数")
+    parser.add_argument("--no-configs", action="store_true", help="只打包默认音效，不包含已保存配置中的音效")
+    parser.add_argument("files", nargs="*", help="额外打包的音效文件")
+    args = parser.parse_args(argv)
+
+    paths = configured_sounds(not args.no_configs) + args.files
+    count = build_bundle(paths, args.output, args.frequency, args.size, args.channels)
+    size = os.path.getsize(args.output)
+    print(f"[SAVED] 已写入 {args.output}: {count} 个音效，{size / 1024 / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import heapq
+import os
+import threading
+import time
+
+pygame = None  # pygame 在第一次播放铃声时才导入
+
+
+class SoundEngine:
+    """音效引擎：音效只解码一次，在独立通道上非阻塞播放
+
+    每种事件（work_start / short_rest / long_rest / 自定义）的音频文件首次使用时
+    解码为 pygame.mixer.Sound 并缓存，之后每次播放只是一次通道调度。
+    播放完成通过回调通知，计时线程不会被音效长度阻塞。
+    pygame 的导入和混音器初始化都推迟到第一次播放，启动和菜单操作不承担这部分开销。
+    有预解码的音效资源包（bundle_path）时，混音器按包中的 PCM 格式初始化，
+    包内的音效直接从内存映射构造 Sound，不再解码 MP3、不再检查文件是否存在。
+    """
+
+    def __init__(self, sounds, bundle_path=None):
+        self.sound_paths = dict(sounds)
+        self.bundle_path = bundle_path
+        self.bundle = None  # 打开的 SoundBundle，格式不匹配或不存在时为 None
+        self.available = False  # 音频设备是否可用
+        self.last_latency_ms = None  # 最近一次播放调用耗时（毫秒）
+        self.decode_times_ms = {}  # 每种音效的解码耗时（毫秒）
+        self.metrics = None  # 可选的 Metrics，记录解码耗时
+        self._cache = {}  # 事件类型 -> Sound（文件缺失时为 None）
+        self._channels = {}  # 事件类型 -> 专用通道
+        self._lock = threading.Lock()
+        self._pending = []  # (预计结束时间, 序号, 通道, 音效, 事件类型, 回调)
+        self._pending_seq = 0
+        self._watcher = None
+        self._watcher_cond = threading.Condition(self._lock)
+        self._initialized = False
+
+    def init(self):
+        """初始化混音器并为每种音效预留专用通道"""
+        if self._initialized:
+            return self.available
+        self._initialized = True
+        try:
+            global pygame
+            if pygame is None:
+                import pygame
+            bundle_format = self._bundle_format()
+            if bundle_format is not None:
+                pygame.mixer.init(*bundle_format)
+            else:
+                pygame.mixer.init()
+            if bundle_format is not None and pygame.mixer.get_init() == bundle_format:
+                self._open_bundle()
+            count = len(self.sound_paths)
+            if pygame.mixer.get_num_channels() < count:
+                pygame.mixer.set_num_channels(count)
+            pygame.mixer.set_reserved(count)
+            for i, event_type in enumerate(self.sound_paths):
+                self._channels[event_type] = pygame.mixer.Channel(i)
+            self.available = True
+        except Exception as e:
+            print(f"[WARNING] 音频初始化失败，将使用文字提示: {e}")
+            self.available = False
+        return self.available
+
+    def _bundle_format(self):
+        """读取资源包的输出格式，没有可用的资源包时返回 None"""
+        if not self.bundle_path or not os.path.exists(self.bundle_path):
+            return None
+        try:
+            from sound_bundle import SoundBundle
+            return SoundBundle.read_format(self.bundle_path)
+        except Exception as e:
+            print(f"[WARNING] 读取音效资源包失败，将直接解码音效文件: {e}")
+            return None
+
+    def _open_bundle(self):
+        try:
+            from sound_bundle import SoundBundle
+            self.bundle = SoundBundle(self.bundle_path)
+        except Exception as e:
+            print(f"[WARNING] 打开音效资源包失败，将直接解码音效文件: {e}")
+            self.bundle = None
+
+    def load(self, event_type):
+        """获取已解码的音效，首次使用时从磁盘解码并缓存"""
+        if event_type in self._cache:
+            return self._cache[event_type]
+        if not self.init():
+            return None
+        sound = None
+        sound_file = self.sound_paths.get(event_type)
+        pcm = self.bundle.get(sound_file) if self.bundle is not None and sound_file else None
+        if pcm is not None and not self.bundle.is_current(sound_file):
+            print(f"[WARNING] 音效文件在打包后已改动，直接解码: {sound_file}")
+            pcm = None
+        if pcm is not None:
+            start = time.perf_counter()
+            sound = pygame.mixer.Sound(buffer=pcm)
+            elapsed = time.perf_counter() - start
+            self.decode_times_ms[event_type] = elapsed * 1000
+            if self.metrics is not None:
+                self.metrics.observe("focus_timer_bell_decode_seconds", elapsed, sound=event_type,
+                                     source="bundle")
+        elif sound_file and os.path.exists(sound_file):
+            start = time.perf_counter()
+            sound = pygame.mixer.Sound(sound_file)
+            elapsed = time.perf_counter() - start
+            self.decode_times_ms[event_type] = elapsed * 1000
+            if self.metrics is not None:
+                self.metrics.observe("focus_timer_bell_decode_seconds", elapsed, sound=event_type,
+                                     source="file")
+        elif sound_file:
+            print(f"[WARNING] 音效文件未找到: {sound_file}")
+        self._cache[event_type] = sound
+        return sound
+
+    def preload(self):
+        """预先解码所有已配置的音效"""
+        for event_type in self.sound_paths:
+            try:
+                self.load(event_type)
+            except Exception as e:
+                print(f"[WARNING] 预加载音效失败 ({event_type}): {e}")
+                self._cache[event_type] = None
+
+    def play(self, event_type, on_complete=None):
+        """非阻塞播放音效，成功开始播放返回 True
+
+        on_complete(event_type) 会在播放结束后由后台线程调用。
+        """
+        start = time.perf_counter()
+        sound = self.load(event_type)
+        if sound is None:
+            return False
+        channel = self._channels.get(event_type) or pygame.mixer.find_channel(True)
+        channel.play(sound)
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        if on_complete is not None:
+            self._watch(channel, sound, event_type, on_complete)
+        return True
+
+    def stop(self):
+        """停止所有通道的播放"""
+        if self.available and pygame is not None:
+            pygame.mixer.stop()
+
+    def _watch(self, channel, sound, event_type, on_complete):
+        """登记一次播放，由后台线程在播放结束后触发回调"""
+        with self._watcher_cond:
+            end_time = time.monotonic() + sound.get_length()
+            self._pending_seq += 1
+            heapq.heappush(self._pending,
+                           (end_time, self._pending_seq, channel, sound, event_type, on_complete))
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch_loop, daemon=True)
+                self._watcher.start()
+            self._watcher_cond.notify()
+
+    def _watch_loop(self):
+        """后台线程：按预计结束时间等待，确认通道空闲后调用回调"""
+        while True:
+            with self._watcher_cond:
+                while not self._pending:
+                    self._watcher_cond.wait()
+                end_time, _, channel, sound, event_type, on_complete = self._pending[0]
+                delay = end_time - time.monotonic()
+                if delay > 0:
+                    self._watcher_cond.wait(delay)
+                    continue
+                heapq.heappop(self._pending)
+                # 通道仍在播放同一音效时稍后再检查
+                if channel.get_busy() and channel.get_sound() is sound:
+                    self._pending_seq += 1
+                    heapq.heappush(self._pending, (time.monotonic() + 0.05, self._pending_seq,
+                                                   channel, sound, event_type, on_complete))
+                    continue
+            try:
+                on_complete(event_type)
+            except Exception as e:
+                print(f"[WARNING] 音效完成回调出错: {e}")
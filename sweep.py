@@ -0,0 +1,253 @@
+"""自定义参数扫描工具：在参数网格上模拟大量周期，找出最合适的计时设置
+
+用法：
+    python sweep.py --grid max_focus_time=60,90,120 min_focus_time=2,3 \\
+        max_single_focus_time=5,8 focus_distribution=uniform,normal \\
+        --cycles 2000 --target-cycle 110 --target-rest-ratio 0.2 --save-best 3
+
+网格参数使用与已保存配置相同的键和单位（专注时长为分钟，休息时长为秒）；
+未出现在网格中的参数取 --config 指定的已保存配置或默认值。
+每个网格点用与计时器相同的阶段规则（CycleStateMachine）模拟 --cycles 个大周期，
+网格点分配到进程池的所有核心上并行计算。第 i 个网格点使用根种子派生的第 i 条
+独立随机数流（SeedSequence.spawn），结果与进程数无关，用同一个 --seed 可以完全重现。
+--save-best K 把最好的 K 个网格点保存为 <前缀>-1 ... <前缀>-K，扫描参数合并到 --config 的
+原配置上（音效、种子等字段保留）；同名配置已存在时拒绝运行，除非指定 --force。
+"""
+import argparse
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cycle_plan import CycleStateMachine
+from focus_timer import ConfigManager, build_timer_settings
+from sampler import FocusSampler, new_seed
+
+np = None  # NumPy 在工作进程中第一次模拟时才导入
+
+# 可扫描的参数及其类型
+SWEEP_PARAMS = {
+    "max_focus_time": float,
+    "short_rest_time": float,
+    "long_rest_time": float,
+    "min_focus_time": float,
+    "max_single_focus_time": float,
+    "focus_distribution": str,
+    "focus_mean": float,
+    "focus_std": float,
+}
+
+
+def _numpy():
+    """按需导入 NumPy"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def parse_grid(specs):
+    """把 ["name=v1,v2", ...] 解析为 {参数名: [取值, ...]}"""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in SWEEP_PARAMS or not values:
+            raise ValueError(f"无法识别的网格参数: {spec}")
+        grid[name] = [SWEEP_PARAMS[name](value.strip()) for value in values.split(",") if value.strip()]
+    return grid
+
+
+def check_point(point):
+    """检查一组计时参数，无效时返回原因，有效时返回 None"""
+    if point["max_focus_time"] <= 0:
+        return "max_focus_time 必须大于 0"
+    if point["short_rest_time"] < 0 or point["long_rest_time"] < 0:
+        return "休息时长不能为负数"
+    if not 0 < point["min_focus_time"] <= point["max_single_focus_time"]:
+        return "需要 0 < min_focus_time <= max_single_focus_time"
+    if point["focus_distribution"] not in ("uniform", "normal"):
+        return f"未知的分布: {point['focus_distribution']}"
+    if point["focus_distribution"] == "normal" and point["focus_std"] <= 0:
+        return "focus_std 必须大于 0"
+    return None
+
+
+def grid_points(base, grid):
+    """展开网格，返回各网格点的完整参数字典；有无效的网格点时抛出 ValueError"""
+    names = list(grid)
+    points = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        point = dict(base)
+        point.update(zip(names, values))
+        problem = check_point(point)
+        if problem:
+            raise ValueError(f"无效的网格点（{format_params(point, grid)}）: {problem}")
+        points.append(point)
+    return points
+
+
+def positive_float(text):
+    """argparse 类型：大于 0 的浮点数"""
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"必须大于 0: {text}")
+    return value
+
+
+def positive_int(text):
+    """argparse 类型：大于 0 的整数"""
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"必须大于 0: {text}")
+    return value
+
+
+def simulate_point(task):
+    """模拟一个网格点的若干大周期，返回统计结果；参数无效时返回 None"""
+    _numpy()
+    index, params, cycles, seed = task
+    try:
+        settings = build_timer_settings("custom", params)
+        sampler = FocusSampler(settings["focus_distribution"], settings["min_focus_time"],
+                               settings["max_single_focus_time"], settings["focus_mean"],
+                               settings["focus_std"], batch_size=4096,
+                               seed=seed, spawn_key=(index,))
+    except ValueError:
+        return None
+    machine = CycleStateMachine(settings, "custom", sampler)
+    cycle_seconds = np.zeros(cycles)
+    rest_seconds = np.zeros(cycles)
+    intervals = np.zeros(cycles, dtype=np.int64)
+    cycle = 0
+    phase_limit = cycles * 10000  # 防止专注上限远大于单次专注时长时模拟不结束
+    steps = 0
+    while cycle < cycles and steps < phase_limit:
+        phase, seconds = machine.advance()
+        steps += 1
+        cycle_seconds[cycle] += seconds
+        if phase == "focus":
+            intervals[cycle] += 1
+        else:
+            rest_seconds[cycle] += seconds
+        if phase == "long_rest":
+            cycle += 1
+    if cycle == 0:
+        return None
+    cycle_seconds = cycle_seconds[:cycle]
+    rest_seconds = rest_seconds[:cycle]
+    intervals = intervals[:cycle]
+    focus_seconds = cycle_seconds - rest_seconds
+    return {
+        "index": index,
+        "params": params,
+        "cycles": cycle,
+        "cycle_minutes": float(cycle_seconds.mean() / 60),
+        "cycle_p10_minutes": float(np.percentile(cycle_seconds, 10) / 60),
+        "cycle_p90_minutes": float(np.percentile(cycle_seconds, 90) / 60),
+        "cycle_cv": float(cycle_seconds.std() / cycle_seconds.mean()) if cycle_seconds.mean() else 0.0,
+        "intervals_per_cycle": float(intervals.mean()),
+        "mean_focus_minutes": float(focus_seconds.sum() / intervals.sum() / 60) if intervals.sum() else 0.0,
+        "rest_ratio": float(rest_seconds.sum() / cycle_seconds.sum()),
+    }
+
+
+def score(result, target_cycle, target_rest_ratio):
+    """与目标的相对偏差之和（越小越好），周期长度越稳定越好"""
+    return (abs(result["cycle_minutes"] - target_cycle) / target_cycle
+            + abs(result["rest_ratio"] - target_rest_ratio) / target_rest_ratio
+            + result["cycle_cv"])
+
+
+def run_sweep(points, cycles, seed, workers=None):
+    """在进程池上模拟所有网格点，返回有效结果列表"""
+    tasks = [(index, point, cycles, seed) for index, point in enumerate(points)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(simulate_point, tasks)
+        return [result for result in results if result is not None]
+    chunksize = max(1, math.ceil(len(tasks) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for result in pool.map(simulate_point, tasks, chunksize=chunksize)
+                if result is not None]
+
+
+def format_params(params, grid):
+    """只显示网格中变化的参数"""
+    return " ".join(f"{name}={params[name]}" for name in grid)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="自定义计时参数扫描")
+    parser.add_argument("--grid", nargs="+", required=True, metavar="NAME=V1,V2",
+                        help=f"参数网格，可用参数: {', '.join(SWEEP_PARAMS)}")
+    parser.add_argument("--config", help="未扫描的参数取自该已保存配置")
+    parser.add_argument("--cycles", type=positive_int, default=1000, help="每个网格点模拟的大周期数")
+    parser.add_argument("--seed", type=int, help="根随机种子，默认随机生成")
+    parser.add_argument("--workers", type=int, help="进程数，默认使用全部核心")
+    parser.add_argument("--target-cycle", type=positive_float, default=110.0, help="目标大周期长度（分钟）")
+    parser.add_argument("--target-rest-ratio", type=positive_float, default=0.2, help="目标休息时间占比")
+    parser.add_argument("--top", type=int, default=10, help="显示排名前几的网格点")
+    parser.add_argument("--save-best", type=int, default=0, metavar="K", help="把最好的 K 个网格点保存为配置")
+    parser.add_argument("--prefix", default="sweep", help="保存配置的名称前缀")
+    parser.add_argument("--force", action="store_true", help="--save-best 时覆盖同名的已保存配置")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    base = {}
+    manager = ConfigManager()
+    if args.config:
+        base = manager.get_config(args.config)
+        if base is None:
+            print(f"[ERROR] 未找到配置 '{args.config}'")
+            return 1
+    names = [f"{args.prefix}-{rank}" for rank in range(1, args.save_best + 1)]
+    existing = [name for name in names if manager.has_config(name)]
+    if existing and not args.force:
+        print(f"[ERROR] 配置已存在: {', '.join(existing)}（使用 --force 覆盖，或用 --prefix 换一个前缀）")
+        return 1
+    config = {name: value for name, value in base.items() if name != "saved_time"}  # 保存时合并到原配置上
+    settings = build_timer_settings("custom", base) if base else build_timer_settings("default")
+    base = {name: value for name, value in settings.items() if name in SWEEP_PARAMS}
+
+    try:
+        points = grid_points(base, grid)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    workers = args.workers or os.cpu_count() or 1
+    seed = args.seed if args.seed is not None else new_seed()
+    print(f"[SWEEP] {len(points)} 个网格点 x {args.cycles} 个大周期，{workers} 个进程，随机种子 {seed}")
+    start = time.perf_counter()
+    results = run_sweep(points, args.cycles, seed, workers)
+    elapsed = time.perf_counter() - start
+    print(f"[SWEEP] 完成，耗时 {elapsed:.1f} 秒，有效网格点 {len(results)} 个")
+    if not results:
+        return 1
+
+    results.sort(key=lambda r: score(r, args.target_cycle, args.target_rest_ratio))
+    print(f"\n排名前 {min(args.top, len(results))} 的网格点"
+          f"（目标周期 {args.target_cycle:g} 分钟，目标休息占比 {args.target_rest_ratio:.0%}）:")
+    print(f"{'#':>3} {'得分':>6} {'周期(分)':>9} {'P10-P90':>13} {'专注次数':>8} {'平均专注':>8} {'休息占比':>8}  参数")
+    for rank, result in enumerate(results[:args.top], 1):
+        print(f"{rank:>3} {score(result, args.target_cycle, args.target_rest_ratio):6.3f} "
+              f"{result['cycle_minutes']:9.1f} "
+              f"{result['cycle_p10_minutes']:6.1f}-{result['cycle_p90_minutes']:<6.1f} "
+              f"{result['intervals_per_cycle']:8.1f} {result['mean_focus_minutes']:8.2f} "
+              f"{result['rest_ratio']:8.1%}  {format_params(result['params'], grid)}")
+
+    for name, result in zip(names, results):
+        # 保留 --config 中的音效、种子等未扫描字段，只替换扫描参数
+        if manager.save_config(name, dict(config, **result["params"])):
+            print(f"[SAVED] 已保存配置 '{name}'")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
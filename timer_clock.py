@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """真实时钟：单调时钟 + 墙上时间 + 真实休眠"""
+
+    def monotonic(self):
+        """单调时钟读数（秒）"""
+        return time.monotonic()
+
+    def now(self):
+        """当前墙上时间"""
+        return datetime.now()
+
+    def sleep(self, seconds):
+        """休眠指定秒数"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """虚拟时钟：sleep 不真正等待，而是立即把时间向前推进
+
+    用于无界面模拟，几天的专注/休息循环可以在毫秒级内跑完。
+    """
+
+    def __init__(self, start_time=None):
+        self.start_time = start_time or datetime.now()
+        self.elapsed = 0.0  # 已推进的虚拟秒数
+
+    def monotonic(self):
+        """虚拟单调时钟读数（秒）"""
+        return self.elapsed
+
+    def now(self):
+        """虚拟墙上时间"""
+        return self.start_time + timedelta(seconds=self.elapsed)
+
+    def sleep(self, seconds):
+        """立即推进虚拟时间"""
+        if seconds > 0:
+            self.elapsed += seconds
+
+
+class ScaledClock(VirtualClock):
+    """倍速虚拟时钟：虚拟时间推进 seconds 秒时真实等待 seconds / speed 秒
+
+    用于按指定倍速回放录制的会话，speed=60 时一分钟的会话一秒放完。
+    """
+
+    def __init__(self, speed, start_time=None):
+        super().__init__(start_time)
+        self.speed = speed
+
+    def sleep(self, seconds):
+        """按倍速等待后推进虚拟时间"""
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+            self.elapsed += seconds
+
+
+SYSTEM_CLOCK = SystemClock()